@@ -0,0 +1,105 @@
+
+-- Per-company aggregates for data_completeness_checker.py
+-- Same query as COMPANY_SUMMARY_QUERY there; the checks read this view when it exists
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_companies_summary AS
+WITH price AS (
+    SELECT 
+        company_id,
+        COUNT(*) as price_records,
+        MIN(date) as earliest_date,
+        MAX(date) as latest_date,
+        COUNT(*) FILTER (WHERE volume > 0) as days_with_volume,
+        COUNT(*) FILTER (WHERE dividends > 0) as dividend_days,
+        COUNT(*) FILTER (WHERE stock_splits > 0) as split_days
+    FROM price_history
+    GROUP BY company_id
+),
+income AS (
+    SELECT 
+        company_id,
+        COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'annual') as annual_income_statements,
+        COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'quarterly') as quarterly_income_statements,
+        MAX(period_ending) FILTER (WHERE period_type = 'annual') as latest_annual_report,
+        MAX(period_ending) FILTER (WHERE period_type = 'quarterly') as latest_quarterly_report
+    FROM income_statements
+    GROUP BY company_id
+),
+balance AS (
+    SELECT 
+        company_id,
+        COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'annual') as annual_balance_sheets,
+        COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'quarterly') as quarterly_balance_sheets
+    FROM balance_sheets
+    GROUP BY company_id
+),
+cashflow AS (
+    SELECT 
+        company_id,
+        COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'annual') as annual_cashflow,
+        COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'quarterly') as quarterly_cashflow
+    FROM cash_flow_statements
+    GROUP BY company_id
+),
+actions AS (
+    SELECT 
+        company_id,
+        COUNT(*) FILTER (WHERE action_type = 'dividend') as dividend_records,
+        COUNT(*) FILTER (WHERE action_type = 'stock_split') as split_records,
+        MAX(action_date) FILTER (WHERE action_type = 'dividend') as last_dividend,
+        MAX(action_date) FILTER (WHERE action_type = 'stock_split') as last_split
+    FROM corporate_actions
+    GROUP BY company_id
+),
+earnings_agg AS (
+    SELECT 
+        company_id,
+        COUNT(*) as earnings_records,
+        COUNT(reported_eps) as reported_eps_count,
+        COUNT(eps_estimate) as eps_estimate_count,
+        COUNT(surprise_percent) as surprise_count,
+        MAX(earnings_date) as latest_earnings_date
+    FROM earnings
+    GROUP BY company_id
+)
+SELECT 
+    c.id,
+    c.symbol,
+    COALESCE(p.price_records, 0) as price_records,
+    p.earliest_date,
+    p.latest_date,
+    COALESCE(p.days_with_volume, 0) as days_with_volume,
+    COALESCE(p.dividend_days, 0) as dividend_days,
+    COALESCE(p.split_days, 0) as split_days,
+    COALESCE(i.annual_income_statements, 0) as annual_income_statements,
+    COALESCE(i.quarterly_income_statements, 0) as quarterly_income_statements,
+    COALESCE(b.annual_balance_sheets, 0) as annual_balance_sheets,
+    COALESCE(b.quarterly_balance_sheets, 0) as quarterly_balance_sheets,
+    COALESCE(cf.annual_cashflow, 0) as annual_cashflow,
+    COALESCE(cf.quarterly_cashflow, 0) as quarterly_cashflow,
+    i.latest_annual_report,
+    i.latest_quarterly_report,
+    COALESCE(a.dividend_records, 0) as dividend_records,
+    COALESCE(a.split_records, 0) as split_records,
+    a.last_dividend,
+    a.last_split,
+    COALESCE(e.earnings_records, 0) as earnings_records,
+    COALESCE(e.reported_eps_count, 0) as reported_eps_count,
+    COALESCE(e.eps_estimate_count, 0) as eps_estimate_count,
+    COALESCE(e.surprise_count, 0) as surprise_count,
+    e.latest_earnings_date
+FROM companies c
+LEFT JOIN price p ON c.id = p.company_id
+LEFT JOIN income i ON c.id = i.company_id
+LEFT JOIN balance b ON c.id = b.company_id
+LEFT JOIN cashflow cf ON c.id = cf.company_id
+LEFT JOIN actions a ON c.id = a.company_id
+LEFT JOIN earnings_agg e ON c.id = e.company_id;
+
+-- REFRESH ... CONCURRENTLY needs a unique index on plain columns
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_companies_summary_id ON mv_companies_summary(id);
+
+-- data_quality_maintenance.py refreshes the view in its daily run; to refresh
+-- it on its own schedule instead (requires the pg_cron extension):
+-- SELECT cron.schedule('refresh-companies-summary', '30 2 * * *',
+--                      'REFRESH MATERIALIZED VIEW CONCURRENTLY mv_companies_summary');
@@ -7,64 +7,212 @@ Analyzes if 2000+ NSE symbols are being processed and stored correctly
 
 import psycopg2
 import os
+import sys
+import json
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
 
+LOCAL_SOCKET_DIR = '/var/run/postgresql'
+STATUS_DAEMON_SOCKET = os.getenv('STATUS_DAEMON_SOCKET', '/tmp/nse_status_daemon.sock')
+
+def fetch_report_from_daemon(socket_path=STATUS_DAEMON_SOCKET):
+    """Ask a running status_daemon.py for a JSON report; None if no daemon is listening"""
+    import socket
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            sock.sendall(b'?')
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        return b''.join(chunks).decode() or None
+    except OSError:
+        return None
+
 class ComprehensiveStatusChecker:
-    def __init__(self):
+    # Data quality labels and their columns in mv_db_status_summary
+    QUALITY_SUMMARY_COLUMNS = {
+        'Total Companies': 'total_companies',
+        'With Symbol': 'with_symbol',
+        'With Company Name': 'with_company_name',
+        'With Sector Info': 'with_sector',
+        'With Price Data': 'with_price_data',
+        'With Metrics': 'with_metrics',
+        'With Financial Data': 'with_financial_data',
+        'With Corporate Actions': 'with_corporate_actions'
+    }
+    
+    def __init__(self, render=True):
+        self.render = render
+        self.status_summary = None
         self.setup_logging()
         self.connect_db()
+        self.prepare_quality_query()
     
     def setup_logging(self):
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
     
     def connect_db(self):
+        # Bound every status query so the checker never queues behind the loaders
+        connect_kwargs = {
+            'options': '-c statement_timeout=5s -c idle_in_transaction_session_timeout=10s',
+            'keepalives': 1,
+            'keepalives_idle': 30,
+            'keepalives_interval': 10,
+            'tcp_user_timeout': 5000
+        }
         try:
-            database_url = os.getenv('DATABASE_URL')
+            # Read from a replica when one is configured
+            database_url = os.getenv('DATABASE_REPLICA_URL', os.getenv('DATABASE_URL'))
             if database_url:
-                self.conn = psycopg2.connect(database_url)
+                self.conn = psycopg2.connect(database_url, **connect_kwargs)
             else:
                 from database_config import get_database_config
-                db_config = get_database_config()
-                self.conn = psycopg2.connect(**db_config)
+                db_config = dict(get_database_config())
+                # Skip the TCP stack entirely for a local server
+                if db_config['host'] in ('localhost', '127.0.0.1') and os.path.isdir(LOCAL_SOCKET_DIR):
+                    db_config['host'] = LOCAL_SOCKET_DIR
+                self.conn = psycopg2.connect(**db_config, **connect_kwargs)
+            # All checks share one read-only snapshot
+            self.conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
             self.logger.info("✅ Database connection established")
         except Exception as e:
             self.logger.error(f"❌ Database connection failed: {e}")
             raise
     
-    def check_symbol_files(self):
-        """Check symbol files status"""
+    def build_quality_sql(self, present_tables):
+        """Build the data quality query for the tables that exist in this deployment"""
+        def has_rows(table, alias):
+            if table not in present_tables:
+                return None
+            return f"EXISTS (SELECT 1 FROM {table} {alias} WHERE {alias}.company_id = c.id)"
+        
+        financial = [cond for cond in (
+            has_rows('income_statements', 'i'),
+            has_rows('balance_sheets', 'b'),
+            has_rows('cash_flow_statements', 'cf')
+        ) if cond]
+        
+        # Same order as QUALITY_SUMMARY_COLUMNS, after 'Total Companies'
+        conditions = [
+            "c.symbol IS NOT NULL",
+            "c.long_name IS NOT NULL",
+            "c.sector IS NOT NULL",
+            has_rows('price_history', 'ph'),
+            has_rows('company_metrics', 'cm'),
+            " OR ".join(financial) if financial else None,
+            has_rows('corporate_actions', 'ca')
+        ]
+        
+        columns = ["COUNT(*)"]
+        for condition in conditions:
+            if condition is None:
+                columns.append("0")
+            else:
+                columns.append(f"COUNT(*) FILTER (WHERE {condition})")
+        
+        return "SELECT " + ", ".join(columns) + " FROM companies c"
+    
+    def prepare_quality_query(self):
+        """Specialize the data quality query for the current schema and prepare it once"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT table_name FROM information_schema.tables
+                WHERE table_schema = 'public' AND table_name = ANY(%s)
+            """, ([
+                'price_history', 'company_metrics', 'income_statements',
+                'balance_sheets', 'cash_flow_statements', 'corporate_actions'
+            ],))
+            present_tables = {row[0] for row in cursor.fetchall()}
+            self._quality_sql = self.build_quality_sql(present_tables)
+            cursor.execute("PREPARE quality_stats AS " + self._quality_sql)
+            self.conn.commit()
+        except Exception as e:
+            self.logger.error(f"❌ Failed to prepare data quality query: {e}")
+            self.conn.rollback()
+        finally:
+            cursor.close()
+    
+    def load_status_summary(self):
+        """Fetch the pre-aggregated mv_db_status_summary row, or None if the view is absent"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("SELECT to_regclass('mv_db_status_summary')")
+            if cursor.fetchone()[0] is None:
+                return None
+            cursor.execute("SELECT * FROM mv_db_status_summary")
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            columns = [desc[0] for desc in cursor.description]
+            return dict(zip(columns, row))
+        except Exception as e:
+            self.logger.warning(f"Status summary view unavailable, using live queries: {e}")
+            self.conn.rollback()
+            return None
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _count_and_sample(path, n=5):
+        """Count non-empty lines in a symbol file, keeping only the first n"""
+        count = 0
+        sample = []
+        with open(path, 'rb') as f:
+            for line in f:
+                s = line.strip()
+                if not s:
+                    continue
+                if len(sample) < n:
+                    sample.append(s.decode())
+                count += 1
+        return count, sample
+    
+    def _collect_symbol_files(self):
+        """Count symbols in each symbol file; None for files that are missing"""
+        files = {}
+        for path in ('nse_complete_universe.txt', 'nse_symbols.txt'):
+            if os.path.exists(path):
+                count, sample = self._count_and_sample(path)
+                files[path] = {'count': count, 'sample': sample}
+            else:
+                files[path] = None
+        return files
+    
+    def _render_symbol_files(self, data):
         print("\n🔍 SYMBOL FILES STATUS")
         print("=" * 50)
         
-        # Check nse_complete_universe.txt
-        if os.path.exists('nse_complete_universe.txt'):
-            with open('nse_complete_universe.txt', 'r') as f:
-                universe_symbols = [line.strip() for line in f.readlines() if line.strip()]
-            print(f"✅ nse_complete_universe.txt: {len(universe_symbols)} symbols")
-            print(f"   Sample symbols: {', '.join(universe_symbols[:5])}")
+        universe = data['nse_complete_universe.txt']
+        if universe is not None:
+            print(f"✅ nse_complete_universe.txt: {universe['count']} symbols")
+            print(f"   Sample symbols: {', '.join(universe['sample'])}")
         else:
             print("❌ nse_complete_universe.txt not found")
         
-        # Check nse_symbols.txt
-        if os.path.exists('nse_symbols.txt'):
-            with open('nse_symbols.txt', 'r') as f:
-                basic_symbols = [line.strip() for line in f.readlines() if line.strip()]
-            print(f"✅ nse_symbols.txt: {len(basic_symbols)} symbols")
+        basic = data['nse_symbols.txt']
+        if basic is not None:
+            print(f"✅ nse_symbols.txt: {basic['count']} symbols")
         else:
             print("❌ nse_symbols.txt not found")
-        
-        return universe_symbols if 'universe_symbols' in locals() else []
     
-    def check_database_tables(self):
-        """Check all database tables and their data"""
-        print("\n📊 DATABASE TABLES STATUS")
-        print("=" * 50)
-        
-        cursor = self.conn.cursor()
-        
+    def check_symbol_files(self):
+        """Check symbol files status"""
+        data = self._collect_symbol_files()
+        self._render_symbol_files(data)
+        universe = data['nse_complete_universe.txt']
+        return universe['count'] if universe else 0
+    
+    def _collect_database_tables(self):
+        """Record and company counts for every table"""
         tables = [
             'companies', 'price_history', 'company_metrics', 
             'income_statements', 'balance_sheets', 'cash_flow_statements',
@@ -73,6 +221,29 @@ class ComprehensiveStatusChecker:
         
         table_stats = {}
         
+        if self.status_summary:
+            for table in tables:
+                table_stats[table] = {
+                    'records': self.status_summary[f"{table}_records"],
+                    'companies': self.status_summary[f"{table}_companies"]
+                }
+            return {'refreshed_at': self.status_summary['refreshed_at'], 'tables': table_stats}
+        
+        cursor = self.conn.cursor()
+        
+        # Find every table carrying a company_id column in one catalog lookup
+        try:
+            # to_regclass resolves each name as the unqualified queries below do
+            cursor.execute("""
+                SELECT name FROM unnest(%s::text[]) AS name
+                JOIN pg_attribute a ON a.attrelid = to_regclass(name)
+                WHERE a.attname = 'company_id' AND NOT a.attisdropped
+            """, (tables,))
+            has_company_id = {row[0] for row in cursor.fetchall()}
+        except Exception as e:
+            self.conn.rollback()
+            has_company_id = set()
+        
         for table in tables:
             try:
                 # Get basic count
@@ -81,13 +252,7 @@ class ComprehensiveStatusChecker:
                 
                 # Get unique companies if company_id exists
                 try:
-                    cursor.execute(f"""
-                        SELECT column_name FROM information_schema.columns 
-                        WHERE table_name = '{table}' AND column_name = 'company_id'
-                    """)
-                    has_company_id = cursor.fetchone() is not None
-                    
-                    if has_company_id:
+                    if table in has_company_id:
                         cursor.execute(f"SELECT COUNT(DISTINCT company_id) FROM {table}")
                         unique_companies = cursor.fetchone()[0]
                     else:
@@ -100,122 +265,188 @@ class ComprehensiveStatusChecker:
                     'companies': unique_companies
                 }
                 
-                print(f"✅ {table:<20}: {total_records:>8} records, {unique_companies:>4} companies")
-                
             except Exception as e:
-                print(f"❌ {table:<20}: Error - {e}")
-                table_stats[table] = {'records': 0, 'companies': 0}
+                table_stats[table] = {'records': 0, 'companies': 0, 'error': str(e)}
         
         cursor.close()
-        return table_stats
+        return {'refreshed_at': None, 'tables': table_stats}
     
-    def check_data_quality(self):
-        """Check data quality and completeness"""
-        print("\n🔍 DATA QUALITY ANALYSIS")
+    def _render_database_tables(self, data):
+        print("\n📊 DATABASE TABLES STATUS")
         print("=" * 50)
         
-        cursor = self.conn.cursor()
+        if data['refreshed_at'] is not None:
+            print(f"(from mv_db_status_summary, refreshed {data['refreshed_at']})")
         
-        # Check companies with different types of data
-        queries = {
-            'Total Companies': "SELECT COUNT(*) FROM companies",
-            'With Symbol': "SELECT COUNT(*) FROM companies WHERE symbol IS NOT NULL",
-            'With Company Name': "SELECT COUNT(*) FROM companies WHERE long_name IS NOT NULL",
-            'With Sector Info': "SELECT COUNT(*) FROM companies WHERE sector IS NOT NULL",
-            'With Price Data': """
-                SELECT COUNT(DISTINCT c.id) FROM companies c 
-                INNER JOIN price_history ph ON c.id = ph.company_id
-            """,
-            'With Metrics': """
-                SELECT COUNT(DISTINCT c.id) FROM companies c 
-                INNER JOIN company_metrics cm ON c.id = cm.company_id
-            """,
-            'With Financial Data': """
-                SELECT COUNT(DISTINCT c.id) FROM companies c 
-                WHERE EXISTS (
-                    SELECT 1 FROM income_statements i WHERE i.company_id = c.id
-                    OR EXISTS (SELECT 1 FROM balance_sheets b WHERE b.company_id = c.id)
-                    OR EXISTS (SELECT 1 FROM cash_flow_statements cf WHERE cf.company_id = c.id)
-                )
-            """,
-            'With Corporate Actions': """
-                SELECT COUNT(DISTINCT c.id) FROM companies c 
-                INNER JOIN corporate_actions ca ON c.id = ca.company_id
-            """
-        }
+        for table, stats in data['tables'].items():
+            if 'error' in stats:
+                print(f"❌ {table:<20}: Error - {stats['error']}")
+            else:
+                print(f"✅ {table:<20}: {stats['records']:>8} records, {stats['companies']:>4} companies")
+    
+    def check_database_tables(self):
+        """Check all database tables and their data"""
+        data = self._collect_database_tables()
+        self._render_database_tables(data)
+        return data['tables']
+    
+    def _collect_data_quality(self):
+        """Counts of companies carrying each kind of data"""
+        if self.status_summary:
+            results = {description: self.status_summary[column]
+                       for description, column in self.QUALITY_SUMMARY_COLUMNS.items()}
+            return {'results': results, 'error': None}
         
-        results = {}
-        for description, query in queries.items():
-            try:
-                cursor.execute(query)
-                count = cursor.fetchone()[0]
-                results[description] = count
-                print(f"{description:<25}: {count:>6}")
-            except Exception as e:
-                print(f"{description:<25}: Error - {e}")
-                results[description] = 0
+        cursor = self.conn.cursor()
+        
+        try:
+            cursor.execute("EXECUTE quality_stats")
+            row = cursor.fetchone()
+            results = dict(zip(self.QUALITY_SUMMARY_COLUMNS, row))
+            error = None
+        except Exception as e:
+            self.conn.rollback()
+            results = {description: 0 for description in self.QUALITY_SUMMARY_COLUMNS}
+            error = str(e)
         
         cursor.close()
-        return results
+        return {'results': results, 'error': error}
     
-    def check_recent_activity(self):
-        """Check recent download/update activity"""
-        print("\n⏰ RECENT ACTIVITY STATUS")
+    def _render_data_quality(self, data):
+        print("\n🔍 DATA QUALITY ANALYSIS")
         print("=" * 50)
         
+        for description, count in data['results'].items():
+            if data['error']:
+                print(f"{description:<25}: Error - {data['error']}")
+            else:
+                print(f"{description:<25}: {count:>6}")
+    
+    def check_data_quality(self):
+        """Check data quality and completeness"""
+        data = self._collect_data_quality()
+        self._render_data_quality(data)
+        return data['results']
+    
+    def _collect_recent_activity(self):
+        """Update activity over the last 24 hours and the freshest price data"""
+        data = {'recent_updates': None, 'latest_prices': None, 'missing_tables': [], 'errors': []}
+        
         cursor = self.conn.cursor()
         
+        # Gate each query on the tables it needs instead of failing the whole block
+        required = ['data_updates', 'price_history', 'companies']
         try:
-            # Check data_updates table for recent activity
+            # to_regclass resolves each name as the unqualified queries below do
             cursor.execute("""
-                SELECT 
-                    table_name,
-                    COUNT(*) as updates,
-                    MAX(update_timestamp) as last_update,
-                    SUM(records_affected) as total_records
-                FROM data_updates 
-                WHERE update_timestamp >= NOW() - INTERVAL '24 hours'
-                GROUP BY table_name
-                ORDER BY last_update DESC
-            """)
-            
-            recent_updates = cursor.fetchall()
-            if recent_updates:
-                print("Recent activity (last 24 hours):")
-                for table, updates, last_update, records in recent_updates:
-                    print(f"  {table:<20}: {updates:>3} updates, {records:>6} records, last: {last_update}")
-            else:
-                print("❌ No recent activity found in last 24 hours")
-            
-            # Check latest price data
-            cursor.execute("""
-                SELECT 
-                    c.symbol,
-                    MAX(ph.date) as latest_date,
-                    COUNT(ph.id) as price_records
-                FROM companies c
-                JOIN price_history ph ON c.id = ph.company_id
-                GROUP BY c.id, c.symbol
-                ORDER BY latest_date DESC
-                LIMIT 10
-            """)
-            
-            latest_prices = cursor.fetchall()
-            if latest_prices:
-                print(f"\nLatest price data (top 10):")
-                for symbol, latest_date, records in latest_prices:
-                    print(f"  {symbol:<15}: {latest_date}, {records:>4} price records")
-        
+                SELECT name FROM unnest(%s::text[]) AS name
+                JOIN pg_class c ON c.oid = to_regclass(name)
+                WHERE c.relkind = 'r'
+            """, (required,))
+            present = {row[0] for row in cursor.fetchall()}
         except Exception as e:
-            print(f"❌ Error checking recent activity: {e}")
+            self.conn.rollback()
+            data['errors'].append(str(e))
+            cursor.close()
+            return data
+        data['missing_tables'] = [table for table in required if table not in present]
+        
+        if 'data_updates' in present:
+            try:
+                # Check data_updates table for recent activity
+                cursor.execute("""
+                    SELECT 
+                        table_name,
+                        COUNT(*) as updates,
+                        MAX(update_timestamp) as last_update,
+                        SUM(records_affected) as total_records
+                    FROM data_updates 
+                    WHERE update_timestamp >= NOW() - INTERVAL '24 hours'
+                    GROUP BY table_name
+                    ORDER BY last_update DESC
+                """)
+                
+                data['recent_updates'] = [
+                    {'table': table, 'updates': updates, 'last_update': last_update, 'records': records}
+                    for table, updates, last_update, records in cursor.fetchall()
+                ]
+            except Exception as e:
+                self.conn.rollback()
+                data['errors'].append(str(e))
+        
+        if 'price_history' in present and 'companies' in present:
+            try:
+                # Check latest price data: one (company_id, date DESC) index descent
+                # per company picks the top 10, and only those get their rows counted
+                cursor.execute("""
+                    WITH latest AS (
+                        SELECT c.id, c.symbol, lat.latest_date
+                        FROM companies c
+                        CROSS JOIN LATERAL (
+                            SELECT ph.date as latest_date
+                            FROM price_history ph
+                            WHERE ph.company_id = c.id
+                            ORDER BY ph.date DESC
+                            LIMIT 1
+                        ) lat
+                        ORDER BY lat.latest_date DESC
+                        LIMIT 10
+                    )
+                    SELECT 
+                        l.symbol,
+                        l.latest_date,
+                        cnt.price_records
+                    FROM latest l
+                    CROSS JOIN LATERAL (
+                        SELECT COUNT(*) as price_records
+                        FROM price_history ph
+                        WHERE ph.company_id = l.id
+                    ) cnt
+                    ORDER BY l.latest_date DESC
+                """)
+                
+                data['latest_prices'] = [
+                    {'symbol': symbol, 'latest_date': latest_date, 'records': records}
+                    for symbol, latest_date, records in cursor.fetchall()
+                ]
+            except Exception as e:
+                self.conn.rollback()
+                data['errors'].append(str(e))
         
         cursor.close()
+        return data
     
-    def check_running_processes(self):
-        """Check if download processes are currently running"""
-        print("\n🔄 RUNNING PROCESSES STATUS")
+    def _render_recent_activity(self, data):
+        print("\n⏰ RECENT ACTIVITY STATUS")
         print("=" * 50)
         
+        if data['recent_updates']:
+            print("Recent activity (last 24 hours):")
+            for update in data['recent_updates']:
+                print(f"  {update['table']:<20}: {update['updates']:>3} updates, "
+                      f"{update['records']:>6} records, last: {update['last_update']}")
+        elif data['recent_updates'] is not None:
+            print("❌ No recent activity found in last 24 hours")
+        
+        if data['latest_prices']:
+            print(f"\nLatest price data (top 10):")
+            for price in data['latest_prices']:
+                print(f"  {price['symbol']:<15}: {price['latest_date']}, {price['records']:>4} price records")
+        
+        for table in data['missing_tables']:
+            print(f"❌ {table} table not found")
+        
+        for error in data['errors']:
+            print(f"❌ Error checking recent activity: {error}")
+    
+    def check_recent_activity(self):
+        """Check recent download/update activity"""
+        data = self._collect_recent_activity()
+        self._render_recent_activity(data)
+        return data
+    
+    def _collect_running_processes(self):
+        """Downloader processes currently running on this host"""
         import subprocess
         try:
             # Check for Python processes related to downloading
@@ -225,72 +456,124 @@ class ComprehensiveStatusChecker:
             downloader_processes = [p for p in python_processes if any(keyword in p for keyword in [
                 'yfinance_nse_downloader', 'main_data_loader', 'fetch_complete_nse'
             ])]
-            
-            if downloader_processes:
-                print("✅ Found running download processes:")
-                for process in downloader_processes:
-                    print(f"  {process}")
-            else:
-                print("ℹ️  No download processes currently running")
+            return {'processes': downloader_processes, 'error': None}
         
         except Exception as e:
-            print(f"❌ Error checking processes: {e}")
+            return {'processes': [], 'error': str(e)}
     
-    def check_file_logs(self):
-        """Check log files for status"""
-        print("\n📋 LOG FILES STATUS")
+    def _render_running_processes(self, data):
+        print("\n🔄 RUNNING PROCESSES STATUS")
         print("=" * 50)
         
+        if data['error']:
+            print(f"❌ Error checking processes: {data['error']}")
+        elif data['processes']:
+            print("✅ Found running download processes:")
+            for process in data['processes']:
+                print(f"  {process}")
+        else:
+            print("ℹ️  No download processes currently running")
+    
+    def check_running_processes(self):
+        """Check if download processes are currently running"""
+        data = self._collect_running_processes()
+        self._render_running_processes(data)
+        return data
+    
+    def _collect_file_logs(self):
+        """Line count and last entries of each log file; None for files that are missing"""
         log_files = ['yfinance_nse_downloader.log', 'yfinance_loader.log']
         
+        logs = {}
         for log_file in log_files:
             if os.path.exists(log_file):
                 try:
                     with open(log_file, 'r') as f:
                         lines = f.readlines()
-                    
-                    print(f"✅ {log_file}: {len(lines)} lines")
-                    
-                    # Show last few entries
-                    if lines:
-                        print(f"   Last entries:")
-                        for line in lines[-3:]:
-                            print(f"     {line.strip()}")
+                    logs[log_file] = {
+                        'lines': len(lines),
+                        'last_entries': [line.strip() for line in lines[-3:]]
+                    }
                 except Exception as e:
-                    print(f"❌ Error reading {log_file}: {e}")
+                    logs[log_file] = {'error': str(e)}
             else:
-                print(f"ℹ️  {log_file}: Not found")
+                logs[log_file] = None
+        return logs
     
-    def generate_recommendations(self, symbol_count, table_stats, quality_results):
-        """Generate recommendations based on analysis"""
-        print("\n💡 RECOMMENDATIONS & NEXT STEPS")
+    def _render_file_logs(self, data):
+        print("\n📋 LOG FILES STATUS")
         print("=" * 50)
         
+        for log_file, log in data.items():
+            if log is None:
+                print(f"ℹ️  {log_file}: Not found")
+            elif 'error' in log:
+                print(f"❌ Error reading {log_file}: {log['error']}")
+            else:
+                print(f"✅ {log_file}: {log['lines']} lines")
+                
+                # Show last few entries
+                if log['last_entries']:
+                    print(f"   Last entries:")
+                    for line in log['last_entries']:
+                        print(f"     {line}")
+    
+    def check_file_logs(self):
+        """Check log files for status"""
+        data = self._collect_file_logs()
+        self._render_file_logs(data)
+        return data
+    
+    def _collect_recommendations(self, symbol_count, table_stats, quality_results):
+        """Completion percentages and the overall status bucket"""
         total_companies = quality_results.get('Total Companies', 0)
         with_price_data = quality_results.get('With Price Data', 0)
         with_financial_data = quality_results.get('With Financial Data', 0)
         
         # Calculate completion percentages
+        progress = (total_companies / symbol_count * 100) if symbol_count > 0 else 0
         price_completion = (with_price_data / symbol_count * 100) if symbol_count > 0 else 0
         financial_completion = (with_financial_data / symbol_count * 100) if symbol_count > 0 else 0
         
-        print(f"📊 TARGET: {symbol_count} NSE symbols")
-        print(f"📊 CURRENT: {total_companies} companies in database")
-        print(f"📊 PROGRESS: {total_companies/symbol_count*100:.1f}% companies loaded")
-        print(f"📊 PRICE DATA: {price_completion:.1f}% completion")
-        print(f"📊 FINANCIAL DATA: {financial_completion:.1f}% completion")
-        
         if total_companies < symbol_count * 0.1:  # Less than 10% loaded
+            status = 'urgent'
+        elif total_companies < symbol_count * 0.5:  # Less than 50% loaded
+            status = 'recommended'
+        elif total_companies >= symbol_count * 0.8:  # 80% or more loaded
+            status = 'good'
+        else:
+            status = None
+        
+        return {
+            'target': symbol_count,
+            'current': total_companies,
+            'progress': progress,
+            'price_completion': price_completion,
+            'financial_completion': financial_completion,
+            'status': status
+        }
+    
+    def _render_recommendations(self, data):
+        print("\n💡 RECOMMENDATIONS & NEXT STEPS")
+        print("=" * 50)
+        
+        print(f"📊 TARGET: {data['target']} NSE symbols")
+        print(f"📊 CURRENT: {data['current']} companies in database")
+        print(f"📊 PROGRESS: {data['progress']:.1f}% companies loaded")
+        print(f"📊 PRICE DATA: {data['price_completion']:.1f}% completion")
+        print(f"📊 FINANCIAL DATA: {data['financial_completion']:.1f}% completion")
+        
+        if data['status'] == 'urgent':
             print("\n🚨 URGENT ACTIONS NEEDED:")
             print("1. Start the main downloader: python yfinance_nse_downloader.py")
             print("2. Monitor progress with: python check_data_status.py")
             print("3. Check logs for any errors")
-        elif total_companies < symbol_count * 0.5:  # Less than 50% loaded
+        elif data['status'] == 'recommended':
             print("\n⚠️  ACTIONS RECOMMENDED:")
             print("1. Continue running the downloader")
             print("2. Monitor for any stalled processes")
             print("3. Check for rate limiting issues")
-        elif total_companies >= symbol_count * 0.8:  # 80% or more loaded
+        elif data['status'] == 'good':
             print("\n✅ SYSTEM STATUS: GOOD")
             print("1. Download process is working well")
             print("2. Consider running data quality checks")
@@ -301,48 +584,89 @@ class ComprehensiveStatusChecker:
         print(f"• Start download: python yfinance_nse_downloader.py")
         print(f"• View data: python -c \"import psycopg2; print('Connect to view data')\"")
     
-    def run_comprehensive_check(self):
-        """Run all checks and generate report"""
+    def generate_recommendations(self, symbol_count, table_stats, quality_results):
+        """Generate recommendations based on analysis"""
+        data = self._collect_recommendations(symbol_count, table_stats, quality_results)
+        self._render_recommendations(data)
+        return data
+    
+    def _render(self, report):
+        """Print the full report collected by run_comprehensive_check"""
         print("🚀 COMPREHENSIVE NSE DATA SYSTEM STATUS CHECK")
         print("=" * 60)
-        from datetime import datetime
-        import time
-        current_time = datetime.now()
-        print(f"⏰ Report generated: {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"⏰ System time (UTC): {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
+        print(f"⏰ Report generated: {report['generated_at_local'].strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"⏰ System time (UTC): {report['generated_at'].strftime('%Y-%m-%d %H:%M:%S')} UTC")
+        
+        self._render_symbol_files(report['symbol_files'])
+        self._render_database_tables(report['tables'])
+        self._render_data_quality(report['quality'])
+        self._render_recent_activity(report['recent_activity'])
+        self._render_running_processes(report['processes'])
+        self._render_file_logs(report['logs'])
+        self._render_recommendations(report['recommendations'])
+        
+        print("\n" + "=" * 60)
+        print("✅ Comprehensive status check completed!")
+    
+    def run_comprehensive_check(self):
+        """Run all checks and return the report, printing it when self.render is set"""
+        now_utc = datetime.now(timezone.utc)
+        report = {
+            'generated_at': now_utc,
+            'generated_at_local': now_utc.astimezone()
+        }
         
         # 1. Check symbol files
-        symbols = self.check_symbol_files()
-        symbol_count = len(symbols)
+        report['symbol_files'] = self._collect_symbol_files()
+        universe = report['symbol_files']['nse_complete_universe.txt']
+        symbol_count = universe['count'] if universe else 0
+        
+        # Serve table and quality sections from the summary view when available
+        self.status_summary = self.load_status_summary()
         
         # 2. Check database tables
-        table_stats = self.check_database_tables()
+        report['tables'] = self._collect_database_tables()
         
         # 3. Check data quality
-        quality_results = self.check_data_quality()
+        report['quality'] = self._collect_data_quality()
         
         # 4. Check recent activity
-        self.check_recent_activity()
+        report['recent_activity'] = self._collect_recent_activity()
+        
+        # Release the read snapshot before the non-database checks
+        self.conn.rollback()
         
         # 5. Check running processes
-        self.check_running_processes()
+        report['processes'] = self._collect_running_processes()
         
         # 6. Check log files
-        self.check_file_logs()
+        report['logs'] = self._collect_file_logs()
         
         # 7. Generate recommendations
-        self.generate_recommendations(symbol_count, table_stats, quality_results)
+        report['recommendations'] = self._collect_recommendations(
+            symbol_count, report['tables']['tables'], report['quality']['results']
+        )
         
-        print("\n" + "=" * 60)
-        print("✅ Comprehensive status check completed!")
+        if self.render:
+            self._render(report)
+        return report
     
     def close(self):
         if self.conn:
             self.conn.close()
 
 if __name__ == "__main__":
-    checker = ComprehensiveStatusChecker()
+    as_json = '--json' in sys.argv
+    if as_json:
+        daemon_report = fetch_report_from_daemon()
+        if daemon_report is not None:
+            sys.stdout.write(daemon_report + "\n")
+            sys.exit(0)
+    checker = ComprehensiveStatusChecker(render=not as_json)
     try:
-        checker.run_comprehensive_check()
+        report = checker.run_comprehensive_check()
+        if as_json:
+            json.dump(report, sys.stdout, default=str)
+            sys.stdout.write("\n")
     finally:
         checker.close()
@@ -1,22 +1,338 @@
 
 import pandas as pd
+import numpy as np
 import psycopg2
-from psycopg2.extras import execute_values, RealDictCursor
+from psycopg2.extras import execute_values
 import os
+import re
+import sys
+import io
+import csv
 import json
 from datetime import datetime, date
 import logging
-import glob
+import itertools
+from contextlib import contextmanager
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
-from database_config import get_database_config
+from database_config import get_database_config, get_connection_pool, get_db_connection
+
+# Cell values the safe_convert_to_* helpers treat as missing
+NA_STRINGS = frozenset({'', 'N/A', 'NA', 'nan', 'None'})
+
+# Date strings safe_convert_to_date accepts: YYYY-MM-DD[ HH:MM:SS], MM/DD/YYYY, DD/MM/YYYY
+ISO_DATE_PATTERN = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?: (\d{1,2}):(\d{1,2}):(\d{1,2}))?')
+SLASH_DATE_PATTERN = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+
+# COPY BINARY: signature, flags and header extension length, then numpy dtypes per Postgres type
+BINARY_COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + bytes(8)
+BINARY_COPY_DTYPES = {
+    'smallint': '>i2',
+    'integer': '>i4',
+    'bigint': '>i8',
+    'real': '>f4',
+    'double precision': '>f8',
+    'date': '>i4'
+}
+PG_EPOCH = np.datetime64('2000-01-01', 'D')
+
+# Price history, corporate action and earnings CSVs are streamed in chunks of about
+# this size (bytes for pyarrow, rows for pandas), with their column types pinned
+CSV_CHUNK_BYTES = 8 << 20
+CSV_CHUNK_ROWS = 50_000
+PRICE_HISTORY_COLUMN_TYPES = {
+    'Date': 'string',
+    'Open': 'float64',
+    'High': 'float64',
+    'Low': 'float64',
+    'Close': 'float64',
+    'Adj Close': 'float64',
+    'Volume': 'float64',
+    'Dividends': 'float64',
+    'Stock Splits': 'float64'
+}
+CORPORATE_ACTION_COLUMN_TYPES = {
+    'Date': 'string',
+    'Dividends': 'float64',
+    'Stock Splits': 'float64'
+}
+EARNINGS_COLUMN_TYPES = {
+    'Earnings Date': 'string',
+    'EPS Estimate': 'float64',
+    'Reported EPS': 'float64',
+    'Surprise(%)': 'float64'
+}
+
+# Leading 'SYMBOL_NS_' / 'SYMBOL_BO_' of an exchange-listed CSV filename
+SYMBOL_PATTERN = re.compile(r'([^_]*)_(NS|BO)(?:_|$)')
+
+# Symbols loaded per transaction; each one still gets its own savepoint
+SYMBOLS_PER_COMMIT = 20
+
+class SymbolLoadAborted(Exception):
+    """A load step failed inside a symbol's savepoint, discarding the whole symbol"""
+
+# Filename key -> file type; the dict order is the priority for names that contain several keys
+CSV_FILE_CATEGORIES = {
+    'all_info': 'all_info',
+    'full_data': 'full_data',
+    'all_history': 'all_history',
+    'key_info': 'key_info',
+    'income_stmt_annual': 'income_annual',
+    'income_stmt_quarterly': 'income_quarterly',
+    'balance_sheet_annual': 'balance_annual',
+    'balance_sheet_quarterly': 'balance_quarterly',
+    'cashflow_annual': 'cashflow_annual',
+    'cashflow_quarterly': 'cashflow_quarterly',
+    'corporate_actions': 'corporate_actions',
+    'dividends': 'dividends',
+    'splits': 'splits',
+    'earnings_dates': 'earnings_dates'
+}
+
+# income_statements column -> financial statement row label
+INCOME_COLUMNS = {
+    'total_revenue': 'Total Revenue',
+    'cost_of_revenue': 'Cost Of Revenue',
+    'gross_profit': 'Gross Profit',
+    'research_development': 'Research Development',
+    'selling_general_administrative': 'Selling General Administrative',
+    'total_operating_expenses': 'Total Operating Expenses',
+    'operating_income': 'Operating Income',
+    'ebit': 'EBIT',
+    'ebitda': 'EBITDA',
+    'interest_income': 'Interest Income',
+    'interest_expense': 'Interest Expense',
+    'other_income_expense_net': 'Other Income Expense Net',
+    'income_before_tax': 'Income Before Tax',
+    'tax_provision': 'Tax Provision',
+    'net_income': 'Net Income',
+    'net_income_common_stockholders': 'Net Income Common Stockholders',
+    'diluted_eps': 'Diluted EPS',
+    'basic_eps': 'Basic EPS',
+    'diluted_average_shares': 'Diluted Average Shares',
+    'basic_average_shares': 'Basic Average Shares',
+    'operating_expense': 'Operating Expense',
+    'normalized_income': 'Normalized Income',
+    'total_expenses': 'Total Expenses'
+}
+
+# balance_sheets column -> financial statement row label
+BALANCE_SHEET_COLUMNS = {
+    'total_assets': 'Total Assets',
+    'current_assets': 'Current Assets',
+    'cash_and_cash_equivalents': 'Cash And Cash Equivalents',
+    'cash_cash_equivalents_and_short_term_investments': 'Cash Cash Equivalents And Short Term Investments',
+    'other_short_term_investments': 'Other Short Term Investments',
+    'accounts_receivable': 'Accounts Receivable',
+    'inventory': 'Inventory',
+    'prepaid_assets': 'Prepaid Assets',
+    'other_current_assets': 'Other Current Assets',
+    'non_current_assets': 'Non Current Assets',
+    'net_ppe': 'Net PPE',
+    'goodwill': 'Goodwill',
+    'other_intangible_assets': 'Other Intangible Assets',
+    'investments_and_advances': 'Investments And Advances',
+    'other_non_current_assets': 'Other Non Current Assets',
+    'total_liabilities': 'Total Liabilities Net Minority Interest',
+    'current_liabilities': 'Current Liabilities',
+    'accounts_payable': 'Accounts Payable',
+    'accrued_liabilities': 'Accrued Liabilities',
+    'short_term_debt': 'Short Term Debt',
+    'current_debt_and_capital_lease_obligation': 'Current Debt And Capital Lease Obligation',
+    'other_current_liabilities': 'Other Current Liabilities',
+    'non_current_liabilities': 'Non Current Liabilities',
+    'long_term_debt': 'Long Term Debt',
+    'long_term_debt_and_capital_lease_obligation': 'Long Term Debt And Capital Lease Obligation',
+    'other_non_current_liabilities': 'Other Non Current Liabilities',
+    'total_debt': 'Total Debt',
+    'stockholders_equity': 'Stockholders Equity',
+    'retained_earnings': 'Retained Earnings',
+    'common_stock': 'Common Stock',
+    'capital_stock': 'Capital Stock',
+    'additional_paid_in_capital': 'Additional Paid In Capital',
+    'treasury_shares_number': 'Treasury Shares Number',
+    'treasury_stock': 'Treasury Stock',
+    'accumulated_other_comprehensive_income': 'Accumulated Other Comprehensive Income',
+    'working_capital': 'Working Capital',
+    'total_equity_gross_minority_interest': 'Total Equity Gross Minority Interest',
+    'minority_interest': 'Minority Interest',
+    'total_capitalization': 'Total Capitalization',
+    'common_stock_equity': 'Common Stock Equity',
+    'net_tangible_assets': 'Net Tangible Assets'
+}
+
+# cash_flow_statements column -> financial statement row label
+CASH_FLOW_COLUMNS = {
+    'operating_cash_flow': 'Operating Cash Flow',
+    'investing_cash_flow': 'Investing Cash Flow',
+    'financing_cash_flow': 'Financing Cash Flow',
+    'free_cash_flow': 'Free Cash Flow',
+    'capital_expenditure': 'Capital Expenditure',
+    'net_income': 'Net Income',
+    'net_income_from_continuing_operations': 'Net Income From Continuing Operations',
+    'depreciation_depletion_and_amortization': 'Depreciation Depletion And Amortization',
+    'depreciation_and_amortization': 'Depreciation And Amortization',
+    'deferred_income_tax': 'Deferred Income Tax',
+    'stock_based_compensation': 'Stock Based Compensation',
+    'change_in_working_capital': 'Change In Working Capital',
+    'change_in_accounts_receivable': 'Change In Accounts Receivable',
+    'change_in_inventory': 'Change In Inventory',
+    'change_in_accounts_payable': 'Change In Accounts Payable',
+    'change_in_other_working_capital': 'Change In Other Working Capital',
+    'other_non_cash_items': 'Other Non Cash Items',
+    'investments_in_property_plant_and_equipment': 'Investments In Property Plant And Equipment',
+    'acquisitions_net': 'Acquisitions Net',
+    'purchases_of_investments': 'Purchases Of Investments',
+    'sales_maturities_of_investments': 'Sales Maturities Of Investments',
+    'other_investing_activities': 'Other Investing Activities',
+    'issuance_of_debt': 'Issuance Of Debt',
+    'repayment_of_debt': 'Repayment Of Debt',
+    'repurchase_of_capital_stock': 'Repurchase Of Capital Stock',
+    'cash_dividends_paid': 'Cash Dividends Paid',
+    'other_financing_activities': 'Other Financing Activities',
+    'effect_of_exchange_rate_changes': 'Effect Of Exchange Rate Changes',
+    'end_cash_position': 'End Cash Position',
+    'beginning_cash_position': 'Beginning Cash Position',
+    'changes_in_cash': 'Changes In Cash',
+    'financing_cash_flow_net': 'Financing Cash Flow'
+}
+
+# statement_type -> (table, column map)
+STATEMENT_TABLES = {
+    'income': ('income_statements', INCOME_COLUMNS),
+    'balance_sheet': ('balance_sheets', BALANCE_SHEET_COLUMNS),
+    'cash_flow': ('cash_flow_statements', CASH_FLOW_COLUMNS)
+}
+
+# Statement columns stored as decimals rather than whole numbers
+FLOAT_STATEMENT_COLUMNS = {'diluted_eps', 'basic_eps'}
+
 
 class CSVToDatabaseLoader:
+    # companies column, source CSV key and type, in INSERT order after symbol
+    COMPANY_FIELDS = (
+        ('short_name', 'shortName', 'text'),
+        ('long_name', 'longName', 'text'),
+        ('display_name', 'displayName', 'text'),
+        ('exchange', 'exchange', 'text'),
+        ('exchange_timezone_name', 'exchangeTimezoneName', 'text'),
+        ('exchange_timezone_short_name', 'exchangeTimezoneShortName', 'text'),
+        ('full_exchange_name', 'fullExchangeName', 'text'),
+        ('market', 'market', 'text'),
+        ('quote_type', 'quoteType', 'text'),
+        ('region', 'region', 'text'),
+        ('language', 'language', 'text'),
+        ('country', 'country', 'text'),
+        ('sector', 'sector', 'text'),
+        ('industry', 'industry', 'text'),
+        ('industry_key', 'industryKey', 'text'),
+        ('industry_disp', 'industryDisp', 'text'),
+        ('sector_key', 'sectorKey', 'text'),
+        ('sector_disp', 'sectorDisp', 'text'),
+        ('website', 'website', 'text'),
+        ('phone', 'phone', 'text'),
+        ('fax', 'fax', 'text'),
+        ('address1', 'address1', 'text'),
+        ('address2', 'address2', 'text'),
+        ('city', 'city', 'text'),
+        ('zip', 'zip', 'text'),
+        ('long_business_summary', 'longBusinessSummary', 'text'),
+        ('full_time_employees', 'fullTimeEmployees', 'int'),
+        ('audit_risk', 'auditRisk', 'int'),
+        ('board_risk', 'boardRisk', 'int'),
+        ('compensation_risk', 'compensationRisk', 'int'),
+        ('shareholder_rights_risk', 'shareHolderRightsRisk', 'int'),
+        ('overall_risk', 'overallRisk', 'int'),
+        ('governance_epoch_date', 'governanceEpochDate', 'int'),
+        ('compensation_as_of_epoch_date', 'compensationAsOfEpochDate', 'int'),
+        ('ir_website', 'irWebsite', 'text'),
+        ('max_age', 'maxAge', 'int')
+    )
+    
+    # company_metrics column, source CSV key and type, in INSERT order after company_id
+    METRIC_FIELDS = (
+        ('market_cap', 'marketCap', 'int'),
+        ('shares_outstanding', 'sharesOutstanding', 'int'),
+        ('float_shares', 'floatShares', 'int'),
+        ('implied_shares_outstanding', 'impliedSharesOutstanding', 'int'),
+        ('previous_close', 'previousClose', 'float'),
+        ('open_price', 'open', 'float'),
+        ('regular_market_open', 'regularMarketOpen', 'float'),
+        ('regular_market_price', 'regularMarketPrice', 'float'),
+        ('regular_market_high', 'regularMarketDayHigh', 'float'),
+        ('regular_market_low', 'regularMarketDayLow', 'float'),
+        ('regular_market_volume', 'regularMarketVolume', 'int'),
+        ('regular_market_previous_close', 'regularMarketPreviousClose', 'float'),
+        ('regular_market_day_high', 'regularMarketDayHigh', 'float'),
+        ('regular_market_day_low', 'regularMarketDayLow', 'float'),
+        ('fifty_two_week_low', 'fiftyTwoWeekLow', 'float'),
+        ('fifty_two_week_high', 'fiftyTwoWeekHigh', 'float'),
+        ('fifty_day_average', 'fiftyDayAverage', 'float'),
+        ('two_hundred_day_average', 'twoHundredDayAverage', 'float'),
+        ('trailing_pe', 'trailingPE', 'float'),
+        ('forward_pe', 'forwardPE', 'float'),
+        ('price_to_book', 'priceToBook', 'float'),
+        ('dividend_yield', 'dividendYield', 'float'),
+        ('dividend_rate', 'dividendRate', 'float'),
+        ('ex_dividend_date', 'exDividendDate', 'date'),
+        ('payout_ratio', 'payoutRatio', 'float'),
+        ('five_year_avg_dividend_yield', 'fiveYearAvgDividendYield', 'float'),
+        ('beta', 'beta', 'float'),
+        ('book_value', 'bookValue', 'float'),
+        ('eps_trailing_twelve_months', 'epsTrailingTwelveMonths', 'float'),
+        ('eps_forward', 'forwardEps', 'float'),
+        ('earnings_growth', 'earningsGrowth', 'float'),
+        ('revenue_growth', 'revenueGrowth', 'float'),
+        ('revenue_per_share', 'revenuePerShare', 'float'),
+        ('total_revenue', 'totalRevenue', 'int'),
+        ('gross_profits', 'grossProfits', 'int'),
+        ('ebitda', 'ebitda', 'int'),
+        ('operating_cashflow', 'operatingCashflow', 'int'),
+        ('free_cashflow', 'freeCashflow', 'int'),
+        ('total_cash', 'totalCash', 'int'),
+        ('total_cash_per_share', 'totalCashPerShare', 'float'),
+        ('total_debt', 'totalDebt', 'int'),
+        ('debt_to_equity', 'debtToEquity', 'float'),
+        ('return_on_assets', 'returnOnAssets', 'float'),
+        ('return_on_equity', 'returnOnEquity', 'float'),
+        ('profit_margins', 'profitMargins', 'float'),
+        ('operating_margins', 'operatingMargins', 'float'),
+        ('gross_margins', 'grossMargins', 'float'),
+        ('analyst_target_price', 'targetMeanPrice', 'float'),
+        ('recommendation_mean', 'recommendationMean', 'float'),
+        ('recommendation_key', 'recommendationKey', 'text'),
+        ('number_of_analyst_opinions', 'numberOfAnalystOpinions', 'int'),
+        ('enterprise_value', 'enterpriseValue', 'int'),
+        ('price_to_sales_trailing_12months', 'priceToSalesTrailing12Months', 'float'),
+        ('enterprise_to_revenue', 'enterpriseToRevenue', 'float'),
+        ('enterprise_to_ebitda', 'enterpriseToEbitda', 'float')
+    )
+    
+    # Tables whose secondary indexes a full reload can drop and rebuild once at the end
+    BULK_LOAD_TABLES = [
+        'price_history', 'income_statements', 'balance_sheets', 'cash_flow_statements',
+        'corporate_actions', 'earnings'
+    ]
+    # Definitions of the indexes dropped for a bulk load, until they are rebuilt
+    BULK_LOAD_INDEX_TABLE = 'bulk_load_dropped_indexes'
+    
     def __init__(self):
         """
         Initialize the CSV to database loader
         """
         self.db_config = get_database_config()
         self.conn = None
+        self.table_column_types = {}
+        # symbol -> id for companies known to be committed; IDs seen in the
+        # open transaction wait in transaction_company_ids until commit()
+        self.company_id_cache = None
+        self.transaction_company_ids = {}
+        # (name, symbols in transaction_company_ids when it was taken) for each
+        # open savepoint, innermost last (see savepoint())
+        self.savepoints = []
         self.setup_logging()
     
     def setup_logging(self):
@@ -27,30 +343,184 @@ class CSVToDatabaseLoader:
         self.logger = logging.getLogger(__name__)
     
     def connect_db(self):
-        """Establish database connection"""
+        """Check out a connection from the shared pool (DATABASE_URL or PG* config)"""
         try:
-            # Try to use DATABASE_URL first (for Replit)
-            database_url = os.getenv('DATABASE_URL')
-            if database_url:
-                self.conn = psycopg2.connect(database_url)
-            else:
-                self.conn = psycopg2.connect(**self.db_config)
-            
-            self.conn.autocommit = False
+            self.conn = get_connection_pool().getconn()
+            # Commits stop waiting for the WAL flush; a server crash can drop the last
+            # few committed symbols, which a rerun reloads. close_db resets it.
+            self.set_session("SET synchronous_commit = off")
             self.logger.info("Database connection established")
         except Exception as e:
             self.logger.error(f"Database connection failed: {e}")
+            if self.conn:
+                get_connection_pool().putconn(self.conn, close=True)
+                self.conn = None
+            raise
+    
+    def set_session(self, sql: str):
+        """Run a session-level SET outside any transaction, then return to manual commits"""
+        self.conn.autocommit = True
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql)
+        self.conn.autocommit = False
+    
+    def commit(self):
+        """
+        Commit the open transaction and keep the company IDs it used.
+        Inside a savepoint the enclosing symbol batch owns the transaction,
+        so the commit is left to it.
+        """
+        if self.savepoints:
+            return
+        self.conn.commit()
+        if self.company_id_cache is not None:
+            self.company_id_cache.update(self.transaction_company_ids)
+        self.transaction_company_ids.clear()
+    
+    def rollback(self):
+        """
+        Roll back the open transaction and forget company IDs it may have
+        created. Inside a savepoint only that savepoint is rolled back, which
+        also discards the steps that already ran under it, so this raises
+        SymbolLoadAborted rather than let the caller load a partial symbol.
+        """
+        if self.savepoints:
+            self.rollback_to_savepoint()
+            raise SymbolLoadAborted("a load step failed")
+        self.conn.rollback()
+        self.transaction_company_ids.clear()
+    
+    def rollback_to_savepoint(self):
+        """Roll back to the innermost savepoint and forget only the company IDs seen since it"""
+        name, known_symbols = self.savepoints[-1]
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {name}")
+        for symbol in self.transaction_company_ids.keys() - known_symbols:
+            del self.transaction_company_ids[symbol]
+    
+    @contextmanager
+    def savepoint(self, name: str):
+        """Run a block under a savepoint: released on success, rolled back to on error"""
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"SAVEPOINT {name}")
+        self.savepoints.append((name, set(self.transaction_company_ids)))
+        try:
+            yield
+        except SymbolLoadAborted:
+            raise  # rollback() already went back to this savepoint
+        except Exception:
+            self.rollback_to_savepoint()
             raise
+        finally:
+            self.savepoints.pop()
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"RELEASE SAVEPOINT {name}")
     
     def close_db(self):
-        """Close database connection"""
+        """Return the database connection to the pool"""
         if self.conn:
-            self.conn.close()
-            self.logger.info("Database connection closed")
+            reset = False
+            try:
+                if not self.conn.closed:
+                    self.conn.rollback()
+                    self.set_session("RESET synchronous_commit")
+                    reset = True
+            except Exception as e:
+                self.logger.warning(f"Discarding a connection that could not be reset: {e}")
+            finally:
+                # a connection still running with synchronous_commit off is not reused
+                get_connection_pool().putconn(self.conn, close=not reset)
+                self.conn = None
+                self.company_id_cache = None
+                self.transaction_company_ids.clear()
+            self.logger.info("Database connection returned to pool")
+    
+    def __enter__(self):
+        self.connect_db()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close_db()
+    
+    def drop_bulk_load_indexes(self) -> List[str]:
+        """
+        Drop the secondary indexes of BULK_LOAD_TABLES before a bulk load and
+        return their definitions. Unique and constraint indexes stay, since
+        the loads rely on them for ON CONFLICT. The definitions are saved to
+        BULK_LOAD_INDEX_TABLE in the same transaction as the drops, so a run
+        that dies before the rebuild leaves them for the next run to restore.
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {self.BULK_LOAD_INDEX_TABLE} (
+                        index_name TEXT PRIMARY KEY,
+                        definition TEXT NOT NULL,
+                        dropped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                cursor.execute("""
+                    SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+                    FROM pg_index i
+                    WHERE i.indrelid = ANY(%s::regclass[]) AND NOT i.indisunique AND NOT i.indisprimary
+                      AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = i.indexrelid)
+                """, (self.BULK_LOAD_TABLES,))
+                indexes = cursor.fetchall()
+                execute_values(
+                    cursor,
+                    f"""INSERT INTO {self.BULK_LOAD_INDEX_TABLE} (index_name, definition) VALUES %s
+                        ON CONFLICT (index_name) DO UPDATE SET definition = EXCLUDED.definition""",
+                    indexes
+                )
+                for name, _ in indexes:
+                    cursor.execute(f"DROP INDEX IF EXISTS {name}")
+            conn.commit()
+            self.logger.info(f"Dropped {len(indexes)} secondary indexes for bulk load")
+            return [definition for _, definition in indexes]
+        finally:
+            conn.close()
+    
+    def create_bulk_load_indexes(self) -> int:
+        """
+        Rebuild the indexes saved in BULK_LOAD_INDEX_TABLE, each in its own
+        transaction, and return how many are still missing. A failed rebuild
+        is logged with its DDL and kept for the next run instead of raising.
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT to_regclass(%s)", (self.BULK_LOAD_INDEX_TABLE,))
+                if cursor.fetchone()[0] is None:
+                    return 0
+                cursor.execute(f"SELECT index_name, definition FROM {self.BULK_LOAD_INDEX_TABLE} ORDER BY dropped_at, index_name")
+                saved = cursor.fetchall()
+            conn.commit()
+            
+            failed = []
+            for name, definition in saved:
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute("SET LOCAL maintenance_work_mem = '1GB'")
+                        cursor.execute(definition.replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ", 1))
+                        cursor.execute(f"DELETE FROM {self.BULK_LOAD_INDEX_TABLE} WHERE index_name = %s", (name,))
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    failed.append(name)
+                    self.logger.error(f"Could not rebuild index {name}: {str(e).strip()}; rerun its DDL by hand: {definition}")
+            if saved:
+                self.logger.info(f"Rebuilt {len(saved) - len(failed)} of {len(saved)} secondary indexes")
+            return len(failed)
+        finally:
+            conn.close()
     
     def safe_convert_to_float(self, value):
         """Safely convert value to float"""
-        if pd.isna(value) or value == '' or value == 'N/A':
+        # Identity and NaN != NaN checks are much cheaper than pd.isna per cell
+        if value is None or value is pd.NA or value != value:
+            return None
+        if isinstance(value, str) and value in NA_STRINGS:
             return None
         try:
             return float(value)
@@ -59,7 +529,10 @@ class CSVToDatabaseLoader:
     
     def safe_convert_to_int(self, value):
         """Safely convert value to int"""
-        if pd.isna(value) or value == '' or value == 'N/A':
+        # Identity and NaN != NaN checks are much cheaper than pd.isna per cell
+        if value is None or value is pd.NA or value != value:
+            return None
+        if isinstance(value, str) and value in NA_STRINGS:
             return None
         try:
             return int(float(value))
@@ -68,127 +541,346 @@ class CSVToDatabaseLoader:
     
     def safe_convert_to_date(self, value):
         """Safely convert value to date"""
-        if pd.isna(value) or value == '' or value == 'N/A':
+        # Identity and NaN != NaN checks are much cheaper than pd.isna per cell
+        if value is None or value is pd.NA or value != value:
+            return None
+        if isinstance(value, str) and value in NA_STRINGS:
             return None
         try:
             if isinstance(value, str):
-                # Try different date formats
-                for fmt in ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S']:
-                    try:
-                        return datetime.strptime(value, fmt).date()
-                    except ValueError:
-                        continue
+                # Classify with a regex instead of trying strptime formats in turn
+                match = ISO_DATE_PATTERN.fullmatch(value)
+                if match:
+                    # datetime() validates the optional time part like strptime did
+                    return datetime(*(int(part or 0) for part in match.groups())).date()
+                match = SLASH_DATE_PATTERN.fullmatch(value)
+                if match:
+                    first, second, year = (int(part) for part in match.groups())
+                    # %m/%d/%Y first; day-first only when the first part cannot be a month
+                    if first <= 12:
+                        return date(year, first, second)
+                    return date(year, second, first)
             elif isinstance(value, (datetime, date)):
                 return value if isinstance(value, date) else value.date()
             return None
         except Exception:
             return None
     
-    def get_or_create_company(self, symbol: str, company_data: Dict = None) -> int:
-        """Get existing company ID or create new company record"""
-        cursor = self.conn.cursor(cursor_factory=RealDictCursor)
-        
-        # Check if company exists
-        cursor.execute("SELECT id FROM companies WHERE symbol = %s", (symbol,))
-        result = cursor.fetchone()
+    def read_csv(self, file_path: str, text_columns=(), index_col=None, parse_dates=None) -> pd.DataFrame:
+        """
+        Read a CSV with the multithreaded pyarrow parser into nullable dtypes.
+        text_columns are kept as written (arrow would turn offset timestamps
+        into UTC); falls back to the pandas C engine without pyarrow.
+        """
+        try:
+            import pyarrow as pa
+            from pyarrow import csv as pa_csv
+        except ImportError:
+            return pd.read_csv(file_path, dtype={col: 'string' for col in text_columns},
+                               index_col=index_col, parse_dates=parse_dates)
         
-        if result:
-            company_id = result['id']
-            self.logger.info(f"Found existing company {symbol} with ID: {company_id}")
-        else:
-            # Create new company record
-            if company_data:
-                insert_sql = """
-                INSERT INTO companies (
-                    symbol, short_name, long_name, display_name, exchange, 
-                    exchange_timezone_name, exchange_timezone_short_name, full_exchange_name,
-                    market, quote_type, region, language, country, sector, industry,
-                    industry_key, industry_disp, sector_key, sector_disp, website,
-                    phone, fax, address1, address2, city, zip, long_business_summary,
-                    full_time_employees, audit_risk, board_risk, compensation_risk,
-                    shareholder_rights_risk, overall_risk, governance_epoch_date,
-                    compensation_as_of_epoch_date, ir_website, max_age, updated_at
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id;
-                """
-                
-                cursor.execute(insert_sql, (
-                    symbol,
-                    company_data.get('shortName'),
-                    company_data.get('longName'),
-                    company_data.get('displayName'),
-                    company_data.get('exchange'),
-                    company_data.get('exchangeTimezoneName'),
-                    company_data.get('exchangeTimezoneShortName'),
-                    company_data.get('fullExchangeName'),
-                    company_data.get('market'),
-                    company_data.get('quoteType'),
-                    company_data.get('region'),
-                    company_data.get('language'),
-                    company_data.get('country'),
-                    company_data.get('sector'),
-                    company_data.get('industry'),
-                    company_data.get('industryKey'),
-                    company_data.get('industryDisp'),
-                    company_data.get('sectorKey'),
-                    company_data.get('sectorDisp'),
-                    company_data.get('website'),
-                    company_data.get('phone'),
-                    company_data.get('fax'),
-                    company_data.get('address1'),
-                    company_data.get('address2'),
-                    company_data.get('city'),
-                    company_data.get('zip'),
-                    company_data.get('longBusinessSummary'),
-                    self.safe_convert_to_int(company_data.get('fullTimeEmployees')),
-                    self.safe_convert_to_int(company_data.get('auditRisk')),
-                    self.safe_convert_to_int(company_data.get('boardRisk')),
-                    self.safe_convert_to_int(company_data.get('compensationRisk')),
-                    self.safe_convert_to_int(company_data.get('shareHolderRightsRisk')),
-                    self.safe_convert_to_int(company_data.get('overallRisk')),
-                    self.safe_convert_to_int(company_data.get('governanceEpochDate')),
-                    self.safe_convert_to_int(company_data.get('compensationAsOfEpochDate')),
-                    company_data.get('irWebsite'),
-                    self.safe_convert_to_int(company_data.get('maxAge')),
-                    datetime.now()
+        try:
+            with pa.memory_map(file_path) as source:
+                table = pa_csv.read_csv(source, convert_options=pa_csv.ConvertOptions(
+                    column_types={col: pa.string() for col in text_columns}
                 ))
+        except pa.ArrowInvalid:
+            # Layouts the arrow reader rejects (e.g. a bare "" file) go through pandas
+            return pd.read_csv(file_path, dtype={col: 'string' for col in text_columns},
+                               index_col=index_col, parse_dates=parse_dates)
+        
+        df = self.arrow_to_pandas(table)
+        for col in parse_dates or []:
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+        if index_col is not None:
+            df = df.set_index(df.columns[index_col])
+        return df
+    
+    def arrow_to_pandas(self, table) -> pd.DataFrame:
+        """Convert an arrow Table/RecordBatch to pandas with nullable dtypes"""
+        import pyarrow as pa
+        return table.to_pandas(types_mapper={
+            pa.int64(): pd.Int64Dtype(),
+            pa.float64(): pd.Float64Dtype(),
+            pa.string(): pd.StringDtype(),
+            pa.bool_(): pd.BooleanDtype()
+        }.get)
+    
+    def read_csv_chunks(self, file_path: str, column_types: Dict[str, str]):
+        """
+        Yield a large CSV as a series of DataFrames instead of materializing it.
+        column_types pins column dtypes ('string'/'float64'), so every chunk
+        parses the same way whatever rows it happens to contain; columns not
+        listed there are skipped rather than parsed.
+        """
+        try:
+            import pyarrow as pa
+            from pyarrow import csv as pa_csv
+        except ImportError:
+            yield from pd.read_csv(file_path, usecols=lambda col: col in column_types,
+                                   dtype=column_types, chunksize=CSV_CHUNK_ROWS)
+            return
+        
+        # arrow needs the wanted columns by name, so read them off the header line
+        with open(file_path, newline='', encoding='utf-8-sig') as f:
+            header = next(csv.reader(f), [])
+        # Memory-mapped input: arrow parses straight from the page cache, no buffered copy
+        with pa.memory_map(file_path) as source:
+            reader = pa_csv.open_csv(
+                source,
+                read_options=pa_csv.ReadOptions(block_size=CSV_CHUNK_BYTES),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types={col: pa.type_for_alias(kind) for col, kind in column_types.items()},
+                    include_columns=[col for col in header if col in column_types]
+                )
+            )
+            for batch in reader:
+                yield self.arrow_to_pandas(batch)
+    
+    def to_float_column(self, values) -> pd.Series:
+        """Vectorized safe_convert_to_float: unparseable values become NaN"""
+        numbers = pd.to_numeric(pd.Series(values), errors='coerce')
+        return numbers.where(np.isfinite(numbers))
+    
+    def to_int_column(self, values) -> pd.Series:
+        """Vectorized safe_convert_to_int: truncates like int(float(value)), NULL-able Int64"""
+        return np.trunc(self.to_float_column(values)).astype('Int64')
+    
+    def to_date_column(self, values) -> pd.Series:
+        """Vectorized safe_convert_to_date: accepts the same formats as the scalar helper"""
+        values = pd.Series(values)
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values.dt.date
+        text = values.astype('string').str.strip()
+        # ISO dates, with or without a time/offset suffix, take the written calendar date
+        dates = pd.to_datetime(text.str[:10], format='%Y-%m-%d', errors='coerce')
+        for fmt in ('%m/%d/%Y', '%d/%m/%Y'):
+            dates = dates.fillna(pd.to_datetime(text, format=fmt, errors='coerce'))
+        return dates.dt.date
+    
+    def column_types(self, cursor, table_name: str) -> Dict[str, str]:
+        """Postgres type of every column of table_name, cached per loader"""
+        if table_name not in self.table_column_types:
+            cursor.execute(
+                "SELECT attname, format_type(atttypid, NULL) FROM pg_attribute "
+                "WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped",
+                (table_name,)
+            )
+            self.table_column_types[table_name] = dict(cursor.fetchall())
+        return self.table_column_types[table_name]
+    
+    def binary_copy_buffer(self, df: pd.DataFrame, pg_types: List[str]) -> Optional[io.BytesIO]:
+        """
+        Encode df in COPY BINARY format, one numpy pass per column.
+        Returns None when a column's type has no vectorized encoding
+        (numeric in particular), so the caller can fall back to CSV.
+        """
+        rows = len(df)
+        fields = [(np.full((rows, 1), len(df.columns), dtype='>i2').view(np.uint8), np.ones((rows, 2), dtype=bool))]
+        for column, pg_type in zip(df.columns, pg_types):
+            values = df[column]
+            nulls = values.isna().to_numpy()
+            if pg_type in BINARY_COPY_DTYPES:
+                dtype = np.dtype(BINARY_COPY_DTYPES[pg_type])
+                if pg_type == 'date':
+                    dates = pd.to_datetime(values, errors='coerce')
+                    if dates.isna().sum() != nulls.sum():
+                        return None
+                    days = dates.to_numpy().astype('datetime64[D]') - PG_EPOCH
+                    data = np.where(nulls, 0, days.astype('int64'))
+                elif dtype.kind == 'i':
+                    if not pd.api.types.is_integer_dtype(values):
+                        return None
+                    data = values.fillna(0).to_numpy(dtype='int64')
+                    limits = np.iinfo(dtype)
+                    if data.min(initial=0) < limits.min or data.max(initial=0) > limits.max:
+                        return None
+                else:
+                    if not pd.api.types.is_numeric_dtype(values):
+                        return None
+                    data = values.astype('Float64').fillna(0).to_numpy(dtype='float64')
+                payload = data.astype(dtype).reshape(rows, 1).view(np.uint8)
+                lengths = np.where(nulls, -1, dtype.itemsize)
+            elif pg_type in ('text', 'character varying'):
+                # Encode each distinct value once (period_type has two) and gather by code;
+                # NULLs get code -1, i.e. the trailing empty entry
+                codes, uniques = pd.factorize(values.astype('string'))
+                encoded = [str(value).encode() for value in uniques] + [b'']
+                sizes = np.array([len(value) for value in encoded])
+                payload = np.array(encoded, dtype=f'S{max(sizes.max(), 1)}')[codes].reshape(rows, 1).view(np.uint8)
+                lengths = np.where(nulls, -1, sizes[codes])
             else:
-                # Create minimal company record
-                cursor.execute("""
-                    INSERT INTO companies (symbol, updated_at) 
-                    VALUES (%s, %s) RETURNING id;
-                """, (symbol, datetime.now()))
-            
-            company_id = cursor.fetchone()['id']
-            self.logger.info(f"Created new company {symbol} with ID: {company_id}")
+                return None
+            prefix = lengths.astype('>i4').reshape(rows, 1).view(np.uint8)
+            keep = np.arange(payload.shape[1]) < lengths.reshape(rows, 1)
+            fields += [(prefix, np.ones(prefix.shape, dtype=bool)), (payload, keep)]
+        
+        # Row-major selection drops NULL/padding bytes and leaves the rows back to back
+        data = np.hstack([field for field, _ in fields])[np.hstack([keep for _, keep in fields])]
+        return io.BytesIO(BINARY_COPY_HEADER + data.tobytes() + b'\xff\xff')
+    
+    def copy_dataframe(self, cursor, table_name: str, df: pd.DataFrame):
+        """
+        Stream a DataFrame into table_name with COPY; column names must match the table.
+        Uses binary COPY when every column type has a fixed binary encoding, CSV otherwise.
+        """
+        columns = ', '.join(df.columns)
+        types = self.column_types(cursor, table_name)
+        buffer = self.binary_copy_buffer(df, [types[col] for col in df.columns]) if len(df) else None
+        if buffer is not None:
+            cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT BINARY)", buffer)
+            return
+        
+        buffer = io.StringIO()
+        df.to_csv(buffer, header=False, index=False, na_rep='\\N')
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')",
+            buffer
+        )
+    
+    def dataframe_rows(self, df: pd.DataFrame) -> List[tuple]:
+        """Rows of df as tuples of native Python values, with NULLs as None"""
+        columns = [df[col].astype(object).where(df[col].notna(), None).tolist() for col in df.columns]
+        return list(zip(*columns))
+    
+    def company_rows(self, df: pd.DataFrame, now: Optional[datetime] = None) -> List[tuple]:
+        """companies INSERT tuples for every row of df, converted column-wise, stamped with now"""
+        columns = {'symbol': df['symbol']}
+        for column, key, kind in self.COMPANY_FIELDS:
+            values = df[key] if key in df.columns else pd.Series(None, index=df.index, dtype=object)
+            columns[column] = self.to_int_column(values) if kind == 'int' else values
+        columns['updated_at'] = now or datetime.now()
+        return self.dataframe_rows(pd.DataFrame(columns, index=df.index))
+    
+    def create_stage(self, cursor, table_name: str, columns: List[str]) -> str:
+        """Empty temp staging table with table_name's types for columns; dropped at commit"""
+        stage = f"_stage_{table_name}"
+        # Both statements travel in one round trip
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {stage} ON COMMIT DROP AS "
+            f"SELECT {', '.join(columns)} FROM {table_name} WITH NO DATA; "
+            f"TRUNCATE {stage}"
+        )
+        return stage
+    
+    def merge_stage(self, cursor, table_name: str, stage: str, columns: List[str], on_conflict: str,
+                    distinct_on: Optional[List[str]] = None) -> int:
+        """
+        Merge the staged rows into table_name with one INSERT ... SELECT.
+        distinct_on keeps only the last staged row for each key, so the
+        merge cannot hit the same target row twice. Returns rows written.
+        """
+        columns = ', '.join(columns)
+        source = f"SELECT {columns} FROM {stage}"
+        if distinct_on:
+            keys = ', '.join(distinct_on)
+            source = f"SELECT DISTINCT ON ({keys}) {columns} FROM {stage} ORDER BY {keys}, ctid DESC"
+        cursor.execute(f"INSERT INTO {table_name} ({columns}) {source} ON CONFLICT {on_conflict}")
+        return cursor.rowcount
+    
+    def copy_merge(self, cursor, table_name: str, df: pd.DataFrame, on_conflict: str,
+                   distinct_on: Optional[List[str]] = None) -> int:
+        """COPY df into a temp staging table, then merge it into table_name with one INSERT ... SELECT"""
+        stage = self.create_stage(cursor, table_name, list(df.columns))
+        self.copy_dataframe(cursor, stage, df)
+        return self.merge_stage(cursor, table_name, stage, list(df.columns), on_conflict, distinct_on)
+    
+    def sql_array_type(self, values: pd.Series) -> str:
+        """Postgres array element type to send a column as in an UNNEST batch"""
+        if pd.api.types.is_integer_dtype(values):
+            return 'bigint'
+        if pd.api.types.is_float_dtype(values):
+            return 'float8'
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return 'timestamp'
+        return 'text'
+    
+    def unnest_upsert(self, cursor, table_name: str, df: pd.DataFrame, key_columns: List[str]):
+        """
+        Upsert every row of df in one statement: each column travels as one
+        typed array and UNNEST turns them back into rows server-side
+        """
+        columns = ', '.join(df.columns)
+        arrays = ', '.join(f"%s::{self.sql_array_type(df[col])}[]" for col in df.columns)
+        updates = ', '.join(f"{col} = EXCLUDED.{col}" for col in df.columns if col not in key_columns)
+        cursor.execute(
+            f"INSERT INTO {table_name} ({columns}) SELECT * FROM UNNEST({arrays}) "
+            f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates}",
+            [list(values) for values in zip(*self.dataframe_rows(df))]
+        )
+    
+    def get_or_create_companies(self, df: pd.DataFrame, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Get existing company IDs or create company records for every symbol in df"""
+        symbols = df['symbol'].astype('string').str.strip()
+        df = df.assign(symbol=symbols)[symbols.notna() & (symbols != '')]
+        if df.empty:
+            return {}
+        
+        cursor = self.conn.cursor()
+        
+        # Seed the cache with every company once per connection
+        if self.company_id_cache is None:
+            cursor.execute("SELECT id, symbol FROM companies")
+            self.company_id_cache = {symbol: company_id for company_id, symbol in cursor.fetchall()}
+        
+        symbols = df['symbol'].unique().tolist()
+        known = {**self.company_id_cache, **self.transaction_company_ids}
+        company_ids = {symbol: known[symbol] for symbol in symbols if symbol in known}
+        
+        # Look up cache misses in one query; another process may have created them
+        unknown = [symbol for symbol in symbols if symbol not in company_ids]
+        if unknown:
+            cursor.execute("SELECT id, symbol FROM companies WHERE symbol = ANY(%s)", (unknown,))
+            company_ids.update({symbol: company_id for company_id, symbol in cursor.fetchall()})
+        
+        # Create the missing ones in one multi-row INSERT
+        missing = df[~df['symbol'].isin(company_ids)].drop_duplicates('symbol')
+        if not missing.empty:
+            columns = ['symbol'] + [column for column, _, _ in self.COMPANY_FIELDS] + ['updated_at']
+            created = execute_values(
+                cursor,
+                f"""INSERT INTO companies ({', '.join(columns)}) VALUES %s
+                    ON CONFLICT (symbol) DO UPDATE SET symbol = EXCLUDED.symbol
+                    RETURNING id, symbol""",
+                self.company_rows(missing, now),
+                page_size=500,
+                fetch=True
+            )
+            company_ids.update({symbol: company_id for company_id, symbol in created})
+        self.transaction_company_ids.update(company_ids)
+        
+        self.logger.info(
+            f"Found {len(company_ids) - len(missing)} existing companies, created {len(missing)}"
+        )
         
         cursor.close()
-        return company_id
+        return company_ids
+    
+    def get_or_create_company(self, symbol: str, company_data: Dict = None, now: Optional[datetime] = None) -> int:
+        """Get existing company ID or create new company record"""
+        row = dict(company_data or {}, symbol=symbol)
+        return self.get_or_create_companies(pd.DataFrame([row]), now)[symbol]
     
     def load_company_info_from_csv(self, file_path: str) -> Dict[str, int]:
         """Load company information from all_info CSV"""
         self.logger.info(f"Loading company info from {file_path}")
         
         try:
-            df = pd.read_csv(file_path)
+            df = self.read_csv(file_path)
             if df.empty:
                 self.logger.warning(f"Empty CSV file: {file_path}")
                 return {}
             
-            company_ids = {}
-            for _, row in df.iterrows():
-                symbol = row.get('symbol', '').strip()
-                if symbol:
-                    company_data = row.to_dict()
-                    company_id = self.get_or_create_company(symbol, company_data)
-                    company_ids[symbol] = company_id
+            company_ids = self.get_or_create_companies(df)
             
-            self.conn.commit()
+            self.commit()
             return company_ids
             
         except Exception as e:
             self.logger.error(f"Error loading company info from {file_path}: {e}")
-            self.conn.rollback()
+            self.rollback()
             return {}
     
     def load_full_data_from_csv(self, file_path: str) -> Dict[str, int]:
@@ -196,640 +888,510 @@ class CSVToDatabaseLoader:
         self.logger.info(f"Loading full data from {file_path}")
         
         try:
-            df = pd.read_csv(file_path)
+            df = self.read_csv(file_path)
             if df.empty:
                 self.logger.warning(f"Empty CSV file: {file_path}")
                 return {}
             
-            company_ids = {}
-            for _, row in df.iterrows():
-                symbol = row.get('symbol', '').strip()
-                if symbol:
-                    company_data = row.to_dict()
-                    company_id = self.get_or_create_company(symbol, company_data)
-                    company_ids[symbol] = company_id
-                    
-                    # Also load company metrics if available
-                    self.load_company_metrics_from_row(company_id, row)
-            
-            self.conn.commit()
+            # One timestamp for the companies and metrics written from this file
+            now = datetime.now()
+            company_ids = self.get_or_create_companies(df, now)
+            
+            # Also load company metrics if available
+            self.load_company_metrics(df, company_ids, now)
+            
+            self.commit()
             return company_ids
             
         except Exception as e:
             self.logger.error(f"Error loading full data from {file_path}: {e}")
-            self.conn.rollback()
+            self.rollback()
             return {}
     
-    def load_company_metrics_from_row(self, company_id: int, row: pd.Series):
-        """Load company metrics from a data row"""
-        cursor = self.conn.cursor()
-        
-        metrics_sql = """
-        INSERT INTO company_metrics (
-            company_id, market_cap, shares_outstanding, float_shares, implied_shares_outstanding,
-            previous_close, open_price, regular_market_open, regular_market_price,
-            regular_market_high, regular_market_low, regular_market_volume,
-            regular_market_previous_close, regular_market_day_high, regular_market_day_low,
-            fifty_two_week_low, fifty_two_week_high, fifty_day_average, two_hundred_day_average,
-            trailing_pe, forward_pe, price_to_book, dividend_yield, dividend_rate,
-            ex_dividend_date, payout_ratio, five_year_avg_dividend_yield, beta, book_value,
-            eps_trailing_twelve_months, eps_forward, earnings_growth, revenue_growth,
-            revenue_per_share, total_revenue, gross_profits, ebitda, operating_cashflow,
-            free_cashflow, total_cash, total_cash_per_share, total_debt, debt_to_equity,
-            return_on_assets, return_on_equity, profit_margins, operating_margins,
-            gross_margins, analyst_target_price, recommendation_mean, recommendation_key,
-            number_of_analyst_opinions, enterprise_value, price_to_sales_trailing_12months,
-            enterprise_to_revenue, enterprise_to_ebitda, updated_at
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (company_id) DO UPDATE SET
-            market_cap = EXCLUDED.market_cap,
-            shares_outstanding = EXCLUDED.shares_outstanding,
-            float_shares = EXCLUDED.float_shares,
-            implied_shares_outstanding = EXCLUDED.implied_shares_outstanding,
-            previous_close = EXCLUDED.previous_close,
-            open_price = EXCLUDED.open_price,
-            regular_market_open = EXCLUDED.regular_market_open,
-            regular_market_price = EXCLUDED.regular_market_price,
-            regular_market_high = EXCLUDED.regular_market_high,
-            regular_market_low = EXCLUDED.regular_market_low,
-            regular_market_volume = EXCLUDED.regular_market_volume,
-            regular_market_previous_close = EXCLUDED.regular_market_previous_close,
-            regular_market_day_high = EXCLUDED.regular_market_day_high,
-            regular_market_day_low = EXCLUDED.regular_market_day_low,
-            fifty_two_week_low = EXCLUDED.fifty_two_week_low,
-            fifty_two_week_high = EXCLUDED.fifty_two_week_high,
-            fifty_day_average = EXCLUDED.fifty_day_average,
-            two_hundred_day_average = EXCLUDED.two_hundred_day_average,
-            trailing_pe = EXCLUDED.trailing_pe,
-            forward_pe = EXCLUDED.forward_pe,
-            price_to_book = EXCLUDED.price_to_book,
-            dividend_yield = EXCLUDED.dividend_yield,
-            dividend_rate = EXCLUDED.dividend_rate,
-            ex_dividend_date = EXCLUDED.ex_dividend_date,
-            payout_ratio = EXCLUDED.payout_ratio,
-            five_year_avg_dividend_yield = EXCLUDED.five_year_avg_dividend_yield,
-            beta = EXCLUDED.beta,
-            book_value = EXCLUDED.book_value,
-            eps_trailing_twelve_months = EXCLUDED.eps_trailing_twelve_months,
-            eps_forward = EXCLUDED.eps_forward,
-            earnings_growth = EXCLUDED.earnings_growth,
-            revenue_growth = EXCLUDED.revenue_growth,
-            revenue_per_share = EXCLUDED.revenue_per_share,
-            total_revenue = EXCLUDED.total_revenue,
-            gross_profits = EXCLUDED.gross_profits,
-            ebitda = EXCLUDED.ebitda,
-            operating_cashflow = EXCLUDED.operating_cashflow,
-            free_cashflow = EXCLUDED.free_cashflow,
-            total_cash = EXCLUDED.total_cash,
-            total_cash_per_share = EXCLUDED.total_cash_per_share,
-            total_debt = EXCLUDED.total_debt,
-            debt_to_equity = EXCLUDED.debt_to_equity,
-            return_on_assets = EXCLUDED.return_on_assets,
-            return_on_equity = EXCLUDED.return_on_equity,
-            profit_margins = EXCLUDED.profit_margins,
-            operating_margins = EXCLUDED.operating_margins,
-            gross_margins = EXCLUDED.gross_margins,
-            analyst_target_price = EXCLUDED.analyst_target_price,
-            recommendation_mean = EXCLUDED.recommendation_mean,
-            recommendation_key = EXCLUDED.recommendation_key,
-            number_of_analyst_opinions = EXCLUDED.number_of_analyst_opinions,
-            enterprise_value = EXCLUDED.enterprise_value,
-            price_to_sales_trailing_12months = EXCLUDED.price_to_sales_trailing_12months,
-            enterprise_to_revenue = EXCLUDED.enterprise_to_revenue,
-            enterprise_to_ebitda = EXCLUDED.enterprise_to_ebitda,
-            updated_at = EXCLUDED.updated_at;
-        """
+    def load_company_metrics(self, df: pd.DataFrame, company_ids: Dict[str, int], now: Optional[datetime] = None):
+        """Upsert company metrics for every row of df whose symbol has a company ID"""
+        df = df[df['symbol'].astype('string').str.strip().isin(company_ids)]
+        if df.empty:
+            return
         
-        cursor.execute(metrics_sql, (
-            company_id,
-            self.safe_convert_to_int(row.get('marketCap')),
-            self.safe_convert_to_int(row.get('sharesOutstanding')),
-            self.safe_convert_to_int(row.get('floatShares')),
-            self.safe_convert_to_int(row.get('impliedSharesOutstanding')),
-            self.safe_convert_to_float(row.get('previousClose')),
-            self.safe_convert_to_float(row.get('open')),
-            self.safe_convert_to_float(row.get('regularMarketOpen')),
-            self.safe_convert_to_float(row.get('regularMarketPrice')),
-            self.safe_convert_to_float(row.get('regularMarketDayHigh')),
-            self.safe_convert_to_float(row.get('regularMarketDayLow')),
-            self.safe_convert_to_int(row.get('regularMarketVolume')),
-            self.safe_convert_to_float(row.get('regularMarketPreviousClose')),
-            self.safe_convert_to_float(row.get('regularMarketDayHigh')),
-            self.safe_convert_to_float(row.get('regularMarketDayLow')),
-            self.safe_convert_to_float(row.get('fiftyTwoWeekLow')),
-            self.safe_convert_to_float(row.get('fiftyTwoWeekHigh')),
-            self.safe_convert_to_float(row.get('fiftyDayAverage')),
-            self.safe_convert_to_float(row.get('twoHundredDayAverage')),
-            self.safe_convert_to_float(row.get('trailingPE')),
-            self.safe_convert_to_float(row.get('forwardPE')),
-            self.safe_convert_to_float(row.get('priceToBook')),
-            self.safe_convert_to_float(row.get('dividendYield')),
-            self.safe_convert_to_float(row.get('dividendRate')),
-            self.safe_convert_to_date(row.get('exDividendDate')),
-            self.safe_convert_to_float(row.get('payoutRatio')),
-            self.safe_convert_to_float(row.get('fiveYearAvgDividendYield')),
-            self.safe_convert_to_float(row.get('beta')),
-            self.safe_convert_to_float(row.get('bookValue')),
-            self.safe_convert_to_float(row.get('epsTrailingTwelveMonths')),
-            self.safe_convert_to_float(row.get('forwardEps')),
-            self.safe_convert_to_float(row.get('earningsGrowth')),
-            self.safe_convert_to_float(row.get('revenueGrowth')),
-            self.safe_convert_to_float(row.get('revenuePerShare')),
-            self.safe_convert_to_int(row.get('totalRevenue')),
-            self.safe_convert_to_int(row.get('grossProfits')),
-            self.safe_convert_to_int(row.get('ebitda')),
-            self.safe_convert_to_int(row.get('operatingCashflow')),
-            self.safe_convert_to_int(row.get('freeCashflow')),
-            self.safe_convert_to_int(row.get('totalCash')),
-            self.safe_convert_to_float(row.get('totalCashPerShare')),
-            self.safe_convert_to_int(row.get('totalDebt')),
-            self.safe_convert_to_float(row.get('debtToEquity')),
-            self.safe_convert_to_float(row.get('returnOnAssets')),
-            self.safe_convert_to_float(row.get('returnOnEquity')),
-            self.safe_convert_to_float(row.get('profitMargins')),
-            self.safe_convert_to_float(row.get('operatingMargins')),
-            self.safe_convert_to_float(row.get('grossMargins')),
-            self.safe_convert_to_float(row.get('targetMeanPrice')),
-            self.safe_convert_to_float(row.get('recommendationMean')),
-            row.get('recommendationKey'),
-            self.safe_convert_to_int(row.get('numberOfAnalystOpinions')),
-            self.safe_convert_to_int(row.get('enterpriseValue')),
-            self.safe_convert_to_float(row.get('priceToSalesTrailing12Months')),
-            self.safe_convert_to_float(row.get('enterpriseToRevenue')),
-            self.safe_convert_to_float(row.get('enterpriseToEbitda')),
-            datetime.now()
-        ))
+        converters = {
+            'int': self.to_int_column,
+            'float': self.to_float_column,
+            'date': lambda values: pd.to_datetime(self.to_date_column(values)),
+            'text': lambda values: values
+        }
+        metrics = {'company_id': df['symbol'].astype('string').str.strip().map(company_ids).astype('Int64')}
+        converted = {}
+        for column, key, kind in self.METRIC_FIELDS:
+            # Day high/low feed two columns each; convert every source column once
+            if (key, kind) not in converted:
+                values = df[key] if key in df.columns else pd.Series(None, index=df.index, dtype=object)
+                converted[(key, kind)] = converters[kind](values)
+            metrics[column] = converted[(key, kind)]
+        metrics['updated_at'] = pd.Timestamp(now or datetime.now())
+        metrics = pd.DataFrame(metrics, index=df.index)
+        # Last row wins, as with the old row-by-row upsert
+        metrics = metrics.drop_duplicates('company_id', keep='last')
         
+        cursor = self.conn.cursor()
+        self.unnest_upsert(cursor, 'company_metrics', metrics, ['company_id'])
         cursor.close()
     
+    def price_history_frame(self, df: pd.DataFrame, company_id: int) -> pd.DataFrame:
+        """Convert a chunk of a price history CSV to price_history rows, in COPY column order"""
+        price_df = pd.DataFrame({
+            'company_id': company_id,
+            'date': self.to_date_column(df['Date']),
+            'open_price': self.to_float_column(df['Open']),
+            'high_price': self.to_float_column(df['High']),
+            'low_price': self.to_float_column(df['Low']),
+            'close_price': self.to_float_column(df['Close']),
+            'adj_close_price': self.to_float_column(df['Adj Close'] if 'Adj Close' in df.columns else df['Close']),
+            'volume': self.to_int_column(df['Volume']),
+            'dividends': self.to_float_column(df['Dividends']) if 'Dividends' in df.columns else 0.0,
+            'stock_splits': self.to_float_column(df['Stock Splits']) if 'Stock Splits' in df.columns else 0.0
+        })
+        return price_df[price_df['date'].notna()]
+    
+    def prefetched(self, iterator):
+        """Yield from iterator while a helper thread already produces the next item"""
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(next, iterator, None)
+            while True:
+                item = pending.result()
+                if item is None:
+                    return
+                pending = executor.submit(next, iterator, None)
+                yield item
+    
     def load_price_history_from_csv(self, file_path: str, company_id: int, symbol: str):
-        """Load price history from CSV"""
+        """
+        Load price history from CSV. The file is streamed in chunks; the next
+        chunk is parsed and converted on a helper thread while the current
+        one is sent with COPY.
+        """
         self.logger.info(f"Loading price history from {file_path} for {symbol}")
         
+        def price_chunks():
+            return self.prefetched(
+                self.price_history_frame(chunk, company_id)
+                for chunk in self.read_csv_chunks(file_path, PRICE_HISTORY_COLUMN_TYPES)
+            )
+        
         try:
-            df = pd.read_csv(file_path, index_col='Date', parse_dates=True)
-            if df.empty:
+            chunks = price_chunks()
+            price_df = next(chunks, None)
+            if price_df is None:
                 self.logger.warning(f"Empty price history file: {file_path}")
                 return
             
             cursor = self.conn.cursor()
             
-            # Clear existing price history for this company
-            cursor.execute("DELETE FROM price_history WHERE company_id = %s", (company_id,))
-            
-            # Prepare data for bulk insert
-            price_data = []
-            for date_idx, row in df.iterrows():
-                price_data.append((
-                    company_id,
-                    date_idx.date(),
-                    self.safe_convert_to_float(row.get('Open')),
-                    self.safe_convert_to_float(row.get('High')),
-                    self.safe_convert_to_float(row.get('Low')),
-                    self.safe_convert_to_float(row.get('Close')),
-                    self.safe_convert_to_float(row.get('Adj Close', row.get('Close'))),
-                    self.safe_convert_to_int(row.get('Volume')),
-                    self.safe_convert_to_float(row.get('Dividends', 0)),
-                    self.safe_convert_to_float(row.get('Stock Splits', 0))
-                ))
-            
-            # Bulk insert
-            if price_data:
-                execute_values(
-                    cursor,
-                    """INSERT INTO price_history 
-                       (company_id, date, open_price, high_price, low_price, close_price, 
-                        adj_close_price, volume, dividends, stock_splits) VALUES %s""",
-                    price_data,
-                    page_size=1000
+            # Clear existing price history for this company and set the savepoint in one round trip
+            cursor.execute(
+                "DELETE FROM price_history WHERE company_id = %s; SAVEPOINT price_history_copy",
+                (company_id,)
+            )
+            try:
+                loaded = 0
+                for price_df in itertools.chain([price_df], chunks):
+                    self.copy_dataframe(cursor, 'price_history', price_df)
+                    loaded += len(price_df)
+            except psycopg2.errors.UniqueViolation:
+                # The file repeats some dates: stage it all, keep the last row per date
+                chunks.close()
+                cursor.execute("ROLLBACK TO SAVEPOINT price_history_copy")
+                stage = self.create_stage(cursor, 'price_history', list(price_df.columns))
+                for price_df in price_chunks():
+                    self.copy_dataframe(cursor, stage, price_df)
+                loaded = self.merge_stage(
+                    cursor, 'price_history', stage, list(price_df.columns),
+                    "(company_id, date) DO NOTHING", distinct_on=['company_id', 'date']
                 )
-                
-                self.logger.info(f"Loaded {len(price_data)} price history records for {symbol}")
+                self.logger.warning(f"Duplicate dates in {file_path}; kept the last row for each")
+            
+            self.logger.info(f"Loaded {loaded} price history records for {symbol}")
             
             cursor.close()
             
         except Exception as e:
             self.logger.error(f"Error loading price history from {file_path}: {e}")
-            self.conn.rollback()
+            self.rollback()
     
-    def load_financial_statements_from_csv(self, file_path: str, company_id: int, symbol: str, statement_type: str, period_type: str):
-        """Load financial statements from CSV"""
-        self.logger.info(f"Loading {statement_type} {period_type} from {file_path} for {symbol}")
+    def statement_rows(self, file_path: str, company_id: int, statement_type: str, period_type: str) -> Optional[pd.DataFrame]:
+        """Pivot a financial statement CSV into table rows, one per period (CSV column); None if empty"""
+        df = self.read_csv(file_path, index_col=0)
+        if df.empty:
+            self.logger.warning(f"Empty financial statement file: {file_path}")
+            return None
         
+        # Pivot once so each period (CSV column) becomes a row
+        _, field_map = STATEMENT_TABLES[statement_type]
+        statements = df[~df.index.duplicated()].T
+        rows = pd.DataFrame({
+            'company_id': company_id,
+            'period_ending': self.to_date_column(statements.index).values,
+            'period_type': period_type
+        }, index=statements.index)
+        for column, label in field_map.items():
+            values = statements[label] if label in statements.columns else pd.Series(None, index=statements.index, dtype=object)
+            if column in FLOAT_STATEMENT_COLUMNS:
+                rows[column] = self.to_float_column(values)
+            else:
+                rows[column] = self.to_int_column(values)
+        return rows[rows['period_ending'].notna()]
+    
+    def load_financial_statements(self, statement_files: Dict[str, str], company_id: int, symbol: str, statement_type: str):
+        """
+        Load one statement type from its CSV per period type ({'annual': path, ...})
+        with a single DELETE and a single staged COPY merge
+        """
         try:
-            df = pd.read_csv(file_path, index_col=0)
-            if df.empty:
-                self.logger.warning(f"Empty financial statement file: {file_path}")
+            frames = {}
+            for period_type, file_path in statement_files.items():
+                self.logger.info(f"Loading {statement_type} {period_type} from {file_path} for {symbol}")
+                rows = self.statement_rows(file_path, company_id, statement_type, period_type)
+                if rows is not None:
+                    frames[period_type] = rows
+            if not frames:
                 return
             
             cursor = self.conn.cursor()
             
-            # Clear existing data
-            if statement_type == 'balance_sheet':
-                table_name = "balance_sheets"
-            else:
-                table_name = f"{statement_type}_statements"
+            # Clear existing data for the period types being reloaded
+            table_name, _ = STATEMENT_TABLES[statement_type]
             cursor.execute(
-                f"DELETE FROM {table_name} WHERE company_id = %s AND period_type = %s",
-                (company_id, period_type)
+                f"DELETE FROM {table_name} WHERE company_id = %s AND period_type = ANY(%s)",
+                (company_id, list(frames))
             )
             
-            # Process each column (date) in the DataFrame
-            for col in df.columns:
-                period_ending = self.safe_convert_to_date(col)
-                if not period_ending:
-                    continue
-                
-                if statement_type == 'income':
-                    self._insert_income_statement(cursor, company_id, period_ending, period_type, df[col])
-                elif statement_type == 'balance_sheet':
-                    self._insert_balance_sheet(cursor, company_id, period_ending, period_type, df[col])
-                elif statement_type == 'cash_flow':
-                    self._insert_cash_flow_statement(cursor, company_id, period_ending, period_type, df[col])
+            self.copy_merge(
+                cursor, table_name, pd.concat(frames.values()),
+                "(company_id, period_ending, period_type) DO NOTHING"
+            )
             
             cursor.close()
-            self.logger.info(f"Loaded {statement_type} {period_type} for {symbol}")
+            self.logger.info(f"Loaded {statement_type} {'/'.join(frames)} for {symbol}")
             
         except Exception as e:
-            self.logger.error(f"Error loading {statement_type} from {file_path}: {e}")
-            self.conn.rollback()
+            self.logger.error(f"Error loading {statement_type} from {', '.join(statement_files.values())}: {e}")
+            self.rollback()
     
-    def _insert_income_statement(self, cursor, company_id: int, period_ending: date, period_type: str, data: pd.Series):
-        """Insert income statement data"""
-        cursor.execute("""
-            INSERT INTO income_statements (
-                company_id, period_ending, period_type, total_revenue, cost_of_revenue,
-                gross_profit, research_development, selling_general_administrative,
-                total_operating_expenses, operating_income, ebit, ebitda,
-                interest_income, interest_expense, other_income_expense_net,
-                income_before_tax, tax_provision, net_income, net_income_common_stockholders,
-                diluted_eps, basic_eps, diluted_average_shares, basic_average_shares,
-                operating_expense, normalized_income, total_expenses
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (company_id, period_ending, period_type) DO NOTHING
-        """, (
-            company_id, period_ending, period_type,
-            self.safe_convert_to_int(data.get('Total Revenue')),
-            self.safe_convert_to_int(data.get('Cost Of Revenue')),
-            self.safe_convert_to_int(data.get('Gross Profit')),
-            self.safe_convert_to_int(data.get('Research Development')),
-            self.safe_convert_to_int(data.get('Selling General Administrative')),
-            self.safe_convert_to_int(data.get('Total Operating Expenses')),
-            self.safe_convert_to_int(data.get('Operating Income')),
-            self.safe_convert_to_int(data.get('EBIT')),
-            self.safe_convert_to_int(data.get('EBITDA')),
-            self.safe_convert_to_int(data.get('Interest Income')),
-            self.safe_convert_to_int(data.get('Interest Expense')),
-            self.safe_convert_to_int(data.get('Other Income Expense Net')),
-            self.safe_convert_to_int(data.get('Income Before Tax')),
-            self.safe_convert_to_int(data.get('Tax Provision')),
-            self.safe_convert_to_int(data.get('Net Income')),
-            self.safe_convert_to_int(data.get('Net Income Common Stockholders')),
-            self.safe_convert_to_float(data.get('Diluted EPS')),
-            self.safe_convert_to_float(data.get('Basic EPS')),
-            self.safe_convert_to_int(data.get('Diluted Average Shares')),
-            self.safe_convert_to_int(data.get('Basic Average Shares')),
-            self.safe_convert_to_int(data.get('Operating Expense')),
-            self.safe_convert_to_int(data.get('Normalized Income')),
-            self.safe_convert_to_int(data.get('Total Expenses'))
-        ))
-    
-    def _insert_balance_sheet(self, cursor, company_id: int, period_ending: date, period_type: str, data: pd.Series):
-        """Insert balance sheet data"""
-        cursor.execute("""
-            INSERT INTO balance_sheets (
-                company_id, period_ending, period_type, total_assets, current_assets,
-                cash_and_cash_equivalents, cash_cash_equivalents_and_short_term_investments,
-                other_short_term_investments, accounts_receivable, inventory, prepaid_assets,
-                other_current_assets, non_current_assets, net_ppe, goodwill,
-                other_intangible_assets, investments_and_advances, other_non_current_assets,
-                total_liabilities, current_liabilities, accounts_payable, accrued_liabilities,
-                short_term_debt, current_debt_and_capital_lease_obligation, other_current_liabilities,
-                non_current_liabilities, long_term_debt, long_term_debt_and_capital_lease_obligation,
-                other_non_current_liabilities, total_debt, stockholders_equity, retained_earnings,
-                common_stock, capital_stock, additional_paid_in_capital, treasury_shares_number,
-                treasury_stock, accumulated_other_comprehensive_income, working_capital,
-                total_equity_gross_minority_interest, minority_interest, total_capitalization,
-                common_stock_equity, net_tangible_assets
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (company_id, period_ending, period_type) DO NOTHING
-        """, (
-            company_id, period_ending, period_type,
-            self.safe_convert_to_int(data.get('Total Assets')),
-            self.safe_convert_to_int(data.get('Current Assets')),
-            self.safe_convert_to_int(data.get('Cash And Cash Equivalents')),
-            self.safe_convert_to_int(data.get('Cash Cash Equivalents And Short Term Investments')),
-            self.safe_convert_to_int(data.get('Other Short Term Investments')),
-            self.safe_convert_to_int(data.get('Accounts Receivable')),
-            self.safe_convert_to_int(data.get('Inventory')),
-            self.safe_convert_to_int(data.get('Prepaid Assets')),
-            self.safe_convert_to_int(data.get('Other Current Assets')),
-            self.safe_convert_to_int(data.get('Non Current Assets')),
-            self.safe_convert_to_int(data.get('Net PPE')),
-            self.safe_convert_to_int(data.get('Goodwill')),
-            self.safe_convert_to_int(data.get('Other Intangible Assets')),
-            self.safe_convert_to_int(data.get('Investments And Advances')),
-            self.safe_convert_to_int(data.get('Other Non Current Assets')),
-            self.safe_convert_to_int(data.get('Total Liabilities Net Minority Interest')),
-            self.safe_convert_to_int(data.get('Current Liabilities')),
-            self.safe_convert_to_int(data.get('Accounts Payable')),
-            self.safe_convert_to_int(data.get('Accrued Liabilities')),
-            self.safe_convert_to_int(data.get('Short Term Debt')),
-            self.safe_convert_to_int(data.get('Current Debt And Capital Lease Obligation')),
-            self.safe_convert_to_int(data.get('Other Current Liabilities')),
-            self.safe_convert_to_int(data.get('Non Current Liabilities')),
-            self.safe_convert_to_int(data.get('Long Term Debt')),
-            self.safe_convert_to_int(data.get('Long Term Debt And Capital Lease Obligation')),
-            self.safe_convert_to_int(data.get('Other Non Current Liabilities')),
-            self.safe_convert_to_int(data.get('Total Debt')),
-            self.safe_convert_to_int(data.get('Stockholders Equity')),
-            self.safe_convert_to_int(data.get('Retained Earnings')),
-            self.safe_convert_to_int(data.get('Common Stock')),
-            self.safe_convert_to_int(data.get('Capital Stock')),
-            self.safe_convert_to_int(data.get('Additional Paid In Capital')),
-            self.safe_convert_to_int(data.get('Treasury Shares Number')),
-            self.safe_convert_to_int(data.get('Treasury Stock')),
-            self.safe_convert_to_int(data.get('Accumulated Other Comprehensive Income')),
-            self.safe_convert_to_int(data.get('Working Capital')),
-            self.safe_convert_to_int(data.get('Total Equity Gross Minority Interest')),
-            self.safe_convert_to_int(data.get('Minority Interest')),
-            self.safe_convert_to_int(data.get('Total Capitalization')),
-            self.safe_convert_to_int(data.get('Common Stock Equity')),
-            self.safe_convert_to_int(data.get('Net Tangible Assets'))
-        ))
-    
-    def _insert_cash_flow_statement(self, cursor, company_id: int, period_ending: date, period_type: str, data: pd.Series):
-        """Insert cash flow statement data"""
-        cursor.execute("""
-            INSERT INTO cash_flow_statements (
-                company_id, period_ending, period_type, operating_cash_flow, investing_cash_flow,
-                financing_cash_flow, free_cash_flow, capital_expenditure, net_income,
-                net_income_from_continuing_operations, depreciation_depletion_and_amortization,
-                depreciation_and_amortization, deferred_income_tax, stock_based_compensation,
-                change_in_working_capital, change_in_accounts_receivable, change_in_inventory,
-                change_in_accounts_payable, change_in_other_working_capital, other_non_cash_items,
-                investments_in_property_plant_and_equipment, acquisitions_net, purchases_of_investments,
-                sales_maturities_of_investments, other_investing_activities, issuance_of_debt,
-                repayment_of_debt, repurchase_of_capital_stock, cash_dividends_paid,
-                other_financing_activities, effect_of_exchange_rate_changes, end_cash_position,
-                beginning_cash_position, changes_in_cash, financing_cash_flow_net
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (company_id, period_ending, period_type) DO NOTHING
-        """, (
-            company_id, period_ending, period_type,
-            self.safe_convert_to_int(data.get('Operating Cash Flow')),
-            self.safe_convert_to_int(data.get('Investing Cash Flow')),
-            self.safe_convert_to_int(data.get('Financing Cash Flow')),
-            self.safe_convert_to_int(data.get('Free Cash Flow')),
-            self.safe_convert_to_int(data.get('Capital Expenditure')),
-            self.safe_convert_to_int(data.get('Net Income')),
-            self.safe_convert_to_int(data.get('Net Income From Continuing Operations')),
-            self.safe_convert_to_int(data.get('Depreciation Depletion And Amortization')),
-            self.safe_convert_to_int(data.get('Depreciation And Amortization')),
-            self.safe_convert_to_int(data.get('Deferred Income Tax')),
-            self.safe_convert_to_int(data.get('Stock Based Compensation')),
-            self.safe_convert_to_int(data.get('Change In Working Capital')),
-            self.safe_convert_to_int(data.get('Change In Accounts Receivable')),
-            self.safe_convert_to_int(data.get('Change In Inventory')),
-            self.safe_convert_to_int(data.get('Change In Accounts Payable')),
-            self.safe_convert_to_int(data.get('Change In Other Working Capital')),
-            self.safe_convert_to_int(data.get('Other Non Cash Items')),
-            self.safe_convert_to_int(data.get('Investments In Property Plant And Equipment')),
-            self.safe_convert_to_int(data.get('Acquisitions Net')),
-            self.safe_convert_to_int(data.get('Purchases Of Investments')),
-            self.safe_convert_to_int(data.get('Sales Maturities Of Investments')),
-            self.safe_convert_to_int(data.get('Other Investing Activities')),
-            self.safe_convert_to_int(data.get('Issuance Of Debt')),
-            self.safe_convert_to_int(data.get('Repayment Of Debt')),
-            self.safe_convert_to_int(data.get('Repurchase Of Capital Stock')),
-            self.safe_convert_to_int(data.get('Cash Dividends Paid')),
-            self.safe_convert_to_int(data.get('Other Financing Activities')),
-            self.safe_convert_to_int(data.get('Effect Of Exchange Rate Changes')),
-            self.safe_convert_to_int(data.get('End Cash Position')),
-            self.safe_convert_to_int(data.get('Beginning Cash Position')),
-            self.safe_convert_to_int(data.get('Changes In Cash')),
-            self.safe_convert_to_int(data.get('Financing Cash Flow'))
-        ))
+    def load_financial_statements_from_csv(self, file_path: str, company_id: int, symbol: str, statement_type: str, period_type: str):
+        """Load financial statements from CSV"""
+        self.load_financial_statements({period_type: file_path}, company_id, symbol, statement_type)
+    
+    def corporate_action_rows(self, df: pd.DataFrame, company_id: int) -> List[tuple]:
+        """corporate_actions INSERT tuples for the dated, non-zero dividends and splits in df"""
+        # Dates stay on the scalar parser: offset timestamps are passed through
+        # for the server to cast, which a vectorized .dt.date would not match
+        if 'Date' in df.columns:
+            timestamps = pd.to_datetime(df['Date'], errors='coerce')
+            action_dates = pd.Series([self.safe_convert_to_date(value) for value in timestamps], index=df.index, dtype=object)
+        else:
+            action_dates = pd.Series(None, index=df.index, dtype=object)
+        
+        # Dividends and stock splits with a dated, non-zero amount, converted per column
+        actions = []
+        for action_type, column in (('dividend', 'Dividends'), ('stock_split', 'Stock Splits')):
+            if column not in df.columns:
+                continue
+            amounts = self.to_float_column(df[column])
+            keep = action_dates.notna() & amounts.notna() & (amounts != 0)
+            actions.append(pd.DataFrame({
+                'company_id': company_id,
+                'action_date': action_dates[keep],
+                'action_type': action_type,
+                'amount': amounts[keep]
+            }))
+        return self.dataframe_rows(pd.concat(actions)) if actions else []
+    
+    def earnings_rows(self, df: pd.DataFrame, company_id: int) -> List[tuple]:
+        """earnings INSERT tuples for every row of df"""
+        def column(name):
+            return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+        
+        # Numbers convert per column; dates stay on the scalar parser, which
+        # rejects offset timestamps that to_date_column would accept
+        return self.dataframe_rows(pd.DataFrame({
+            'company_id': company_id,
+            'earnings_date': column('Earnings Date').map(self.safe_convert_to_date, na_action='ignore'),
+            'eps_estimate': self.to_float_column(column('EPS Estimate')),
+            'reported_eps': self.to_float_column(column('Reported EPS')),
+            'surprise_percent': self.to_float_column(column('Surprise(%)'))
+        }, index=df.index))
     
     def load_corporate_actions_from_csv(self, file_path: str, company_id: int, symbol: str):
-        """Load corporate actions from CSV"""
+        """Load corporate actions from CSV, streamed in chunks"""
         self.logger.info(f"Loading corporate actions from {file_path} for {symbol}")
         
         try:
-            df = pd.read_csv(file_path, parse_dates=['Date'])
-            if df.empty:
+            chunks = self.read_csv_chunks(file_path, CORPORATE_ACTION_COLUMN_TYPES)
+            df = next(chunks, None)
+            if df is None or df.empty:
                 self.logger.warning(f"Empty corporate actions file: {file_path}")
                 return
             
             cursor = self.conn.cursor()
             
-            # Clear existing corporate actions for this company
-            cursor.execute("DELETE FROM corporate_actions WHERE company_id = %s", (company_id,))
-            
-            for _, row in df.iterrows():
-                action_date = self.safe_convert_to_date(row.get('Date'))
-                if not action_date:
-                    continue
-                
-                # Check for dividends
-                if 'Dividends' in row and pd.notna(row['Dividends']) and row['Dividends'] != 0:
-                    cursor.execute("""
-                        INSERT INTO corporate_actions (company_id, action_date, action_type, amount)
-                        VALUES (%s, %s, %s, %s)
-                        ON CONFLICT (company_id, action_date, action_type) DO NOTHING
-                    """, (company_id, action_date, 'dividend', self.safe_convert_to_float(row['Dividends'])))
-                
-                # Check for stock splits
-                if 'Stock Splits' in row and pd.notna(row['Stock Splits']) and row['Stock Splits'] != 0:
-                    cursor.execute("""
-                        INSERT INTO corporate_actions (company_id, action_date, action_type, amount)
-                        VALUES (%s, %s, %s, %s)
-                        ON CONFLICT (company_id, action_date, action_type) DO NOTHING
-                    """, (company_id, action_date, 'stock_split', self.safe_convert_to_float(row['Stock Splits'])))
+            # Upsert instead of delete + reinsert, so unchanged actions are not rewritten.
+            # A statement may touch each key once, and the first row for a date wins.
+            seen = set()
+            for df in itertools.chain([df], chunks):
+                rows = []
+                for row in self.corporate_action_rows(df, company_id):
+                    if row[1:3] not in seen:
+                        seen.add(row[1:3])
+                        rows.append(row)
+                execute_values(
+                    cursor,
+                    """INSERT INTO corporate_actions (company_id, action_date, action_type, amount) VALUES %s
+                       ON CONFLICT (company_id, action_date, action_type) DO UPDATE SET amount = EXCLUDED.amount
+                       WHERE corporate_actions.amount IS DISTINCT FROM EXCLUDED.amount""",
+                    rows,
+                    page_size=1000
+                )
             
             cursor.close()
             self.logger.info(f"Loaded corporate actions for {symbol}")
             
         except Exception as e:
             self.logger.error(f"Error loading corporate actions from {file_path}: {e}")
-            self.conn.rollback()
+            self.rollback()
     
     def load_earnings_from_csv(self, file_path: str, company_id: int, symbol: str):
-        """Load earnings data from CSV"""
+        """Load earnings data from CSV, streamed in chunks"""
         self.logger.info(f"Loading earnings from {file_path} for {symbol}")
         
         try:
-            df = pd.read_csv(file_path)
-            if df.empty:
+            chunks = self.read_csv_chunks(file_path, EARNINGS_COLUMN_TYPES)
+            df = next(chunks, None)
+            if df is None or df.empty:
                 self.logger.warning(f"Empty earnings file: {file_path}")
                 return
             
             cursor = self.conn.cursor()
             
-            for _, row in df.iterrows():
-                earnings_date = self.safe_convert_to_date(row.get('Earnings Date'))
-                
-                cursor.execute("""
-                    INSERT INTO earnings (
-                        company_id, earnings_date, eps_estimate, reported_eps, surprise_percent
-                    ) VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (
-                    company_id,
-                    earnings_date,
-                    self.safe_convert_to_float(row.get('EPS Estimate')),
-                    self.safe_convert_to_float(row.get('Reported EPS')),
-                    self.safe_convert_to_float(row.get('Surprise(%)'))
-                ))
+            for df in itertools.chain([df], chunks):
+                execute_values(
+                    cursor,
+                    """INSERT INTO earnings (company_id, earnings_date, eps_estimate, reported_eps, surprise_percent)
+                       VALUES %s ON CONFLICT DO NOTHING""",
+                    self.earnings_rows(df, company_id),
+                    page_size=1000
+                )
             
             cursor.close()
             self.logger.info(f"Loaded earnings for {symbol}")
             
         except Exception as e:
             self.logger.error(f"Error loading earnings from {file_path}: {e}")
-            self.conn.rollback()
+            self.rollback()
     
     def extract_symbol_from_filename(self, filename: str) -> Optional[str]:
         """Extract symbol from filename like 'RELIANCE_NS_all_history_123456.csv'"""
-        parts = filename.split('_')
-        if len(parts) >= 2:
-            return f"{parts[0]}.{parts[1]}" if parts[1] in ['NS', 'BO'] else parts[0]
-        return None
+        match = SYMBOL_PATTERN.match(filename)
+        if match:
+            return f"{match.group(1)}.{match.group(2)}"
+        return filename.split('_', 1)[0] if '_' in filename else None
     
-    def load_all_csv_files(self, directory: str = "attached_assets"):
-        """Load all CSV files from the specified directory"""
+    def file_category(self, filename: str) -> Optional[str]:
+        """File type of a name like 'RELIANCE_NS_income_stmt_annual_123456.csv', or None"""
+        tokens = os.path.splitext(filename)[0].split('_')
+        start = 2 if len(tokens) > 1 and tokens[1] in ('NS', 'BO') else 1
+        end = len(tokens)
+        while end > start and tokens[end - 1].isdigit():
+            end -= 1
+        tokens = [token.lower() for token in tokens]
+        category = CSV_FILE_CATEGORIES.get('_'.join(tokens[start:end]))
+        if category:
+            return category
+        # Names outside the usual layout: any run of up to three tokens that spells a key,
+        # probed as a set instead of substring-searching the name once per key
+        runs = {'_'.join(tokens[i:i + n]) for n in (1, 2, 3) for i in range(len(tokens) - n + 1)}
+        return next((category for key, category in CSV_FILE_CATEGORIES.items() if key in runs), None)
+    
+    def group_csv_files(self, directory: str) -> Dict[str, Dict[str, str]]:
+        """Find the CSV files in directory and group them by symbol and file type"""
+        # Group files by symbol straight off the directory scan; no path list is built
+        symbol_files = defaultdict(dict)
+        found = 0
         try:
-            self.connect_db()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # The same files glob's *.csv matched: hidden names excluded
+                    if not entry.name.endswith('.csv') or entry.name.startswith('.'):
+                        continue
+                    found += 1
+                    symbol = self.extract_symbol_from_filename(entry.name)
+                    if symbol:
+                        files = symbol_files[symbol]
+                        category = self.file_category(entry.name)
+                        if category:
+                            files[category] = entry.path
+        except FileNotFoundError:
+            pass
+        
+        if not found:
+            self.logger.warning(f"No CSV files found in {directory}")
+            return {}
+        
+        self.logger.info(f"Found {found} CSV files in {directory}")
+        return dict(symbol_files)
+    
+    def load_symbol_files(self, symbol: str, files: Dict[str, str]) -> bool:
+        """
+        Load every CSV file of one symbol under a savepoint of the open
+        transaction; a failure rolls back this symbol only. Committing is
+        left to load_symbol_batch.
+        """
+        self.logger.info(f"Processing symbol: {symbol}")
+        
+        try:
+            with self.savepoint('symbol_load'):
+                self.load_symbol_data(symbol, files)
+            self.logger.info(f"✓ Successfully loaded all data for {symbol}")
+            return True
             
-            # Find all CSV files
-            csv_files = glob.glob(os.path.join(directory, "*.csv"))
+        except Exception as e:
+            self.logger.error(f"✗ Error processing {symbol}: {e}; dropped all of its data from this batch")
+            return False
+    
+    def load_symbol_batch(self, items: List[tuple]) -> List[bool]:
+        """Load (symbol, files) items in one transaction, a savepoint per symbol, and commit once"""
+        results = [self.load_symbol_files(symbol, files) for symbol, files in items]
+        try:
+            self.commit()
+        except Exception as e:
+            self.logger.error(f"✗ Error committing {', '.join(symbol for symbol, _ in items)}: {e}")
+            self.rollback()
+            return [False] * len(items)
+        return results
+    
+    def load_symbol_data(self, symbol: str, files: Dict[str, str]):
+        """Load the CSV files of one symbol into the open transaction"""
+        # Start with company info
+        company_id = None
+        
+        if 'all_info' in files:
+            company_ids = self.load_company_info_from_csv(files['all_info'])
+            company_id = company_ids.get(symbol)
+        elif 'full_data' in files:
+            company_ids = self.load_full_data_from_csv(files['full_data'])
+            company_id = company_ids.get(symbol)
+        elif 'key_info' in files:
+            # Load key info as basic company info
+            try:
+                df = self.read_csv(files['key_info'])
+                if not df.empty:
+                    # Hand the first row over as a frame; no per-row dict round trip
+                    company_id = self.get_or_create_companies(df.head(1).assign(symbol=symbol)).get(symbol)
+            except Exception as e:
+                self.logger.error(f"Error loading key info for {symbol}: {e}")
+        
+        if not company_id:
+            company_id = self.get_or_create_company(symbol)
+        
+        # Load price history
+        if 'all_history' in files:
+            self.load_price_history_from_csv(files['all_history'], company_id, symbol)
+        
+        # Load financial statements, annual and quarterly together per statement type
+        for statement_type, prefix in (('income', 'income'), ('balance_sheet', 'balance'), ('cash_flow', 'cashflow')):
+            statement_files = {
+                period_type: files[f'{prefix}_{period_type}']
+                for period_type in ('annual', 'quarterly')
+                if f'{prefix}_{period_type}' in files
+            }
+            if statement_files:
+                self.load_financial_statements(statement_files, company_id, symbol, statement_type)
+        
+        # Load corporate actions
+        if 'corporate_actions' in files:
+            self.load_corporate_actions_from_csv(files['corporate_actions'], company_id, symbol)
+        
+        # Load earnings
+        if 'earnings_dates' in files:
+            self.load_earnings_from_csv(files['earnings_dates'], company_id, symbol)
+        
+        # Log successful load
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            INSERT INTO data_updates (company_id, table_name, update_type, records_affected, file_source)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (company_id, 'all_tables', 'csv_load', len(files), f"{symbol}_csv_files"))
+        cursor.close()
+    
+    def load_all_csv_files(self, directory: str = "attached_assets", max_workers: Optional[int] = None,
+                           rebuild_indexes: bool = False):
+        """
+        Load all CSV files from the specified directory.
+        Symbols are independent, so they are spread over a process pool
+        (default 2 x CPUs) where each worker keeps its own connection;
+        max_workers=1 loads them serially on this loader's connection.
+        Either way symbols go in batches committed once each.
+        rebuild_indexes drops the secondary indexes of the loaded tables for the
+        whole run and rebuilds them once at the end (for full reloads). Indexes
+        an earlier run dropped but never rebuilt are restored first.
+        """
+        dropped_indexes = []
+        try:
+            self.create_bulk_load_indexes()
             
-            if not csv_files:
-                self.logger.warning(f"No CSV files found in {directory}")
+            symbol_files = self.group_csv_files(directory)
+            if not symbol_files:
                 return
             
-            self.logger.info(f"Found {len(csv_files)} CSV files in {directory}")
-            
-            # Group files by symbol
-            symbol_files = {}
-            for file_path in csv_files:
-                filename = os.path.basename(file_path)
-                symbol = self.extract_symbol_from_filename(filename)
-                
-                if symbol:
-                    if symbol not in symbol_files:
-                        symbol_files[symbol] = {}
-                    
-                    # Categorize file type
-                    if 'all_info' in filename:
-                        symbol_files[symbol]['all_info'] = file_path
-                    elif 'full_data' in filename:
-                        symbol_files[symbol]['full_data'] = file_path
-                    elif 'all_history' in filename:
-                        symbol_files[symbol]['all_history'] = file_path
-                    elif 'key_info' in filename:
-                        symbol_files[symbol]['key_info'] = file_path
-                    elif 'income_stmt_annual' in filename:
-                        symbol_files[symbol]['income_annual'] = file_path
-                    elif 'income_stmt_quarterly' in filename:
-                        symbol_files[symbol]['income_quarterly'] = file_path
-                    elif 'balance_sheet_annual' in filename:
-                        symbol_files[symbol]['balance_annual'] = file_path
-                    elif 'balance_sheet_quarterly' in filename:
-                        symbol_files[symbol]['balance_quarterly'] = file_path
-                    elif 'cashflow_annual' in filename:
-                        symbol_files[symbol]['cashflow_annual'] = file_path
-                    elif 'cashflow_quarterly' in filename:
-                        symbol_files[symbol]['cashflow_quarterly'] = file_path
-                    elif 'corporate_actions' in filename:
-                        symbol_files[symbol]['corporate_actions'] = file_path
-                    elif 'dividends' in filename:
-                        symbol_files[symbol]['dividends'] = file_path
-                    elif 'splits' in filename:
-                        symbol_files[symbol]['splits'] = file_path
-                    elif 'earnings_dates' in filename:
-                        symbol_files[symbol]['earnings_dates'] = file_path
-            
-            # Process each symbol
-            for symbol, files in symbol_files.items():
-                self.logger.info(f"Processing symbol: {symbol}")
-                
-                try:
-                    # Start with company info
-                    company_id = None
-                    
-                    if 'all_info' in files:
-                        company_ids = self.load_company_info_from_csv(files['all_info'])
-                        company_id = company_ids.get(symbol)
-                    elif 'full_data' in files:
-                        company_ids = self.load_full_data_from_csv(files['full_data'])
-                        company_id = company_ids.get(symbol)
-                    elif 'key_info' in files:
-                        # Load key info as basic company info
-                        try:
-                            df = pd.read_csv(files['key_info'])
-                            if not df.empty:
-                                row = df.iloc[0]
-                                company_data = row.to_dict()
-                                company_id = self.get_or_create_company(symbol, company_data)
-                        except Exception as e:
-                            self.logger.error(f"Error loading key info for {symbol}: {e}")
-                    
-                    if not company_id:
-                        company_id = self.get_or_create_company(symbol)
-                    
-                    # Load price history
-                    if 'all_history' in files:
-                        self.load_price_history_from_csv(files['all_history'], company_id, symbol)
-                    
-                    # Load financial statements
-                    if 'income_annual' in files:
-                        self.load_financial_statements_from_csv(files['income_annual'], company_id, symbol, 'income', 'annual')
-                    if 'income_quarterly' in files:
-                        self.load_financial_statements_from_csv(files['income_quarterly'], company_id, symbol, 'income', 'quarterly')
-                    if 'balance_annual' in files:
-                        self.load_financial_statements_from_csv(files['balance_annual'], company_id, symbol, 'balance_sheet', 'annual')
-                    if 'balance_quarterly' in files:
-                        self.load_financial_statements_from_csv(files['balance_quarterly'], company_id, symbol, 'balance_sheet', 'quarterly')
-                    if 'cashflow_annual' in files:
-                        self.load_financial_statements_from_csv(files['cashflow_annual'], company_id, symbol, 'cash_flow', 'annual')
-                    if 'cashflow_quarterly' in files:
-                        self.load_financial_statements_from_csv(files['cashflow_quarterly'], company_id, symbol, 'cash_flow', 'quarterly')
-                    
-                    # Load corporate actions
-                    if 'corporate_actions' in files:
-                        self.load_corporate_actions_from_csv(files['corporate_actions'], company_id, symbol)
-                    
-                    # Load earnings
-                    if 'earnings_dates' in files:
-                        self.load_earnings_from_csv(files['earnings_dates'], company_id, symbol)
-                    
-                    # Log successful load
-                    cursor = self.conn.cursor()
-                    cursor.execute("""
-                        INSERT INTO data_updates (company_id, table_name, update_type, records_affected, file_source)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """, (company_id, 'all_tables', 'csv_load', len(files), f"{symbol}_csv_files"))
-                    cursor.close()
-                    
-                    self.conn.commit()
-                    self.logger.info(f"✓ Successfully loaded all data for {symbol}")
-                    
-                except Exception as e:
-                    self.logger.error(f"✗ Error processing {symbol}: {e}")
-                    self.conn.rollback()
-                    continue
+            if rebuild_indexes:
+                dropped_indexes = self.drop_bulk_load_indexes()
             
-            self.logger.info("CSV loading completed!")
+            workers = min(max_workers or (os.cpu_count() or 1) * 2, len(symbol_files))
+            # Commit every few symbols, but never starve workers of batches
+            items = list(symbol_files.items())
+            batch_size = max(1, min(SYMBOLS_PER_COMMIT, -(-len(items) // workers)))
+            batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+            if workers <= 1:
+                self.connect_db()
+                results = [result for batch in batches for result in self.load_symbol_batch(batch)]
+            else:
+                self.logger.info(f"Loading {len(symbol_files)} symbols with {workers} worker processes")
+                # Forked workers inherit the already-imported pandas/pyarrow instead of re-importing them
+                context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_load_worker) as executor:
+                    results = [result for batch in executor.map(load_symbol_worker, batches) for result in batch]
+            
+            self.logger.info(f"CSV loading completed! {sum(results)}/{len(results)} symbols loaded")
             
         except Exception as e:
             self.logger.error(f"Error in load_all_csv_files: {e}")
             if self.conn:
-                self.conn.rollback()
+                self.rollback()
             raise
         finally:
             self.close_db()
+            if dropped_indexes:
+                try:
+                    self.create_bulk_load_indexes()
+                except Exception as e:
+                    # never mask the load's own error; the next run restores them
+                    self.logger.error(f"Could not rebuild the bulk load indexes: {e}")
+
+# Loader owned by each ProcessPoolExecutor worker, connected once per process
+_worker_loader = None
+
+def init_load_worker():
+    """ProcessPoolExecutor initializer: open this worker's own database connection"""
+    global _worker_loader
+    _worker_loader = CSVToDatabaseLoader()
+    _worker_loader.connect_db()
+
+def load_symbol_worker(items) -> List[bool]:
+    """ProcessPoolExecutor task: load a batch of (symbol, files) items on the worker's connection"""
+    return _worker_loader.load_symbol_batch(items)
 
 if __name__ == "__main__":
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else None
     loader = CSVToDatabaseLoader()
-    loader.load_all_csv_files()
+    # --bulk (or --rebuild-indexes) for full reloads; incremental loads keep the indexes live
+    bulk = '--bulk' in sys.argv or '--rebuild-indexes' in sys.argv
+    loader.load_all_csv_files(max_workers=workers, rebuild_indexes=bulk)
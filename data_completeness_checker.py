@@ -5,233 +5,439 @@ Data Completeness Checker for NSE Stock Database
 Analyzes completeness of all data points across 145 companies
 """
 
-import psycopg2
 import os
+import sys
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 import json
+import pickle
+import shutil
+import stat
+import hashlib
+import functools
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from database_config import get_connection_pool
 
-class DataCompletenessChecker:
-    def __init__(self):
-        self.conn = psycopg2.connect(os.getenv('DATABASE_URL'))
-    
-    def get_overall_statistics(self):
-        """Get overall database statistics"""
-        query = """
-        SELECT 
-            'Companies' as table_name,
-            COUNT(*) as total_records,
-            COUNT(DISTINCT symbol) as unique_symbols
-        FROM companies
-        
-        UNION ALL
-        
+# (report label, table) pairs shown in the overall statistics, companies first
+OVERALL_STATISTICS_TABLES = [
+    ('Companies', 'companies'),
+    ('Price History', 'price_history'),
+    ('Company Metrics', 'company_metrics'),
+    ('Income Statements', 'income_statements'),
+    ('Balance Sheets', 'balance_sheets'),
+    ('Cash Flow Statements', 'cash_flow_statements'),
+    ('Corporate Actions', 'corporate_actions'),
+    ('Earnings', 'earnings'),
+    ('Holders', 'holders'),
+]
+
+# (report label, companies column) pairs for the basic information check
+BASIC_INFO_FIELDS = [
+    ('Long Name', 'long_name'),
+    ('Sector', 'sector'),
+    ('Industry', 'industry'),
+    ('Country', 'country'),
+    ('Exchange', 'exchange'),
+    ('Website', 'website'),
+    ('Employees', 'full_time_employees'),
+    ('Business Summary', 'long_business_summary'),
+]
+
+# (report label, company_metrics column) pairs for the metrics check
+METRIC_FIELDS = [
+    ('Market Cap', 'cm.market_cap'),
+    ('P/E Ratio', 'cm.trailing_pe'),
+    ('Dividend Yield', 'cm.dividend_yield'),
+    ('Beta', 'cm.beta'),
+    ('Book Value', 'cm.book_value'),
+    ('52W High', 'cm.fifty_two_week_high'),
+    ('52W Low', 'cm.fifty_two_week_low'),
+    ('Revenue', 'cm.total_revenue'),
+    ('Operating CF', 'cm.operating_cashflow'),
+    ('Free CF', 'cm.free_cashflow'),
+]
+
+# Columns of get_company_summary returned by each per-company check
+PRICE_HISTORY_COLUMNS = ['symbol', 'price_records', 'earliest_date', 'latest_date',
+                         'days_with_volume', 'dividend_days', 'split_days']
+FINANCIAL_STATEMENT_COLUMNS = ['symbol', 'annual_income_statements', 'quarterly_income_statements',
+                               'annual_balance_sheets', 'quarterly_balance_sheets',
+                               'annual_cashflow', 'quarterly_cashflow',
+                               'latest_annual_report', 'latest_quarterly_report']
+CORPORATE_ACTION_COLUMNS = ['symbol', 'dividend_records', 'split_records', 'last_dividend', 'last_split']
+EARNINGS_COLUMNS = ['symbol', 'earnings_records', 'reported_eps_count', 'eps_estimate_count',
+                    'surprise_count', 'latest_earnings_date']
+
+# Per-company aggregates behind the price, financial, corporate action and
+# earnings checks. Each child table is aggregated by company_id once and
+# joined back to companies, so all four checks share one round trip (and
+# the statement tables no longer multiply each other's rows).
+# companies_summary_view.sql materializes the same query; keep them in sync.
+COMPANY_SUMMARY_QUERY = """
+    WITH price AS (
         SELECT 
-            'Price History' as table_name,
-            COUNT(*) as total_records,
-            COUNT(DISTINCT company_id) as unique_companies
+            company_id,
+            COUNT(*) as price_records,
+            MIN(date) as earliest_date,
+            MAX(date) as latest_date,
+            COUNT(*) FILTER (WHERE volume > 0) as days_with_volume,
+            COUNT(*) FILTER (WHERE dividends > 0) as dividend_days,
+            COUNT(*) FILTER (WHERE stock_splits > 0) as split_days
         FROM price_history
-        
-        UNION ALL
-        
-        SELECT 
-            'Company Metrics' as table_name,
-            COUNT(*) as total_records,
-            COUNT(DISTINCT company_id) as unique_companies
-        FROM company_metrics
-        
-        UNION ALL
-        
+        GROUP BY company_id
+    ),
+    income AS (
         SELECT 
-            'Income Statements' as table_name,
-            COUNT(*) as total_records,
-            COUNT(DISTINCT company_id) as unique_companies
+            company_id,
+            COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'annual') as annual_income_statements,
+            COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'quarterly') as quarterly_income_statements,
+            MAX(period_ending) FILTER (WHERE period_type = 'annual') as latest_annual_report,
+            MAX(period_ending) FILTER (WHERE period_type = 'quarterly') as latest_quarterly_report
         FROM income_statements
-        
-        UNION ALL
-        
+        GROUP BY company_id
+    ),
+    balance AS (
         SELECT 
-            'Balance Sheets' as table_name,
-            COUNT(*) as total_records,
-            COUNT(DISTINCT company_id) as unique_companies
+            company_id,
+            COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'annual') as annual_balance_sheets,
+            COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'quarterly') as quarterly_balance_sheets
         FROM balance_sheets
-        
-        UNION ALL
-        
+        GROUP BY company_id
+    ),
+    cashflow AS (
         SELECT 
-            'Cash Flow Statements' as table_name,
-            COUNT(*) as total_records,
-            COUNT(DISTINCT company_id) as unique_companies
+            company_id,
+            COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'annual') as annual_cashflow,
+            COUNT(DISTINCT period_ending) FILTER (WHERE period_type = 'quarterly') as quarterly_cashflow
         FROM cash_flow_statements
-        
-        UNION ALL
-        
+        GROUP BY company_id
+    ),
+    actions AS (
         SELECT 
-            'Corporate Actions' as table_name,
-            COUNT(*) as total_records,
-            COUNT(DISTINCT company_id) as unique_companies
+            company_id,
+            COUNT(*) FILTER (WHERE action_type = 'dividend') as dividend_records,
+            COUNT(*) FILTER (WHERE action_type = 'stock_split') as split_records,
+            MAX(action_date) FILTER (WHERE action_type = 'dividend') as last_dividend,
+            MAX(action_date) FILTER (WHERE action_type = 'stock_split') as last_split
         FROM corporate_actions
-        
-        UNION ALL
-        
+        GROUP BY company_id
+    ),
+    earnings_agg AS (
         SELECT 
-            'Earnings' as table_name,
-            COUNT(*) as total_records,
-            COUNT(DISTINCT company_id) as unique_companies
+            company_id,
+            COUNT(*) as earnings_records,
+            COUNT(reported_eps) as reported_eps_count,
+            COUNT(eps_estimate) as eps_estimate_count,
+            COUNT(surprise_percent) as surprise_count,
+            MAX(earnings_date) as latest_earnings_date
         FROM earnings
-        
-        UNION ALL
-        
+        GROUP BY company_id
+    )
+    SELECT 
+        c.id,
+        c.symbol,
+        COALESCE(p.price_records, 0) as price_records,
+        p.earliest_date,
+        p.latest_date,
+        COALESCE(p.days_with_volume, 0) as days_with_volume,
+        COALESCE(p.dividend_days, 0) as dividend_days,
+        COALESCE(p.split_days, 0) as split_days,
+        COALESCE(i.annual_income_statements, 0) as annual_income_statements,
+        COALESCE(i.quarterly_income_statements, 0) as quarterly_income_statements,
+        COALESCE(b.annual_balance_sheets, 0) as annual_balance_sheets,
+        COALESCE(b.quarterly_balance_sheets, 0) as quarterly_balance_sheets,
+        COALESCE(cf.annual_cashflow, 0) as annual_cashflow,
+        COALESCE(cf.quarterly_cashflow, 0) as quarterly_cashflow,
+        i.latest_annual_report,
+        i.latest_quarterly_report,
+        COALESCE(a.dividend_records, 0) as dividend_records,
+        COALESCE(a.split_records, 0) as split_records,
+        a.last_dividend,
+        a.last_split,
+        COALESCE(e.earnings_records, 0) as earnings_records,
+        COALESCE(e.reported_eps_count, 0) as reported_eps_count,
+        COALESCE(e.eps_estimate_count, 0) as eps_estimate_count,
+        COALESCE(e.surprise_count, 0) as surprise_count,
+        e.latest_earnings_date
+    FROM companies c
+    LEFT JOIN price p ON c.id = p.company_id
+    LEFT JOIN income i ON c.id = i.company_id
+    LEFT JOIN balance b ON c.id = b.company_id
+    LEFT JOIN cashflow cf ON c.id = cf.company_id
+    LEFT JOIN actions a ON c.id = a.company_id
+    LEFT JOIN earnings_agg e ON c.id = e.company_id
+"""
+
+# Fixed-width row layouts of the report tables, bound once at import
+OVERALL_ROW_FORMAT = "{:<20} {:>8} records  {:>3} companies".format
+BASIC_INFO_ROW_FORMAT = "{:<20} {}".format
+METRIC_ROW_FORMAT = "{:<15} {}".format
+
+# Batch size for streaming results through a server-side cursor
+FETCH_ROWS = 10000
+
+# Check results are reused for the rest of the day until the tables change.
+# The pickles live in a per-user 0700 directory, never a shared one like /tmp.
+CACHE_DIR = os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                         'completeness_checker')
+
+def private_cache_dir():
+    """
+    Today's directory under CACHE_DIR, created on first use. Returns None
+    unless CACHE_DIR is a real directory owned by this user that nobody else
+    can write to, since anyone who can plant a pickle there can run code.
+    """
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        info = os.lstat(CACHE_DIR)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+            return None
+        if info.st_mode & 0o077:
+            os.chmod(CACHE_DIR, 0o700)
+        today = date.today().isoformat()
+        day_dir = os.path.join(CACHE_DIR, today)
+        if not os.path.isdir(day_dir):
+            # a new day: drop the previous days' entries
+            for name in os.listdir(CACHE_DIR):
+                if name != today:
+                    shutil.rmtree(os.path.join(CACHE_DIR, name), ignore_errors=True)
+            os.makedirs(day_dir, mode=0o700, exist_ok=True)
+        return day_dir
+    except OSError:
+        return None
+
+def cached_check(method):
+    """
+    Read-aside cache for a check method: an in-process dict in front of a
+    pickle under CACHE_DIR/YYYY-MM-DD/. Entries are keyed on the database,
+    the method name and a fingerprint of the table write counters, so any
+    insert, update or delete since the result was stored forces a fresh
+    query. use_cache=False skips the on-disk tier only.
+    """
+    @functools.wraps(method)
+    def wrapper(self):
+        key = f"{method.__name__}-{self.table_fingerprint()}"
+        if key in self.cache:
+            return self.cache[key]
+        day_dir = private_cache_dir() if self.use_cache else None
+        path = None
+        if day_dir:
+            database = self.conn.info
+            digest = hashlib.sha1(repr((database.host, database.port, database.dbname, key)).encode())
+            path = os.path.join(day_dir, f"{digest.hexdigest()}.pkl")
+        try:
+            if path is None:
+                raise FileNotFoundError(key)
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            result = method(self)
+            if path is not None:
+                try:
+                    tmp_path = f"{path}.{os.getpid()}"
+                    with open(tmp_path, 'wb') as f:
+                        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(tmp_path, path)
+                except OSError:
+                    pass  # the cache is best-effort
+        self.cache[key] = result
+        return result
+    return wrapper
+
+class DataCompletenessChecker:
+    def __init__(self, use_cache=True, conn=None):
+        # a caller may share its own connection; otherwise check one out
+        self.owns_conn = conn is None
+        self.conn = get_connection_pool().getconn() if conn is None else conn
+        self.use_cache = use_cache
+        self.cache = {}
+    
+    def table_fingerprint(self):
+        """Fingerprint of the write counters of every user table"""
+        cursor = self.conn.cursor()
+        # drop the transaction's stats snapshot so new writes are seen
+        cursor.execute("""
+            SELECT pg_stat_clear_snapshot();
+            SELECT COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0),
+                   COALESCE(SUM(n_live_tup), 0)
+            FROM pg_stat_user_tables;
+        """)
+        writes, live = cursor.fetchone()
+        cursor.close()
+        return f"{writes}-{live}"
+    
+    def fetch_frame(self, query, server_side=False):
+        """
+        Run a query and build a DataFrame straight from the cursor rows.
+        server_side=True streams the result through a named cursor in
+        FETCH_ROWS batches so only one batch of tuples is held at a time.
+        """
+        if server_side:
+            cursor = self.conn.cursor(name='completeness_cur')
+            cursor.itersize = FETCH_ROWS
+        else:
+            cursor = self.conn.cursor()
+        cursor.execute(query)
+        rows = cursor.fetchmany(FETCH_ROWS)
+        # a named cursor only has a description after its first fetch
+        columns = [column.name for column in cursor.description]
+        frames = [pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)]
+        while len(rows) == FETCH_ROWS:
+            rows = cursor.fetchmany(FETCH_ROWS)
+            if rows:
+                frames.append(pd.DataFrame.from_records(rows, columns=columns, coerce_float=True))
+        cursor.close()
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    
+    def fetch_symbols(self, query):
+        """Run a query and return its first column as a list"""
+        cursor = self.conn.cursor()
+        cursor.execute(query)
+        symbols = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        return symbols
+    
+    @cached_check
+    def get_overall_statistics(self):
+        """Get overall database statistics"""
+        # Row counts come from the live-tuple statistics instead of nine full
+        # COUNT(*) scans; company coverage is one EXISTS probe per company
+        # against each table's company_id index.
+        rows = []
+        for position, (label, table) in enumerate(OVERALL_STATISTICS_TABLES):
+            if table == 'companies':
+                coverage = "SELECT COUNT(DISTINCT symbol) FROM companies"
+            else:
+                coverage = (f"SELECT COUNT(*) FROM companies c WHERE EXISTS "
+                            f"(SELECT 1 FROM {table} t WHERE t.company_id = c.id)")
+            rows.append(f"({position}, '{label}', '{table}', ({coverage}))")
+        values = ",\n            ".join(rows)
+        query = f"""
         SELECT 
-            'Holders' as table_name,
-            COUNT(*) as total_records,
-            COUNT(DISTINCT company_id) as unique_companies
-        FROM holders;
+            v.table_name,
+            COALESCE(s.n_live_tup, 0) as total_records,
+            v.unique_symbols
+        FROM (VALUES
+            {values}
+        ) AS v(position, table_name, relname, unique_symbols)
+        LEFT JOIN pg_stat_user_tables s
+            ON s.relname = v.relname AND s.schemaname = current_schema()
+        ORDER BY v.position;
+        """
+        return self.fetch_frame(query)
+    
+    def count_filled_fields(self, from_clause, fields):
         """
-        return pd.read_sql(query, self.conn)
+        Count the non-null values of each (label, column) field over
+        from_clause in a single one-row query, with the completion
+        percentages worked out by Postgres. Returns the row total, the
+        formatted 'filled/total (pct%)' strings by label and the filled
+        counts by column.
+        """
+        selects = ",\n            ".join(
+            f"COUNT({column}), COUNT({column})::float8 / NULLIF(COUNT(*), 0) * 100"
+            for _, column in fields
+        )
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+        SELECT 
+            COUNT(*),
+            {selects}
+        {from_clause};
+        """)
+        total, *values = cursor.fetchone()
+        cursor.close()
+        
+        stats = {}
+        counts = {}
+        for index, (label, column) in enumerate(fields):
+            count, percent = values[2 * index], values[2 * index + 1]
+            stats[label] = f"{count}/{total} ({percent or 0:.1f}%)"
+            counts[column.split('.')[-1]] = count
+        return total, stats, counts
     
+    @cached_check
     def check_company_basic_info_completeness(self):
         """Check completeness of basic company information"""
-        query = """
-        SELECT 
-            symbol,
-            CASE WHEN long_name IS NOT NULL THEN 1 ELSE 0 END as has_long_name,
-            CASE WHEN sector IS NOT NULL THEN 1 ELSE 0 END as has_sector,
-            CASE WHEN industry IS NOT NULL THEN 1 ELSE 0 END as has_industry,
-            CASE WHEN country IS NOT NULL THEN 1 ELSE 0 END as has_country,
-            CASE WHEN exchange IS NOT NULL THEN 1 ELSE 0 END as has_exchange,
-            CASE WHEN website IS NOT NULL THEN 1 ELSE 0 END as has_website,
-            CASE WHEN full_time_employees IS NOT NULL THEN 1 ELSE 0 END as has_employees,
-            CASE WHEN long_business_summary IS NOT NULL THEN 1 ELSE 0 END as has_summary
-        FROM companies
+        total, stats, counts = self.count_filled_fields("FROM companies", BASIC_INFO_FIELDS)
+        return {'Total Companies': total, **stats}, counts
+    
+    @cached_check
+    def get_company_summary(self):
+        """Per-company aggregates behind the price, financial, corporate action and earnings checks"""
+        query = f"""
+        SELECT * FROM {self.company_summary_source()}
         ORDER BY symbol;
         """
-        df = pd.read_sql(query, self.conn)
-        
-        # Calculate completion percentages
-        completion_stats = {
-            'Total Companies': len(df),
-            'Long Name': f"{df['has_long_name'].sum()}/{len(df)} ({df['has_long_name'].mean()*100:.1f}%)",
-            'Sector': f"{df['has_sector'].sum()}/{len(df)} ({df['has_sector'].mean()*100:.1f}%)",
-            'Industry': f"{df['has_industry'].sum()}/{len(df)} ({df['has_industry'].mean()*100:.1f}%)",
-            'Country': f"{df['has_country'].sum()}/{len(df)} ({df['has_country'].mean()*100:.1f}%)",
-            'Exchange': f"{df['has_exchange'].sum()}/{len(df)} ({df['has_exchange'].mean()*100:.1f}%)",
-            'Website': f"{df['has_website'].sum()}/{len(df)} ({df['has_website'].mean()*100:.1f}%)",
-            'Employees': f"{df['has_employees'].sum()}/{len(df)} ({df['has_employees'].mean()*100:.1f}%)",
-            'Business Summary': f"{df['has_summary'].sum()}/{len(df)} ({df['has_summary'].mean()*100:.1f}%)"
-        }
-        
-        return completion_stats, df
+        return self.fetch_frame(query, server_side=True)
     
-    def check_price_history_completeness(self):
-        """Check price history data completeness"""
-        query = """
+    def company_summary_source(self):
+        """mv_companies_summary when it has been created, else the live summary query"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT to_regclass('mv_companies_summary')")
+        has_view = cursor.fetchone()[0] is not None
+        cursor.close()
+        return "mv_companies_summary" if has_view else f"({COMPANY_SUMMARY_QUERY}) s"
+    
+    @cached_check
+    def get_company_totals(self):
+        """Report-level totals over the company summary, counted by Postgres"""
+        query = f"""
         SELECT 
-            c.symbol,
-            COUNT(ph.id) as price_records,
-            MIN(ph.date) as earliest_date,
-            MAX(ph.date) as latest_date,
-            COUNT(CASE WHEN ph.volume > 0 THEN 1 END) as days_with_volume,
-            COUNT(CASE WHEN ph.dividends > 0 THEN 1 END) as dividend_days,
-            COUNT(CASE WHEN ph.stock_splits > 0 THEN 1 END) as split_days
-        FROM companies c
-        LEFT JOIN price_history ph ON c.id = ph.company_id
-        GROUP BY c.id, c.symbol
-        ORDER BY price_records DESC;
+            COUNT(*) as total_companies,
+            COUNT(*) FILTER (WHERE price_records > 0) as companies_with_prices,
+            AVG(price_records)::float8 as avg_price_records,
+            MIN(earliest_date) as earliest_price_date,
+            MAX(latest_date) as latest_price_date,
+            COUNT(*) FILTER (WHERE dividend_days > 0) as companies_with_dividend_days,
+            COUNT(*) FILTER (WHERE split_days > 0) as companies_with_split_days,
+            COUNT(*) FILTER (WHERE annual_income_statements > 0) as companies_with_annual,
+            COUNT(*) FILTER (WHERE quarterly_income_statements > 0) as companies_with_quarterly,
+            AVG(annual_income_statements)::float8 as avg_annual_periods,
+            AVG(quarterly_income_statements)::float8 as avg_quarterly_periods,
+            MAX(latest_annual_report) as latest_annual_report,
+            MAX(latest_quarterly_report) as latest_quarterly_report,
+            COUNT(*) FILTER (WHERE dividend_records > 0) as companies_with_dividends,
+            COUNT(*) FILTER (WHERE split_records > 0) as companies_with_splits,
+            COALESCE(SUM(dividend_records), 0)::bigint as total_dividends,
+            COALESCE(SUM(split_records), 0)::bigint as total_splits,
+            COUNT(*) FILTER (WHERE earnings_records > 0) as companies_with_earnings,
+            COALESCE(SUM(earnings_records), 0)::bigint as total_earnings_records
+        FROM {self.company_summary_source()};
         """
-        return pd.read_sql(query, self.conn)
+        cursor = self.conn.cursor()
+        cursor.execute(query)
+        totals = dict(zip((column.name for column in cursor.description), cursor.fetchone()))
+        cursor.close()
+        return totals
+    
+    def check_price_history_completeness(self):
+        """Check price history data completeness"""
+        summary = self.get_company_summary()[PRICE_HISTORY_COLUMNS]
+        return summary.sort_values('price_records', ascending=False, kind='stable').reset_index(drop=True)
     
     def check_financial_statements_completeness(self):
         """Check financial statements data completeness"""
-        query = """
-        SELECT 
-            c.symbol,
-            COUNT(DISTINCT i.period_ending) FILTER (WHERE i.period_type = 'annual') as annual_income_statements,
-            COUNT(DISTINCT i.period_ending) FILTER (WHERE i.period_type = 'quarterly') as quarterly_income_statements,
-            COUNT(DISTINCT b.period_ending) FILTER (WHERE b.period_type = 'annual') as annual_balance_sheets,
-            COUNT(DISTINCT b.period_ending) FILTER (WHERE b.period_type = 'quarterly') as quarterly_balance_sheets,
-            COUNT(DISTINCT cf.period_ending) FILTER (WHERE cf.period_type = 'annual') as annual_cashflow,
-            COUNT(DISTINCT cf.period_ending) FILTER (WHERE cf.period_type = 'quarterly') as quarterly_cashflow,
-            MAX(i.period_ending) FILTER (WHERE i.period_type = 'annual') as latest_annual_report,
-            MAX(i.period_ending) FILTER (WHERE i.period_type = 'quarterly') as latest_quarterly_report
-        FROM companies c
-        LEFT JOIN income_statements i ON c.id = i.company_id
-        LEFT JOIN balance_sheets b ON c.id = b.company_id
-        LEFT JOIN cash_flow_statements cf ON c.id = cf.company_id
-        GROUP BY c.id, c.symbol
-        ORDER BY c.symbol;
-        """
-        return pd.read_sql(query, self.conn)
+        return self.get_company_summary()[FINANCIAL_STATEMENT_COLUMNS]
     
+    @cached_check
     def check_company_metrics_completeness(self):
         """Check company metrics data completeness"""
-        query = """
-        SELECT 
-            c.symbol,
-            CASE WHEN cm.market_cap IS NOT NULL THEN 1 ELSE 0 END as has_market_cap,
-            CASE WHEN cm.trailing_pe IS NOT NULL THEN 1 ELSE 0 END as has_pe_ratio,
-            CASE WHEN cm.dividend_yield IS NOT NULL THEN 1 ELSE 0 END as has_dividend_yield,
-            CASE WHEN cm.beta IS NOT NULL THEN 1 ELSE 0 END as has_beta,
-            CASE WHEN cm.book_value IS NOT NULL THEN 1 ELSE 0 END as has_book_value,
-            CASE WHEN cm.fifty_two_week_high IS NOT NULL THEN 1 ELSE 0 END as has_52w_high,
-            CASE WHEN cm.fifty_two_week_low IS NOT NULL THEN 1 ELSE 0 END as has_52w_low,
-            CASE WHEN cm.total_revenue IS NOT NULL THEN 1 ELSE 0 END as has_revenue,
-            CASE WHEN cm.operating_cashflow IS NOT NULL THEN 1 ELSE 0 END as has_operating_cf,
-            CASE WHEN cm.free_cashflow IS NOT NULL THEN 1 ELSE 0 END as has_free_cf
-        FROM companies c
-        LEFT JOIN company_metrics cm ON c.id = cm.company_id
-        ORDER BY c.symbol;
-        """
-        df = pd.read_sql(query, self.conn)
-        
-        metrics_stats = {
-            'Market Cap': f"{df['has_market_cap'].sum()}/{len(df)} ({df['has_market_cap'].mean()*100:.1f}%)",
-            'P/E Ratio': f"{df['has_pe_ratio'].sum()}/{len(df)} ({df['has_pe_ratio'].mean()*100:.1f}%)",
-            'Dividend Yield': f"{df['has_dividend_yield'].sum()}/{len(df)} ({df['has_dividend_yield'].mean()*100:.1f}%)",
-            'Beta': f"{df['has_beta'].sum()}/{len(df)} ({df['has_beta'].mean()*100:.1f}%)",
-            'Book Value': f"{df['has_book_value'].sum()}/{len(df)} ({df['has_book_value'].mean()*100:.1f}%)",
-            '52W High': f"{df['has_52w_high'].sum()}/{len(df)} ({df['has_52w_high'].mean()*100:.1f}%)",
-            '52W Low': f"{df['has_52w_low'].sum()}/{len(df)} ({df['has_52w_low'].mean()*100:.1f}%)",
-            'Revenue': f"{df['has_revenue'].sum()}/{len(df)} ({df['has_revenue'].mean()*100:.1f}%)",
-            'Operating CF': f"{df['has_operating_cf'].sum()}/{len(df)} ({df['has_operating_cf'].mean()*100:.1f}%)",
-            'Free CF': f"{df['has_free_cf'].sum()}/{len(df)} ({df['has_free_cf'].mean()*100:.1f}%)"
-        }
-        
-        return metrics_stats, df
+        _, metrics_stats, counts = self.count_filled_fields(
+            "FROM companies c LEFT JOIN company_metrics cm ON c.id = cm.company_id", METRIC_FIELDS
+        )
+        return metrics_stats, counts
     
     def check_corporate_actions_completeness(self):
         """Check corporate actions data completeness"""
-        query = """
-        SELECT 
-            c.symbol,
-            COUNT(ca.id) FILTER (WHERE ca.action_type = 'dividend') as dividend_records,
-            COUNT(ca.id) FILTER (WHERE ca.action_type = 'stock_split') as split_records,
-            MAX(ca.action_date) FILTER (WHERE ca.action_type = 'dividend') as last_dividend,
-            MAX(ca.action_date) FILTER (WHERE ca.action_type = 'stock_split') as last_split
-        FROM companies c
-        LEFT JOIN corporate_actions ca ON c.id = ca.company_id
-        GROUP BY c.id, c.symbol
-        ORDER BY c.symbol;
-        """
-        return pd.read_sql(query, self.conn)
+        return self.get_company_summary()[CORPORATE_ACTION_COLUMNS]
     
     def check_earnings_data_completeness(self):
         """Check earnings data completeness"""
-        query = """
-        SELECT 
-            c.symbol,
-            COUNT(e.id) as earnings_records,
-            COUNT(CASE WHEN e.reported_eps IS NOT NULL THEN 1 END) as reported_eps_count,
-            COUNT(CASE WHEN e.eps_estimate IS NOT NULL THEN 1 END) as eps_estimate_count,
-            COUNT(CASE WHEN e.surprise_percent IS NOT NULL THEN 1 END) as surprise_count,
-            MAX(e.earnings_date) as latest_earnings_date
-        FROM companies c
-        LEFT JOIN earnings e ON c.id = e.company_id
-        GROUP BY c.id, c.symbol
-        ORDER BY c.symbol;
-        """
-        return pd.read_sql(query, self.conn)
+        return self.get_company_summary()[EARNINGS_COLUMNS]
     
+    @cached_check
     def find_data_gaps(self):
         """Identify major data gaps"""
         gaps = {}
@@ -239,26 +445,23 @@ class DataCompletenessChecker:
         # Companies without price history
         query1 = """
         SELECT c.symbol FROM companies c
-        LEFT JOIN price_history ph ON c.id = ph.company_id
-        WHERE ph.id IS NULL;
+        WHERE NOT EXISTS (SELECT 1 FROM price_history ph WHERE ph.company_id = c.id);
         """
-        gaps['no_price_history'] = pd.read_sql(query1, self.conn)['symbol'].tolist()
+        gaps['no_price_history'] = self.fetch_symbols(query1)
         
         # Companies without metrics
         query2 = """
         SELECT c.symbol FROM companies c
-        LEFT JOIN company_metrics cm ON c.id = cm.company_id
-        WHERE cm.id IS NULL;
+        WHERE NOT EXISTS (SELECT 1 FROM company_metrics cm WHERE cm.company_id = c.id);
         """
-        gaps['no_metrics'] = pd.read_sql(query2, self.conn)['symbol'].tolist()
+        gaps['no_metrics'] = self.fetch_symbols(query2)
         
         # Companies without financial statements
         query3 = """
         SELECT c.symbol FROM companies c
-        LEFT JOIN income_statements i ON c.id = i.company_id
-        WHERE i.id IS NULL;
+        WHERE NOT EXISTS (SELECT 1 FROM income_statements i WHERE i.company_id = c.id);
         """
-        gaps['no_financials'] = pd.read_sql(query3, self.conn)['symbol'].tolist()
+        gaps['no_financials'] = self.fetch_symbols(query3)
         
         # Companies with old price data (older than 30 days)
         query4 = """
@@ -269,146 +472,168 @@ class DataCompletenessChecker:
         HAVING MAX(ph.date) < CURRENT_DATE - INTERVAL '30 days'
         ORDER BY latest_price_date;
         """
-        stale_data = pd.read_sql(query4, self.conn)
-        gaps['stale_price_data'] = stale_data.to_dict('records')
+        cursor = self.conn.cursor(name='completeness_cur')
+        cursor.itersize = FETCH_ROWS
+        cursor.execute(query4)
+        gaps['stale_price_data'] = [
+            {'symbol': symbol, 'latest_price_date': latest_price_date}
+            for symbol, latest_price_date in cursor
+        ]
+        cursor.close()
         
         return gaps
     
+    def run_on_pooled_connection(self, check):
+        """Run a check method on its own pooled connection, sharing this checker's cache"""
+        pool = get_connection_pool()
+        conn = pool.getconn()
+        try:
+            worker = copy.copy(self)
+            worker.conn = conn
+            return check(worker)
+        finally:
+            if not conn.closed:
+                conn.rollback()
+            pool.putconn(conn)
+    
+    def prefetch_checks(self):
+        """
+        Run the independent report queries concurrently, one pooled
+        connection each, so the report waits for the slowest query rather
+        than the sum of them. The results land in the check cache.
+        """
+        with ThreadPoolExecutor(max_workers=len(REPORT_CHECKS)) as executor:
+            list(executor.map(self.run_on_pooled_connection, REPORT_CHECKS))
+    
     def generate_comprehensive_report(self):
         """Generate comprehensive data completeness report"""
-        print("=" * 80)
-        print("📊 COMPREHENSIVE DATA COMPLETENESS ANALYSIS")
-        print("=" * 80)
-        print(f"🕒 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print()
+        self.prefetch_checks()
+        # one write for the whole report instead of a print() per line
+        sys.stdout.write("\n".join(self.report_lines()) + "\n")
+    
+    def report_lines(self):
+        """Yield the report line by line so callers can stream it as each section is formatted"""
+        yield "=" * 80
+        yield "📊 COMPREHENSIVE DATA COMPLETENESS ANALYSIS"
+        yield "=" * 80
+        yield f"🕒 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        yield ""
         
         # 1. Overall statistics
-        print("📈 OVERALL DATABASE STATISTICS")
-        print("-" * 50)
+        yield "📈 OVERALL DATABASE STATISTICS"
+        yield "-" * 50
         overall_stats = self.get_overall_statistics()
-        for _, row in overall_stats.iterrows():
-            print(f"{row['table_name']:<20} {row['total_records']:>8} records  {row['unique_symbols']:>3} companies")
-        print()
+        for row in overall_stats.itertuples(index=False):
+            yield OVERALL_ROW_FORMAT(*row)
+        yield ""
         
         # 2. Basic company info completeness
-        print("🏢 BASIC COMPANY INFORMATION COMPLETENESS")
-        print("-" * 50)
+        yield "🏢 BASIC COMPANY INFORMATION COMPLETENESS"
+        yield "-" * 50
         basic_stats, _ = self.check_company_basic_info_completeness()
         for field, stats in basic_stats.items():
-            print(f"{field:<20} {stats}")
-        print()
+            yield BASIC_INFO_ROW_FORMAT(field, stats)
+        yield ""
+        
+        totals = self.get_company_totals()
+        total_companies = totals['total_companies']
         
         # 3. Price history completeness
-        print("💹 PRICE HISTORY DATA ANALYSIS")
-        print("-" * 50)
-        price_stats = self.check_price_history_completeness()
-        total_companies = len(price_stats)
-        companies_with_data = len(price_stats[price_stats['price_records'] > 0])
-        avg_records = price_stats['price_records'].mean()
+        yield "💹 PRICE HISTORY DATA ANALYSIS"
+        yield "-" * 50
+        companies_with_data = totals['companies_with_prices']
         
-        print(f"Companies with price data: {companies_with_data}/{total_companies} ({companies_with_data/total_companies*100:.1f}%)")
-        print(f"Average price records per company: {avg_records:.0f}")
+        yield f"Companies with price data: {companies_with_data}/{total_companies} ({companies_with_data/total_companies*100:.1f}%)"
+        yield f"Average price records per company: {totals['avg_price_records']:.0f}"
         
         # Handle date range safely
-        earliest_dates = price_stats['earliest_date'].dropna()
-        latest_dates = price_stats['latest_date'].dropna()
-        if not earliest_dates.empty and not latest_dates.empty:
-            print(f"Date range: {earliest_dates.min()} to {latest_dates.max()}")
+        if totals['earliest_price_date'] is not None and totals['latest_price_date'] is not None:
+            yield f"Date range: {totals['earliest_price_date']} to {totals['latest_price_date']}"
         else:
-            print("Date range: No valid dates found")
+            yield "Date range: No valid dates found"
             
-        print(f"Companies with dividend data: {len(price_stats[price_stats['dividend_days'] > 0])}")
-        print(f"Companies with stock split data: {len(price_stats[price_stats['split_days'] > 0])}")
-        print()
+        yield f"Companies with dividend data: {totals['companies_with_dividend_days']}"
+        yield f"Companies with stock split data: {totals['companies_with_split_days']}"
+        yield ""
         
         # 4. Financial statements completeness
-        print("📊 FINANCIAL STATEMENTS COMPLETENESS")
-        print("-" * 50)
-        financial_stats = self.check_financial_statements_completeness()
-        companies_with_annual = len(financial_stats[financial_stats['annual_income_statements'] > 0])
-        companies_with_quarterly = len(financial_stats[financial_stats['quarterly_income_statements'] > 0])
-        avg_annual_years = financial_stats['annual_income_statements'].mean()
-        avg_quarterly_periods = financial_stats['quarterly_income_statements'].mean()
-        
-        print(f"Companies with annual financials: {companies_with_annual}/{total_companies} ({companies_with_annual/total_companies*100:.1f}%)")
-        print(f"Companies with quarterly financials: {companies_with_quarterly}/{total_companies} ({companies_with_quarterly/total_companies*100:.1f}%)")
-        print(f"Average annual periods per company: {avg_annual_years:.1f}")
-        print(f"Average quarterly periods per company: {avg_quarterly_periods:.1f}")
-        
-        if not financial_stats['latest_annual_report'].isna().all():
-            latest_annual = financial_stats['latest_annual_report'].max()
-            print(f"Latest annual report date: {latest_annual}")
-        if not financial_stats['latest_quarterly_report'].isna().all():
-            latest_quarterly = financial_stats['latest_quarterly_report'].max()
-            print(f"Latest quarterly report date: {latest_quarterly}")
-        print()
+        yield "📊 FINANCIAL STATEMENTS COMPLETENESS"
+        yield "-" * 50
+        companies_with_annual = totals['companies_with_annual']
+        companies_with_quarterly = totals['companies_with_quarterly']
+        
+        yield f"Companies with annual financials: {companies_with_annual}/{total_companies} ({companies_with_annual/total_companies*100:.1f}%)"
+        yield f"Companies with quarterly financials: {companies_with_quarterly}/{total_companies} ({companies_with_quarterly/total_companies*100:.1f}%)"
+        yield f"Average annual periods per company: {totals['avg_annual_periods']:.1f}"
+        yield f"Average quarterly periods per company: {totals['avg_quarterly_periods']:.1f}"
+        
+        if totals['latest_annual_report'] is not None:
+            yield f"Latest annual report date: {totals['latest_annual_report']}"
+        if totals['latest_quarterly_report'] is not None:
+            yield f"Latest quarterly report date: {totals['latest_quarterly_report']}"
+        yield ""
         
         # 5. Company metrics completeness
-        print("🔢 COMPANY METRICS COMPLETENESS")
-        print("-" * 50)
+        yield "🔢 COMPANY METRICS COMPLETENESS"
+        yield "-" * 50
         metrics_stats, _ = self.check_company_metrics_completeness()
         for metric, stats in metrics_stats.items():
-            print(f"{metric:<15} {stats}")
-        print()
+            yield METRIC_ROW_FORMAT(metric, stats)
+        yield ""
         
         # 6. Corporate actions completeness
-        print("📋 CORPORATE ACTIONS ANALYSIS")
-        print("-" * 50)
-        actions_stats = self.check_corporate_actions_completeness()
-        companies_with_dividends = len(actions_stats[actions_stats['dividend_records'] > 0])
-        companies_with_splits = len(actions_stats[actions_stats['split_records'] > 0])
-        total_dividends = actions_stats['dividend_records'].sum()
-        total_splits = actions_stats['split_records'].sum()
-        
-        print(f"Companies with dividend history: {companies_with_dividends}/{total_companies} ({companies_with_dividends/total_companies*100:.1f}%)")
-        print(f"Companies with stock split history: {companies_with_splits}/{total_companies} ({companies_with_splits/total_companies*100:.1f}%)")
-        print(f"Total dividend records: {total_dividends}")
-        print(f"Total stock split records: {total_splits}")
-        print()
+        yield "📋 CORPORATE ACTIONS ANALYSIS"
+        yield "-" * 50
+        companies_with_dividends = totals['companies_with_dividends']
+        companies_with_splits = totals['companies_with_splits']
+        
+        yield f"Companies with dividend history: {companies_with_dividends}/{total_companies} ({companies_with_dividends/total_companies*100:.1f}%)"
+        yield f"Companies with stock split history: {companies_with_splits}/{total_companies} ({companies_with_splits/total_companies*100:.1f}%)"
+        yield f"Total dividend records: {totals['total_dividends']}"
+        yield f"Total stock split records: {totals['total_splits']}"
+        yield ""
         
         # 7. Earnings data completeness
-        print("📈 EARNINGS DATA ANALYSIS")
-        print("-" * 50)
-        earnings_stats = self.check_earnings_data_completeness()
-        companies_with_earnings = len(earnings_stats[earnings_stats['earnings_records'] > 0])
-        total_earnings_records = earnings_stats['earnings_records'].sum()
+        yield "📈 EARNINGS DATA ANALYSIS"
+        yield "-" * 50
+        companies_with_earnings = totals['companies_with_earnings']
         
-        print(f"Companies with earnings data: {companies_with_earnings}/{total_companies} ({companies_with_earnings/total_companies*100:.1f}%)")
-        print(f"Total earnings records: {total_earnings_records}")
-        print()
+        yield f"Companies with earnings data: {companies_with_earnings}/{total_companies} ({companies_with_earnings/total_companies*100:.1f}%)"
+        yield f"Total earnings records: {totals['total_earnings_records']}"
+        yield ""
         
         # 8. Data gaps analysis
-        print("🚨 DATA GAPS IDENTIFIED")
-        print("-" * 50)
+        yield "🚨 DATA GAPS IDENTIFIED"
+        yield "-" * 50
         gaps = self.find_data_gaps()
         
         if gaps['no_price_history']:
-            print(f"❌ Companies without price history: {len(gaps['no_price_history'])}")
+            yield f"❌ Companies without price history: {len(gaps['no_price_history'])}"
             if len(gaps['no_price_history']) <= 10:
-                print(f"   {', '.join(gaps['no_price_history'])}")
+                yield f"   {', '.join(gaps['no_price_history'])}"
         
         if gaps['no_metrics']:
-            print(f"❌ Companies without metrics: {len(gaps['no_metrics'])}")
+            yield f"❌ Companies without metrics: {len(gaps['no_metrics'])}"
             if len(gaps['no_metrics']) <= 10:
-                print(f"   {', '.join(gaps['no_metrics'])}")
+                yield f"   {', '.join(gaps['no_metrics'])}"
         
         if gaps['no_financials']:
-            print(f"❌ Companies without financial statements: {len(gaps['no_financials'])}")
+            yield f"❌ Companies without financial statements: {len(gaps['no_financials'])}"
             if len(gaps['no_financials']) <= 10:
-                print(f"   {', '.join(gaps['no_financials'])}")
+                yield f"   {', '.join(gaps['no_financials'])}"
         
         if gaps['stale_price_data']:
-            print(f"⚠️ Companies with stale price data (>30 days old): {len(gaps['stale_price_data'])}")
+            yield f"⚠️ Companies with stale price data (>30 days old): {len(gaps['stale_price_data'])}"
             for item in gaps['stale_price_data'][:5]:
-                print(f"   {item['symbol']}: {item['latest_price_date']}")
+                yield f"   {item['symbol']}: {item['latest_price_date']}"
             if len(gaps['stale_price_data']) > 5:
-                print(f"   ... and {len(gaps['stale_price_data']) - 5} more")
+                yield f"   ... and {len(gaps['stale_price_data']) - 5} more"
         
-        print()
+        yield ""
         
         # 9. Data quality score
-        print("🏆 OVERALL DATA QUALITY SCORE")
-        print("-" * 50)
+        yield "🏆 OVERALL DATA QUALITY SCORE"
+        yield "-" * 50
         
         # Calculate weighted quality score
         basic_info_score = (companies_with_data / total_companies) * 0.2
@@ -418,29 +643,43 @@ class DataCompletenessChecker:
         
         overall_score = (basic_info_score + price_data_score + financial_score + metrics_score) * 100
         
-        print(f"Basic Information Score: {basic_info_score*100:.1f}%")
-        print(f"Price Data Score: {price_data_score*100:.1f}%")
-        print(f"Financial Statements Score: {financial_score*100:.1f}%")
-        print(f"Metrics Score: {metrics_score*100:.1f}%")
-        print(f"OVERALL DATA QUALITY: {overall_score:.1f}%")
+        yield f"Basic Information Score: {basic_info_score*100:.1f}%"
+        yield f"Price Data Score: {price_data_score*100:.1f}%"
+        yield f"Financial Statements Score: {financial_score*100:.1f}%"
+        yield f"Metrics Score: {metrics_score*100:.1f}%"
+        yield f"OVERALL DATA QUALITY: {overall_score:.1f}%"
         
         if overall_score >= 80:
-            print("✅ EXCELLENT data completeness!")
+            yield "✅ EXCELLENT data completeness!"
         elif overall_score >= 60:
-            print("✅ GOOD data completeness")
+            yield "✅ GOOD data completeness"
         elif overall_score >= 40:
-            print("⚠️ FAIR data completeness - some gaps identified")
+            yield "⚠️ FAIR data completeness - some gaps identified"
         else:
-            print("❌ POOR data completeness - significant gaps need attention")
+            yield "❌ POOR data completeness - significant gaps need attention"
         
-        print("=" * 80)
+        yield "=" * 80
     
     def close(self):
-        """Close database connection"""
-        self.conn.close()
+        """Return the database connection to the pool unless it was passed in"""
+        if not self.owns_conn:
+            return
+        if not self.conn.closed:
+            self.conn.rollback()
+        get_connection_pool().putconn(self.conn)
+
+# Independent queries behind generate_comprehensive_report, prefetched in parallel
+REPORT_CHECKS = [
+    DataCompletenessChecker.get_overall_statistics,
+    DataCompletenessChecker.check_company_basic_info_completeness,
+    DataCompletenessChecker.get_company_totals,
+    DataCompletenessChecker.check_company_metrics_completeness,
+    DataCompletenessChecker.find_data_gaps,
+]
 
 # Run the completeness check
 if __name__ == "__main__":
-    checker = DataCompletenessChecker()
+    # --no-cache skips the on-disk results cache
+    checker = DataCompletenessChecker(use_cache='--no-cache' not in sys.argv)
     checker.generate_comprehensive_report()
     checker.close()
@@ -7,14 +7,107 @@ Regular maintenance tasks to keep data quality high
 
 import psycopg2
 from datetime import datetime, timedelta
-from database_config import get_db_connection
+from database_config import get_connection_pool
 import logging
 
+# Fixed validation and metrics queries, prepared once per database session
+# so daily runs skip parse and planning: name -> statement
+PREPARED_STATEMENTS = {
+    'check_balance_imbalances': """
+    SELECT COUNT(*) 
+    FROM balance_sheets
+    WHERE total_assets IS NOT NULL 
+      AND total_liabilities IS NOT NULL 
+      AND stockholders_equity IS NOT NULL
+      AND ABS(total_assets - (total_liabilities + stockholders_equity)) > 1000000
+      AND updated_at >= CURRENT_DATE - INTERVAL '1 day'
+    """,
+    'check_missing_prices': """
+    SELECT COUNT(DISTINCT c.id)
+    FROM companies c
+    LEFT JOIN price_history ph ON c.id = ph.company_id 
+        AND ph.date >= CURRENT_DATE - INTERVAL '7 days'
+    WHERE ph.company_id IS NULL
+    """,
+    'check_duplicate_prices': """
+    SELECT COUNT(*)
+    FROM (
+        SELECT company_id, date, COUNT(*) 
+        FROM price_history 
+        GROUP BY company_id, date 
+        HAVING COUNT(*) > 1
+    ) duplicates
+    """,
+    'quality_metrics': """
+    WITH c AS (
+        SELECT COUNT(*) as total_companies FROM companies
+    ),
+    p AS (
+        SELECT 
+            COUNT(DISTINCT company_id) as companies_with_prices,
+            COUNT(*) FILTER (WHERE high_price < low_price OR open_price < 0 OR high_price < 0 
+                               OR low_price < 0 OR close_price < 0) as price_issues
+        FROM price_history
+    ),
+    b AS (
+        SELECT 
+            COUNT(DISTINCT company_id) as companies_with_financials,
+            COUNT(*) FILTER (WHERE total_assets IS NOT NULL AND total_liabilities IS NOT NULL 
+                               AND stockholders_equity IS NOT NULL
+                               AND ABS(total_assets - (total_liabilities + stockholders_equity)) > 1000000) as imbalances
+        FROM balance_sheets
+    )
+    SELECT c.total_companies, p.companies_with_prices, b.companies_with_financials,
+           b.imbalances, p.price_issues
+    FROM c, p, b
+    """,
+}
+
+# Partial indexes holding only the rows the daily checks and fixes look
+# for, so they touch the violations instead of scanning whole tables:
+# name -> definition
+QUALITY_INDEXES = {
+    'idx_balance_sheets_imbalance': """
+    ON balance_sheets (updated_at)
+    WHERE total_assets IS NOT NULL 
+      AND total_liabilities IS NOT NULL 
+      AND stockholders_equity IS NOT NULL
+      AND ABS(total_assets - (total_liabilities + stockholders_equity)) > 1000000
+    """,
+    'idx_price_history_price_issues': """
+    ON price_history (id)
+    WHERE high_price < low_price OR open_price < 0 OR high_price < 0 
+       OR low_price < 0 OR close_price < 0
+    """,
+    'idx_price_history_missing_volume': """
+    ON price_history (company_id)
+    WHERE volume IS NULL OR volume = 0
+    """,
+    'idx_price_history_extreme_moves': """
+    ON price_history (company_id)
+    WHERE open_price > 0 
+      AND ABS((close_price - open_price) / open_price) > 0.9
+    """,
+    'idx_balance_sheets_negative_equity': """
+    ON balance_sheets (company_id)
+    WHERE stockholders_equity < 0
+    """,
+}
+
+# Materialized views read by the checkers, each created by its own .sql file
+SUMMARY_VIEWS = (
+    'mv_companies_summary',     # companies_summary_view.sql
+    'mv_db_health_summary',     # db_health_summary_view.sql
+)
+
 class DataQualityMaintenance:
-    def __init__(self):
-        self.conn = get_db_connection()
+    def __init__(self, conn=None):
+        # a caller may share its own connection; otherwise check one out
+        self.owns_conn = conn is None
+        self.conn = get_connection_pool().getconn() if conn is None else conn
         self.cursor = self.conn.cursor()
         self.setup_logging()
+        self.prepare_statements()
         
     def setup_logging(self):
         logging.basicConfig(
@@ -23,6 +116,42 @@ class DataQualityMaintenance:
         )
         self.logger = logging.getLogger(__name__)
     
+    def prepare_statements(self):
+        """PREPARE the fixed queries this session has not prepared yet"""
+        # pooled connections keep statements prepared by an earlier instance
+        self.cursor.execute("SELECT name FROM pg_prepared_statements")
+        prepared = {name for (name,) in self.cursor.fetchall()}
+        for name, statement in PREPARED_STATEMENTS.items():
+            if name not in prepared:
+                self.cursor.execute(f"PREPARE {name} AS {statement}")
+    
+    def ensure_quality_indexes(self):
+        """Build any missing partial index from QUALITY_INDEXES without blocking writers"""
+        # resolve each name the way the unqualified DROP/CREATE below will,
+        # so a same-named index in another schema does not count
+        self.cursor.execute("""
+            SELECT name
+            FROM unnest(%s::text[]) AS name
+            JOIN pg_index i ON i.indexrelid = to_regclass(name)
+            WHERE i.indisvalid
+        """, (list(QUALITY_INDEXES),))
+        existing = {name for (name,) in self.cursor.fetchall()}
+        missing = [name for name in QUALITY_INDEXES if name not in existing]
+        if not missing:
+            return
+        
+        # CONCURRENTLY cannot run inside a transaction block
+        self.conn.commit()
+        self.conn.autocommit = True
+        try:
+            for name in missing:
+                self.logger.info(f"Creating partial index {name}")
+                # clear an invalid leftover from an interrupted build
+                self.cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                self.cursor.execute(f"CREATE INDEX CONCURRENTLY {name} {QUALITY_INDEXES[name]}")
+        finally:
+            self.conn.autocommit = False
+    
     def daily_data_validation(self):
         """Run daily data validation checks"""
         print("🔍 DAILY DATA VALIDATION")
@@ -31,43 +160,21 @@ class DataQualityMaintenance:
         issues = []
         
         # Check for new balance sheet imbalances
-        self.cursor.execute("""
-            SELECT COUNT(*) 
-            FROM balance_sheets
-            WHERE total_assets IS NOT NULL 
-              AND total_liabilities IS NOT NULL 
-              AND stockholders_equity IS NOT NULL
-              AND ABS(total_assets - (total_liabilities + stockholders_equity)) > 1000000
-              AND updated_at >= CURRENT_DATE - INTERVAL '1 day'
-        """)
+        self.cursor.execute("EXECUTE check_balance_imbalances")
         new_imbalances = self.cursor.fetchone()[0]
         
         if new_imbalances > 0:
             issues.append(f"⚠️ {new_imbalances} new balance sheet imbalances")
         
         # Check for missing recent price data
-        self.cursor.execute("""
-            SELECT COUNT(DISTINCT c.id)
-            FROM companies c
-            LEFT JOIN price_history ph ON c.id = ph.company_id 
-                AND ph.date >= CURRENT_DATE - INTERVAL '7 days'
-            WHERE ph.company_id IS NULL
-        """)
+        self.cursor.execute("EXECUTE check_missing_prices")
         missing_prices = self.cursor.fetchone()[0]
         
         if missing_prices > 10:  # More than 10 companies missing recent data
             issues.append(f"⚠️ {missing_prices} companies missing recent price data")
         
         # Check for duplicate records
-        self.cursor.execute("""
-            SELECT COUNT(*)
-            FROM (
-                SELECT company_id, date, COUNT(*) 
-                FROM price_history 
-                GROUP BY company_id, date 
-                HAVING COUNT(*) > 1
-            ) duplicates
-        """)
+        self.cursor.execute("EXECUTE check_duplicate_prices")
         duplicate_prices = self.cursor.fetchone()[0]
         
         if duplicate_prices > 0:
@@ -89,8 +196,10 @@ class DataQualityMaintenance:
         
         fixed_count = 0
         
-        # Fix obvious high/low price swaps
+        # Serialize overlapping runs for the rest of the transaction, then
+        # fix obvious high/low price swaps in the same round trip
         self.cursor.execute("""
+            SELECT pg_advisory_xact_lock(hashtext('dq_maintenance'));
             UPDATE price_history 
             SET high_price = low_price, low_price = high_price
             WHERE high_price < low_price 
@@ -99,28 +208,39 @@ class DataQualityMaintenance:
         price_swaps = self.cursor.rowcount
         fixed_count += price_swaps
         
-        # Remove duplicate price records (keep latest)
+        # Remove duplicate price records (keep latest) and update working
+        # capital where missing but components exist, in one statement
         self.cursor.execute("""
-            DELETE FROM price_history 
-            WHERE id NOT IN (
-                SELECT MAX(id) 
-                FROM price_history 
-                GROUP BY company_id, date
+            WITH duplicates_removed AS (
+                DELETE FROM price_history p
+                USING (
+                    SELECT id
+                    FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY company_id, date ORDER BY id DESC
+                        ) as copy_number
+                        FROM price_history
+                    ) ranked
+                    WHERE copy_number > 1
+                ) duplicates
+                WHERE p.id = duplicates.id
+                RETURNING 1
+            ),
+            working_capital_fixed AS (
+                UPDATE balance_sheets 
+                SET working_capital = current_assets - current_liabilities,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE working_capital IS NULL 
+                  AND current_assets IS NOT NULL 
+                  AND current_liabilities IS NOT NULL
+                RETURNING 1
             )
+            SELECT 
+                (SELECT COUNT(*) FROM duplicates_removed),
+                (SELECT COUNT(*) FROM working_capital_fixed)
         """)
-        duplicates_removed = self.cursor.rowcount
+        duplicates_removed, working_capital_fixed = self.cursor.fetchone()
         fixed_count += duplicates_removed
-        
-        # Update working capital where missing but components exist
-        self.cursor.execute("""
-            UPDATE balance_sheets 
-            SET working_capital = current_assets - current_liabilities,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE working_capital IS NULL 
-              AND current_assets IS NOT NULL 
-              AND current_liabilities IS NOT NULL
-        """)
-        working_capital_fixed = self.cursor.rowcount
         fixed_count += working_capital_fixed
         
         if fixed_count > 0:
@@ -156,20 +276,21 @@ class DataQualityMaintenance:
             )
         """)
         
+        # One row per day: collapse days logged before the unique index existed
+        self.cursor.execute("SELECT to_regclass('idx_data_quality_metrics_check_date') IS NULL")
+        if self.cursor.fetchone()[0]:
+            self.cursor.execute("""
+                DELETE FROM data_quality_metrics m
+                USING data_quality_metrics newer
+                WHERE newer.check_date = m.check_date AND newer.id > m.id
+            """)
+            self.cursor.execute("""
+                CREATE UNIQUE INDEX idx_data_quality_metrics_check_date
+                ON data_quality_metrics (check_date)
+            """)
+        
         # Calculate current metrics
-        self.cursor.execute("""
-            SELECT 
-                (SELECT COUNT(*) FROM companies) as total_companies,
-                (SELECT COUNT(DISTINCT company_id) FROM price_history) as companies_with_prices,
-                (SELECT COUNT(DISTINCT company_id) FROM balance_sheets) as companies_with_financials,
-                (SELECT COUNT(*) FROM balance_sheets 
-                 WHERE total_assets IS NOT NULL AND total_liabilities IS NOT NULL 
-                   AND stockholders_equity IS NOT NULL
-                   AND ABS(total_assets - (total_liabilities + stockholders_equity)) > 1000000) as imbalances,
-                (SELECT COUNT(*) FROM price_history 
-                 WHERE high_price < low_price OR open_price < 0 OR high_price < 0 
-                   OR low_price < 0 OR close_price < 0) as price_issues
-        """)
+        self.cursor.execute("EXECUTE quality_metrics")
         
         metrics = self.cursor.fetchone()
         total_companies, with_prices, with_financials, imbalances, price_issues = metrics
@@ -182,12 +303,20 @@ class DataQualityMaintenance:
         
         overall_score = (price_coverage + financial_coverage + balance_quality + price_quality) / 4
         
-        # Insert metrics
+        # Record today's metrics, replacing an earlier run from the same day
         self.cursor.execute("""
             INSERT INTO data_quality_metrics (
-                total_companies, companies_with_prices, companies_with_financials,
+                check_date, total_companies, companies_with_prices, companies_with_financials,
                 balance_sheet_imbalances, price_data_issues, overall_quality_score
-            ) VALUES (%s, %s, %s, %s, %s, %s)
+            ) VALUES (CURRENT_DATE, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (check_date) DO UPDATE SET
+                total_companies = EXCLUDED.total_companies,
+                companies_with_prices = EXCLUDED.companies_with_prices,
+                companies_with_financials = EXCLUDED.companies_with_financials,
+                balance_sheet_imbalances = EXCLUDED.balance_sheet_imbalances,
+                price_data_issues = EXCLUDED.price_data_issues,
+                overall_quality_score = EXCLUDED.overall_quality_score,
+                created_at = CURRENT_TIMESTAMP
         """, (total_companies, with_prices, with_financials, imbalances, price_issues, overall_score))
         
         print(f"✅ Quality metrics updated:")
@@ -198,6 +327,16 @@ class DataQualityMaintenance:
         
         return overall_score
     
+    def refresh_summary_views(self):
+        """Refresh whichever of the SUMMARY_VIEWS have been created"""
+        for view in SUMMARY_VIEWS:
+            self.cursor.execute("SELECT to_regclass(%s)", (view,))
+            if self.cursor.fetchone()[0] is None:
+                continue
+            # CONCURRENTLY keeps the view readable while it is rebuilt
+            self.cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+            self.logger.info(f"Refreshed {view}")
+    
     def run_daily_maintenance(self):
         """Run daily maintenance routine"""
         print("🔄 DAILY DATA QUALITY MAINTENANCE")
@@ -205,6 +344,8 @@ class DataQualityMaintenance:
         print(f"⏰ Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         try:
+            self.ensure_quality_indexes()
+            
             # Step 1: Validate data
             is_healthy = self.daily_data_validation()
             
@@ -214,6 +355,9 @@ class DataQualityMaintenance:
             # Step 3: Update metrics
             quality_score = self.update_data_quality_metrics()
             
+            # Step 4: Refresh the checkers' summary views
+            self.refresh_summary_views()
+            
             # Commit changes
             self.conn.commit()
             
@@ -231,11 +375,11 @@ class DataQualityMaintenance:
             print(f"⏰ Completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     def close(self):
-        """Close database connection"""
+        """Return the database connection to the pool unless it was passed in"""
         if self.cursor:
             self.cursor.close()
-        if self.conn:
-            self.conn.close()
+        if self.conn and self.owns_conn:
+            get_connection_pool().putconn(self.conn)
 
 if __name__ == "__main__":
     maintenance = DataQualityMaintenance()
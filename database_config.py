@@ -1,8 +1,22 @@
 
 import os
-from typing import Dict
+import atexit
+import threading
+import weakref
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
 
-def get_database_config() -> Dict[str, str]:
+__all__ = [
+    'get_database_config',
+    'get_database_url',
+    'get_db_connection',
+    'get_connection_pool',
+    'PooledConnection',
+]
+
+@lru_cache(maxsize=1)
+def get_database_config() -> Mapping[str, str]:
     """
     Get database configuration from environment variables
     Configure your database by setting these environment variables:
@@ -14,15 +28,19 @@ def get_database_config() -> Dict[str, str]:
     
     For production, use Replit's PostgreSQL service which auto-configures these.
     For local development, set these in your .env file or Replit Secrets.
+
+    The environment is read once per process; the result is a read-only
+    mapping, so copy it with dict() before changing any key.
     """
-    return {
+    return MappingProxyType({
         'host': os.getenv('PGHOST', 'localhost'),
         'database': os.getenv('PGDATABASE', 'yfinance_db'),
         'user': os.getenv('PGUSER', 'postgres'),
         'password': os.getenv('PGPASSWORD', 'your_password_here'),
         'port': int(os.getenv('PGPORT', 5432))
-    }
+    })
 
+@lru_cache(maxsize=1)
 def get_database_url():
     """
     Get the database URL, prioritizing DATABASE_URL environment variable
@@ -31,15 +49,91 @@ def get_database_url():
 
 def get_db_connection():
     """
-    Get a database connection using psycopg2
+    Get a database connection from the shared pool. Calling close() on it
+    hands it back to the pool instead of disconnecting, and so does garbage
+    collection of a connection nobody closed. As with psycopg2, a with-block
+    only commits, or rolls back on error; it does not release the connection.
+    """
+    pool = get_connection_pool()
+    return PooledConnection(pool, pool.getconn())
+
+class PooledConnection:
+    """Pooled psycopg2 connection whose close() returns it to its pool"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        # return the slot even if the caller drops the connection unclosed
+        self._finalizer = weakref.finalize(self, _return_to_pool, pool, conn)
+        self._finalizer.atexit = False
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise AttributeError(f"connection already returned to the pool: {name}")
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        # settings such as autocommit or isolation_level belong to the real connection
+        if name in ('_pool', '_conn', '_finalizer'):
+            object.__setattr__(self, name, value)
+        elif self._conn is None:
+            raise AttributeError(f"connection already returned to the pool: {name}")
+        else:
+            setattr(self._conn, name, value)
+
+    @property
+    def closed(self):
+        return 1 if self._conn is None else self._conn.closed
+
+    def close(self):
+        if self._conn is not None:
+            self._conn = None
+            self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._conn is not None and not self._conn.closed:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+
+def _return_to_pool(pool, conn):
+    """Hand conn back to pool, unless the pool was already closed"""
+    if not pool.closed:
+        pool.putconn(conn)
+
+_connection_pool = None
+_connection_pool_pid = None
+_connection_pool_lock = threading.Lock()
+
+def get_connection_pool(minconn: int = 2, maxconn: int = 16):
+    """
+    Get the process-wide psycopg2 ThreadedConnectionPool, creating it on
+    first use. Take connections with pool.getconn() and hand them back with
+    pool.putconn(conn) so short-lived users reuse warm connections instead
+    of paying connect/auth on every call. A forked child builds its own
+    pool rather than sharing the parent's sockets.
     """
-    import psycopg2
-    database_url = get_database_url()
-    if database_url:
-        return psycopg2.connect(database_url)
-    else:
-        config = get_database_config()
-        return psycopg2.connect(**config)
+    global _connection_pool, _connection_pool_pid
+    with _connection_pool_lock:
+        if _connection_pool is None or _connection_pool.closed or _connection_pool_pid != os.getpid():
+            from psycopg2.pool import ThreadedConnectionPool
+            database_url = get_database_url()
+            if database_url:
+                _connection_pool = ThreadedConnectionPool(minconn, maxconn, database_url)
+            else:
+                _connection_pool = ThreadedConnectionPool(minconn, maxconn, **get_database_config())
+            _connection_pool_pid = os.getpid()
+        return _connection_pool
+
+@atexit.register
+def _close_connection_pool():
+    """Disconnect this process's pooled connections at interpreter exit"""
+    if _connection_pool is not None and not _connection_pool.closed and _connection_pool_pid == os.getpid():
+        _connection_pool.closeall()
 
 # For Replit PostgreSQL, these environment variables are automatically set:
 # DATABASE_URL, PGHOST, PGPORT, PGDATABASE, PGUSER, PGPASSWORD
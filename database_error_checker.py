@@ -5,375 +5,782 @@ Comprehensive Database Error and Accuracy Checker
 Validates data quality, consistency, and accuracy in the YFinance database
 """
 
-import psycopg2
-import pandas as pd
 import os
-from datetime import datetime, timedelta
-from database_config import get_database_config
+import sys
+import hashlib
+import json
+import shutil
+import stat
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+from dataclasses import dataclass
+from datetime import datetime, date
+from decimal import Decimal
+from database_config import get_connection_pool
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Per-user results cache; JSON so a planted entry cannot run code
+CACHE_DIR = os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'db_checker')
+
+# DB_CHECKER_APPROX=1 estimates the price_history issue counts from a block sample
+APPROX = os.getenv('DB_CHECKER_APPROX', '0') == '1'
+APPROX_SAMPLE_PERCENT = 1
+PRICE_SAMPLE = f"TABLESAMPLE SYSTEM ({APPROX_SAMPLE_PERCENT})" if APPROX else ""
+
+# Fixed check queries, PREPAREd once per connection and run with EXECUTE:
+# name -> statement
+PREPARED_STATEMENTS = {
+    'orphaned_price_history': """
+    SELECT COUNT(*) FROM price_history ph 
+    WHERE NOT EXISTS (SELECT 1 FROM companies c WHERE c.id = ph.company_id)
+    """,
+    'orphaned_company_metrics': """
+    SELECT COUNT(*) FROM company_metrics cm 
+    WHERE NOT EXISTS (SELECT 1 FROM companies c WHERE c.id = cm.company_id)
+    """,
+    'orphaned_income_statements': """
+    SELECT COUNT(*) FROM income_statements i 
+    WHERE NOT EXISTS (SELECT 1 FROM companies c WHERE c.id = i.company_id)
+    """,
+    'enforced_foreign_keys': """
+    SELECT con.conrelid::regclass::text
+    FROM pg_constraint con
+    JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = con.conkey[1]
+    WHERE con.contype = 'f' AND con.convalidated
+      AND con.confrelid = 'companies'::regclass
+      AND array_length(con.conkey, 1) = 1
+      AND a.attname = 'company_id'
+    """,
+    'price_issue_flags': """
+    SELECT EXISTS (SELECT 1 FROM price_history WHERE open_price < 0 OR high_price < 0 OR low_price < 0 OR close_price < 0),
+           EXISTS (SELECT 1 FROM price_history WHERE high_price < low_price),
+           EXISTS (SELECT 1 FROM price_history WHERE volume IS NULL OR volume = 0)
+    """,
+    'price_issue_counts': f"""
+    SELECT COUNT(*) FILTER (WHERE open_price < 0 OR high_price < 0 OR low_price < 0 OR close_price < 0),
+           COUNT(DISTINCT company_id) FILTER (WHERE open_price < 0 OR high_price < 0 OR low_price < 0 OR close_price < 0),
+           COUNT(*) FILTER (WHERE high_price < low_price),
+           COUNT(DISTINCT company_id) FILTER (WHERE high_price < low_price),
+           COUNT(*) FILTER (WHERE volume IS NULL OR volume = 0),
+           COUNT(DISTINCT company_id) FILTER (WHERE volume IS NULL OR volume = 0)
+    FROM price_history {PRICE_SAMPLE}
+    """,
+    'extreme_price_moves': """
+    SELECT company_id, date, 
+           ROUND(ABS((close_price - open_price) / open_price * 100), 2) as daily_change
+    FROM price_history
+    WHERE open_price > 0 
+      AND ABS((close_price - open_price) / open_price) > 0.9
+    ORDER BY daily_change DESC
+    LIMIT 10
+    """,
+    'balance_sheet_imbalances': """
+    SELECT bs.company_id, bs.period_ending,
+           bs.total_assets, bs.total_liabilities, bs.stockholders_equity,
+           ROUND(ABS(bs.total_assets - (bs.total_liabilities + bs.stockholders_equity)), 2) as imbalance
+    FROM balance_sheets bs
+    WHERE bs.total_assets IS NOT NULL 
+      AND bs.total_liabilities IS NOT NULL 
+      AND bs.stockholders_equity IS NOT NULL
+      AND ABS(bs.total_assets - (bs.total_liabilities + bs.stockholders_equity)) > 1000000
+    ORDER BY imbalance DESC
+    LIMIT 10
+    """,
+    'negative_equity_flag': """
+    SELECT EXISTS (SELECT 1 FROM balance_sheets WHERE stockholders_equity < 0)
+    """,
+    'negative_equity_counts': """
+    SELECT COUNT(*), COUNT(DISTINCT company_id)
+    FROM balance_sheets 
+    WHERE stockholders_equity < 0
+    """,
+    'cash_flow_flag': """
+    SELECT EXISTS (
+        SELECT 1 FROM cash_flow_statements
+        WHERE operating_cash_flow IS NOT NULL 
+          AND investing_cash_flow IS NOT NULL 
+          AND financing_cash_flow IS NOT NULL
+          AND changes_in_cash IS NOT NULL
+          AND ABS((operating_cash_flow + investing_cash_flow + financing_cash_flow) - changes_in_cash) > 1000000
+    )
+    """,
+    'cash_flow_inconsistencies': """
+    SELECT COUNT(*)
+    FROM cash_flow_statements
+    WHERE operating_cash_flow IS NOT NULL 
+      AND investing_cash_flow IS NOT NULL 
+      AND financing_cash_flow IS NOT NULL
+      AND changes_in_cash IS NOT NULL
+      AND ABS((operating_cash_flow + investing_cash_flow + financing_cash_flow) - changes_in_cash) > 1000000
+    """,
+    'companies_without_prices': """
+    SELECT COUNT(*)
+    FROM companies c
+    LEFT JOIN price_history ph ON c.id = ph.company_id
+    WHERE ph.company_id IS NULL
+    """,
+    'companies_with_stale_prices': """
+    SELECT COUNT(DISTINCT c.id)
+    FROM companies c
+    LEFT JOIN price_history ph ON c.id = ph.company_id
+    WHERE ph.date < CURRENT_DATE - INTERVAL '30 days' OR ph.date IS NULL
+    """,
+    'companies_without_financials': """
+    SELECT COUNT(*)
+    FROM companies c
+    LEFT JOIN income_statements i ON c.id = i.company_id
+    WHERE i.company_id IS NULL
+    """,
+    'unusual_pe_ratios': """
+    SELECT COUNT(*), MIN(trailing_pe), MAX(trailing_pe)
+    FROM company_metrics
+    WHERE trailing_pe < 0 OR trailing_pe > 1000
+    """,
+    'unusual_market_caps': """
+    SELECT COUNT(*), MIN(market_cap), MAX(market_cap)
+    FROM company_metrics
+    WHERE market_cap <= 0 OR market_cap > 10000000000000
+    """,
+    'accuracy_summary': """
+    WITH ph AS (
+        SELECT COUNT(*) as total_price_records,
+               COUNT(DISTINCT company_id) as companies_with_prices,
+               MAX(date) as latest_price_date
+        FROM price_history
+    )
+    SELECT 
+        (SELECT COUNT(*) FROM companies) as total_companies,
+        ph.total_price_records,
+        ph.companies_with_prices,
+        (SELECT COUNT(*) FROM income_statements) as financial_records,
+        ph.latest_price_date,
+        (SELECT COUNT(DISTINCT company_id) FROM company_metrics) as companies_with_metrics
+    FROM ph
+    """,
+}
+
+def private_cache_dir():
+    """
+    Today's directory under CACHE_DIR, created on first use, or None unless
+    CACHE_DIR is a real directory owned by this user that nobody else can write
+    """
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        info = os.lstat(CACHE_DIR)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+            return None
+        if info.st_mode & 0o077:
+            os.chmod(CACHE_DIR, 0o700)
+        today = date.today().isoformat()
+        day_dir = os.path.join(CACHE_DIR, today)
+        if not os.path.isdir(day_dir):
+            # a new day: drop the previous days' entries
+            for name in os.listdir(CACHE_DIR):
+                if name != today:
+                    shutil.rmtree(os.path.join(CACHE_DIR, name), ignore_errors=True)
+            os.makedirs(day_dir, mode=0o700, exist_ok=True)
+        return day_dir
+    except OSError:
+        return None
+
+def encode_cached(value):
+    """json.dump default= hook for the Decimal and date values query results hold"""
+    if isinstance(value, Decimal):
+        return {'__decimal__': str(value)}
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    raise TypeError(f"cannot cache {type(value).__name__}")
+
+def decode_cached(obj):
+    """json.load object_hook= undoing encode_cached"""
+    if '__decimal__' in obj:
+        return Decimal(obj['__decimal__'])
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return date.fromisoformat(obj['__date__'])
+    return obj
+
+@dataclass(frozen=True, slots=True)
+class CheckResult:
+    """
+    One finding of a check. severity is 'ok', 'warning' or 'error';
+    message is the report line, summary the line listed under ISSUES FOUND
+    and examples any detail lines printed below the message.
+    """
+    name: str
+    severity: str
+    count: int
+    message: str
+    summary: str = ""
+    examples: tuple = ()
+
+def render(title, results):
+    """Report lines for one check section"""
+    lines = [title, "=" * 50]
+    for result in results:
+        lines.append(result.message)
+        lines.extend(result.examples)
+    return lines
+
+# Every extreme move, for --export; streamed by COPY rather than fetched row by row
+EXTREME_MOVES_EXPORT_QUERY = """
+    SELECT c.symbol, ph.date, ph.open_price, ph.close_price,
+           ROUND(ABS((close_price - open_price) / open_price * 100), 2) as daily_change
+    FROM price_history ph
+    JOIN companies c ON ph.company_id = c.id
+    WHERE open_price > 0 
+      AND ABS((close_price - open_price) / open_price) > 0.9
+    ORDER BY daily_change DESC
+"""
+EXPORT_FILE = 'extreme_price_moves.csv'
+
 class DatabaseErrorChecker:
-    def __init__(self):
-        self.database_url = os.getenv('DATABASE_URL')
-        if self.database_url:
-            self.conn = psycopg2.connect(self.database_url)
-        else:
-            db_config = get_database_config()
-            self.conn = psycopg2.connect(**db_config)
-        
+    """
+    Read-only accuracy checks. Connections it checks out of the pool run in
+    a read-only autocommit session, so it cannot be used to apply fixes;
+    that is data_quality_maintenance's job.
+    """
+    def __init__(self, use_cache=True, conn=None):
+        # a caller may share its own connection; otherwise check one out
+        self.owns_conn = conn is None
+        if conn is None:
+            conn = self.checkout_connection()
+        self.conn = conn
         self.cursor = self.conn.cursor()
+        self.use_cache = use_cache
+        self.counters = None
+        self.symbols = None
+        self.results = []
         self.errors = []
         self.warnings = []
+        # set to a list to collect the report instead of printing it
+        self.lines = None
+        self.prepare_statements()
         
+    def checkout_connection(self):
+        """Check a connection out of the pool in a read-only autocommit session"""
+        conn = get_connection_pool().getconn()
+        try:
+            # no snapshot or open transaction is held between check queries
+            conn.set_session(readonly=True, autocommit=True)
+        except Exception:
+            self.release_connection(conn)
+            raise
+        return conn
+    
+    def release_connection(self, conn):
+        """Hand a connection back to the pool in the pool's usual read-write session"""
+        reset = False
+        try:
+            if not conn.closed:
+                conn.set_session(readonly='DEFAULT', autocommit=False)
+                reset = True
+        except Exception as e:
+            logger.warning(f"Discarding a pooled connection that could not be reset: {e}")
+        finally:
+            # a connection that cannot be reset is not fit for the next user
+            get_connection_pool().putconn(conn, close=not reset)
+    
+    def prepare_statements(self):
+        """PREPARE the check queries this session has not prepared yet, in one round trip"""
+        # pooled connections keep statements prepared by an earlier checker
+        self.cursor.execute("SELECT name FROM pg_prepared_statements")
+        prepared = {name for (name,) in self.cursor.fetchall()}
+        missing = [f"PREPARE {name} AS {statement}" for name, statement in PREPARED_STATEMENTS.items()
+                   if name not in prepared]
+        if missing:
+            self.cursor.execute(";".join(missing))
+    
+    def emit(self, text):
+        """Print a line of the report, or collect it while run_full_check buffers output"""
+        if self.lines is None:
+            print(text)
+        else:
+            self.lines.append(text)
+    
+    def table_counters(self):
+        """Write counters and live tuples per user table, read once per check run"""
+        if self.counters is None:
+            # drop the transaction's stats snapshot so new writes are seen
+            self.cursor.execute("""
+                SELECT pg_stat_clear_snapshot();
+                SELECT relname, n_tup_ins + n_tup_upd + n_tup_del, n_live_tup
+                FROM pg_stat_user_tables;
+            """)
+            self.counters = {table: (writes, live) for table, writes, live in self.cursor.fetchall()}
+        return self.counters
+    
+    def company_symbols(self):
+        """id -> symbol for every company, read once per check run"""
+        if self.symbols is None:
+            self.cursor.execute("SELECT id, symbol FROM companies")
+            self.symbols = dict(self.cursor.fetchall())
+        return self.symbols
+    
+    def symbol(self, company_id):
+        """Symbol for a company_id, resolved client-side instead of joining companies"""
+        return self.company_symbols().get(company_id, f"company_id {company_id}")
+    
+    def run_query(self, query, tables, fetch='one'):
+        """
+        Run a check query and return its fetchone(), fetchall(), row count or
+        first row as a namedtuple (fetch='one', 'all', 'count' or 'named').
+        query is either a PREPARED_STATEMENTS name, run with EXECUTE, or
+        plain SQL. Results are stored as JSON under CACHE_DIR/YYYY-MM-DD/ keyed
+        on the database, the SQL and the write counters of the tables it reads,
+        so a rerun only scans tables that changed since. use_cache=False
+        always queries.
+        """
+        sql = PREPARED_STATEMENTS.get(query, query)
+        statement = f"EXECUTE {query}" if query in PREPARED_STATEMENTS else query
+        counters = self.table_counters()
+        database = self.conn.info
+        fingerprint = repr((database.host, database.port, database.dbname,
+                            sql, fetch, [counters.get(table) for table in tables]))
+        day_dir = private_cache_dir() if self.use_cache else None
+        path = None
+        if day_dir:
+            path = os.path.join(day_dir, f"{hashlib.sha1(fingerprint.encode()).hexdigest()}.json")
+        result = None
+        if path is not None:
+            try:
+                with open(path) as f:
+                    result = json.load(f, object_hook=decode_cached)
+                # JSON has no tuples; give rows back the shape psycopg2 returns
+                if fetch == 'one' and result is not None:
+                    result = tuple(result)
+                elif fetch == 'all':
+                    result = [tuple(row) for row in result]
+            except (OSError, ValueError):
+                result = None
+        
+        if result is None:
+            result = self.fetch_result(statement, fetch)
+            if path is not None:
+                try:
+                    payload = json.dumps(result, default=encode_cached)
+                    tmp_path = f"{path}.{os.getpid()}"
+                    with open(tmp_path, 'w') as f:
+                        f.write(payload)
+                    os.replace(tmp_path, path)
+                except (OSError, TypeError):
+                    pass  # the cache is best-effort
+        
+        if fetch == 'named':
+            return namedtuple('Record', result)(**result)
+        return result
+    
+    def fetch_result(self, statement, fetch):
+        """Execute a statement and fetch its result in the form run_query caches"""
+        if fetch == 'count':
+            return self.count_rows(statement)
+        if fetch == 'named':
+            from psycopg2.extras import NamedTupleCursor
+            cursor = self.conn.cursor(cursor_factory=NamedTupleCursor)
+            try:
+                cursor.execute(statement)
+                # cache a dict; run_query rebuilds the namedtuple
+                return cursor.fetchone()._asdict()
+            finally:
+                cursor.close()
+        self.cursor.execute(statement)
+        return self.cursor.fetchall() if fetch == 'all' else self.cursor.fetchone()
+    
+    def count_rows(self, query):
+        """Count a query's rows, streaming them through a server-side cursor"""
+        # outside a transaction a named cursor has to be declared WITH HOLD
+        cursor = self.conn.cursor(name='dup_scan', withhold=self.conn.autocommit)
+        cursor.itersize = 1000
+        try:
+            cursor.execute(query)
+            return sum(1 for _ in cursor)
+        finally:
+            cursor.close()
+    
     def check_data_integrity(self):
         """Check referential integrity and data consistency"""
-        print("🔍 CHECKING DATA INTEGRITY")
-        print("=" * 50)
+        results = []
         
         # 1. Check for orphaned records
-        orphaned_queries = {
-            'price_history': """
-                SELECT COUNT(*) FROM price_history ph 
-                LEFT JOIN companies c ON ph.company_id = c.id 
-                WHERE c.id IS NULL
-            """,
-            'company_metrics': """
-                SELECT COUNT(*) FROM company_metrics cm 
-                LEFT JOIN companies c ON cm.company_id = c.id 
-                WHERE c.id IS NULL
-            """,
-            'income_statements': """
-                SELECT COUNT(*) FROM income_statements i 
-                LEFT JOIN companies c ON i.company_id = c.id 
-                WHERE c.id IS NULL
-            """
+        orphaned_statements = {
+            'price_history': 'orphaned_price_history',
+            'company_metrics': 'orphaned_company_metrics',
+            'income_statements': 'orphaned_income_statements',
         }
         
-        for table, query in orphaned_queries.items():
-            self.cursor.execute(query)
-            orphaned_count = self.cursor.fetchone()[0]
+        # A validated foreign key on company_id already rules out orphans
+        self.cursor.execute("EXECUTE enforced_foreign_keys")
+        enforced_tables = {table for (table,) in self.cursor.fetchall()}
+        
+        for table, statement in orphaned_statements.items():
+            name = f"orphaned_{table}"
+            if table in enforced_tables:
+                results.append(CheckResult(name, 'ok', 0, f"✅ {table}: No orphaned records (foreign key enforced)"))
+                continue
+            orphaned_count = self.run_query(statement, (table, 'companies'))[0]
             if orphaned_count > 0:
-                self.errors.append(f"❌ {table}: {orphaned_count} orphaned records")
-                print(f"❌ {table}: {orphaned_count} orphaned records")
+                message = f"❌ {table}: {orphaned_count} orphaned records"
+                results.append(CheckResult(name, 'error', orphaned_count, message, message))
             else:
-                print(f"✅ {table}: No orphaned records")
+                results.append(CheckResult(name, 'ok', 0, f"✅ {table}: No orphaned records"))
+        return results
     
     def check_data_quality(self):
-        """Check for data quality issues"""
-        print("\n📊 CHECKING DATA QUALITY")
-        print("=" * 50)
+        """
+        Check for data quality issues. The EXISTS probes and the extreme-move
+        listing are served by the partial indexes in
+        data_quality_maintenance.QUALITY_INDEXES once daily maintenance has
+        built them; without them each probe reads price_history in full.
+        
+        With DB_CHECKER_APPROX=1 the issue counts come from a
+        TABLESAMPLE SYSTEM block sample scaled up to the whole table, so
+        counting reads a fixed fraction of price_history. The figures are
+        then shown with a ~ and are estimates; the company counts only cover
+        the sampled blocks. The EXISTS probes stay exact, so an issue is
+        never reported as absent just because the sample missed it.
+        """
+        results = []
+        
+        # Probe for any offending row first; a clean table needs no counting
+        price_issues = self.run_query('price_issue_flags', ('price_history',))
+        
+        # Negative prices, high < low and missing volume in one price_history scan
+        negative_prices = invalid_highs = missing_volume = 0
+        negative_companies = invalid_companies = missing_volume_companies = 0
+        if any(price_issues):
+            (negative_prices, negative_companies, invalid_highs, invalid_companies,
+             missing_volume, missing_volume_companies) = self.run_query('price_issue_counts', ('price_history',))
+            if APPROX:
+                # scale the sample up, keeping at least one of anything the probes found
+                scale = 100 / APPROX_SAMPLE_PERCENT
+                negative_prices, invalid_highs, missing_volume = (
+                    max(round(count * scale), 1) if found else 0
+                    for count, found in zip((negative_prices, invalid_highs, missing_volume), price_issues)
+                )
+                negative_companies, invalid_companies, missing_volume_companies = (
+                    max(companies, 1) if found else 0
+                    for companies, found in zip((negative_companies, invalid_companies, missing_volume_companies), price_issues)
+                )
+        approx = "~" if APPROX else ""
         
         # 1. Check for negative prices
-        self.cursor.execute("""
-            SELECT COUNT(*), COUNT(DISTINCT company_id) 
-            FROM price_history 
-            WHERE open_price < 0 OR high_price < 0 OR low_price < 0 OR close_price < 0
-        """)
-        negative_prices, companies_affected = self.cursor.fetchone()
         if negative_prices > 0:
-            self.errors.append(f"❌ Negative prices: {negative_prices} records in {companies_affected} companies")
-            print(f"❌ Negative prices: {negative_prices} records in {companies_affected} companies")
+            message = f"❌ Negative prices: {approx}{negative_prices} records in {negative_companies} companies"
+            results.append(CheckResult('negative_prices', 'error', negative_prices, message, message))
         else:
-            print("✅ No negative prices found")
+            results.append(CheckResult('negative_prices', 'ok', 0, "✅ No negative prices found"))
         
         # 2. Check for invalid high/low relationships
-        self.cursor.execute("""
-            SELECT COUNT(*), COUNT(DISTINCT company_id) 
-            FROM price_history 
-            WHERE high_price < low_price
-        """)
-        invalid_highs, companies_affected = self.cursor.fetchone()
         if invalid_highs > 0:
-            self.errors.append(f"❌ Invalid high < low: {invalid_highs} records in {companies_affected} companies")
-            print(f"❌ Invalid high < low: {invalid_highs} records in {companies_affected} companies")
+            message = f"❌ Invalid high < low: {approx}{invalid_highs} records in {invalid_companies} companies"
+            results.append(CheckResult('invalid_high_low', 'error', invalid_highs, message, message))
         else:
-            print("✅ All high/low price relationships are valid")
+            results.append(CheckResult('invalid_high_low', 'ok', 0, "✅ All high/low price relationships are valid"))
         
         # 3. Check for extreme price movements (>90% in one day)
-        self.cursor.execute("""
-            SELECT symbol, date, 
-                   ROUND(ABS((close_price - open_price) / open_price * 100), 2) as daily_change
-            FROM price_history ph
-            JOIN companies c ON ph.company_id = c.id
-            WHERE open_price > 0 
-              AND ABS((close_price - open_price) / open_price) > 0.9
-            ORDER BY daily_change DESC
-            LIMIT 10
-        """)
-        extreme_moves = self.cursor.fetchall()
+        extreme_moves = self.run_query('extreme_price_moves', ('price_history',), fetch='all')
         if extreme_moves:
-            self.warnings.append(f"⚠️ {len(extreme_moves)} extreme price movements (>90% daily change)")
-            print(f"⚠️ Extreme price movements found:")
-            for symbol, date, change in extreme_moves[:5]:
-                print(f"   {symbol} on {date}: {change}%")
+            results.append(CheckResult(
+                'extreme_price_moves', 'warning', len(extreme_moves),
+                "⚠️ Extreme price movements found:",
+                f"⚠️ {len(extreme_moves)} extreme price movements (>90% daily change)",
+                tuple(f"   {self.symbol(company_id)} on {date}: {change}%"
+                      for company_id, date, change in extreme_moves[:5]),
+            ))
         else:
-            print("✅ No extreme price movements detected")
+            results.append(CheckResult('extreme_price_moves', 'ok', 0, "✅ No extreme price movements detected"))
         
         # 4. Check for missing volume data
-        self.cursor.execute("""
-            SELECT COUNT(*), COUNT(DISTINCT company_id) 
-            FROM price_history 
-            WHERE volume IS NULL OR volume = 0
-        """)
-        missing_volume, companies_affected = self.cursor.fetchone()
         if missing_volume > 0:
-            self.warnings.append(f"⚠️ Missing volume: {missing_volume} records in {companies_affected} companies")
-            print(f"⚠️ Missing volume: {missing_volume} records in {companies_affected} companies")
+            message = f"⚠️ Missing volume: {approx}{missing_volume} records in {missing_volume_companies} companies"
+            results.append(CheckResult('missing_volume', 'warning', missing_volume, message, message))
         else:
-            print("✅ All records have volume data")
+            results.append(CheckResult('missing_volume', 'ok', 0, "✅ All records have volume data"))
+        return results
     
     def check_financial_data_consistency(self):
         """Check financial statements for consistency"""
-        print("\n💰 CHECKING FINANCIAL DATA CONSISTENCY")
-        print("=" * 50)
+        results = []
         
         # 1. Check balance sheet equation: Assets = Liabilities + Equity
-        self.cursor.execute("""
-            SELECT c.symbol, bs.period_ending,
-                   bs.total_assets, bs.total_liabilities, bs.stockholders_equity,
-                   ROUND(ABS(bs.total_assets - (bs.total_liabilities + bs.stockholders_equity)), 2) as imbalance
-            FROM balance_sheets bs
-            JOIN companies c ON bs.company_id = c.id
-            WHERE bs.total_assets IS NOT NULL 
-              AND bs.total_liabilities IS NOT NULL 
-              AND bs.stockholders_equity IS NOT NULL
-              AND ABS(bs.total_assets - (bs.total_liabilities + bs.stockholders_equity)) > 1000000
-            ORDER BY imbalance DESC
-            LIMIT 10
-        """)
-        balance_errors = self.cursor.fetchall()
+        balance_errors = self.run_query('balance_sheet_imbalances', ('balance_sheets',), fetch='all')
         if balance_errors:
-            self.warnings.append(f"⚠️ Balance sheet imbalances found in {len(balance_errors)} records")
-            print(f"⚠️ Balance sheet imbalances:")
-            for symbol, period, assets, liab, equity, imbalance in balance_errors[:3]:
-                print(f"   {symbol} ({period}): Imbalance of {imbalance:,.0f}")
+            results.append(CheckResult(
+                'balance_sheet_imbalances', 'warning', len(balance_errors),
+                "⚠️ Balance sheet imbalances:",
+                f"⚠️ Balance sheet imbalances found in {len(balance_errors)} records",
+                tuple(f"   {self.symbol(company_id)} ({period}): Imbalance of {imbalance:,.0f}"
+                      for company_id, period, assets, liab, equity, imbalance in balance_errors[:3]),
+            ))
         else:
-            print("✅ Balance sheets are mathematically consistent")
+            results.append(CheckResult('balance_sheet_imbalances', 'ok', 0, "✅ Balance sheets are mathematically consistent"))
         
         # 2. Check for negative equity
-        self.cursor.execute("""
-            SELECT COUNT(*), COUNT(DISTINCT company_id)
-            FROM balance_sheets 
-            WHERE stockholders_equity < 0
-        """)
-        negative_equity, companies_affected = self.cursor.fetchone()
+        negative_equity = companies_affected = 0
+        if self.run_query('negative_equity_flag', ('balance_sheets',))[0]:
+            negative_equity, companies_affected = self.run_query('negative_equity_counts', ('balance_sheets',))
         if negative_equity > 0:
-            self.warnings.append(f"⚠️ Negative equity: {negative_equity} records in {companies_affected} companies")
-            print(f"⚠️ Negative equity found in {negative_equity} records ({companies_affected} companies)")
+            results.append(CheckResult(
+                'negative_equity', 'warning', negative_equity,
+                f"⚠️ Negative equity found in {negative_equity} records ({companies_affected} companies)",
+                f"⚠️ Negative equity: {negative_equity} records in {companies_affected} companies",
+            ))
         else:
-            print("✅ No negative equity found")
+            results.append(CheckResult('negative_equity', 'ok', 0, "✅ No negative equity found"))
         
         # 3. Check cash flow consistency
-        self.cursor.execute("""
-            SELECT COUNT(*)
-            FROM cash_flow_statements
-            WHERE operating_cash_flow IS NOT NULL 
-              AND investing_cash_flow IS NOT NULL 
-              AND financing_cash_flow IS NOT NULL
-              AND changes_in_cash IS NOT NULL
-              AND ABS((operating_cash_flow + investing_cash_flow + financing_cash_flow) - changes_in_cash) > 1000000
-        """)
-        cash_flow_errors = self.cursor.fetchone()[0]
+        cash_flow_errors = 0
+        if self.run_query('cash_flow_flag', ('cash_flow_statements',))[0]:
+            cash_flow_errors = self.run_query('cash_flow_inconsistencies', ('cash_flow_statements',))[0]
         if cash_flow_errors > 0:
-            self.warnings.append(f"⚠️ Cash flow inconsistencies: {cash_flow_errors} records")
-            print(f"⚠️ Cash flow inconsistencies in {cash_flow_errors} records")
+            results.append(CheckResult(
+                'cash_flow_inconsistencies', 'warning', cash_flow_errors,
+                f"⚠️ Cash flow inconsistencies in {cash_flow_errors} records",
+                f"⚠️ Cash flow inconsistencies: {cash_flow_errors} records",
+            ))
         else:
-            print("✅ Cash flow statements are consistent")
+            results.append(CheckResult('cash_flow_inconsistencies', 'ok', 0, "✅ Cash flow statements are consistent"))
+        return results
     
     def check_data_completeness(self):
         """Check for data completeness"""
-        print("\n📈 CHECKING DATA COMPLETENESS")
-        print("=" * 50)
+        results = []
         
         # 1. Companies without price data
-        self.cursor.execute("""
-            SELECT COUNT(*)
-            FROM companies c
-            LEFT JOIN price_history ph ON c.id = ph.company_id
-            WHERE ph.company_id IS NULL
-        """)
-        no_price_data = self.cursor.fetchone()[0]
+        no_price_data = self.run_query('companies_without_prices', ('companies', 'price_history'))[0]
         if no_price_data > 0:
-            self.warnings.append(f"⚠️ {no_price_data} companies without price data")
-            print(f"⚠️ {no_price_data} companies without price data")
+            message = f"⚠️ {no_price_data} companies without price data"
+            results.append(CheckResult('companies_without_prices', 'warning', no_price_data, message, message))
         else:
-            print("✅ All companies have price data")
+            results.append(CheckResult('companies_without_prices', 'ok', 0, "✅ All companies have price data"))
         
         # 2. Companies without recent data (last 30 days)
-        self.cursor.execute("""
-            SELECT COUNT(DISTINCT c.id)
-            FROM companies c
-            LEFT JOIN price_history ph ON c.id = ph.company_id
-            WHERE ph.date < CURRENT_DATE - INTERVAL '30 days' OR ph.date IS NULL
-        """)
-        stale_data = self.cursor.fetchone()[0]
+        stale_data = self.run_query('companies_with_stale_prices', ('companies', 'price_history'))[0]
         if stale_data > 0:
-            self.warnings.append(f"⚠️ {stale_data} companies with stale price data (>30 days)")
-            print(f"⚠️ {stale_data} companies with stale price data (>30 days)")
+            message = f"⚠️ {stale_data} companies with stale price data (>30 days)"
+            results.append(CheckResult('companies_with_stale_prices', 'warning', stale_data, message, message))
         else:
-            print("✅ All companies have recent price data")
+            results.append(CheckResult('companies_with_stale_prices', 'ok', 0, "✅ All companies have recent price data"))
         
         # 3. Companies without financial statements
-        self.cursor.execute("""
-            SELECT COUNT(*)
-            FROM companies c
-            LEFT JOIN income_statements i ON c.id = i.company_id
-            WHERE i.company_id IS NULL
-        """)
-        no_financials = self.cursor.fetchone()[0]
+        no_financials = self.run_query('companies_without_financials', ('companies', 'income_statements'))[0]
         if no_financials > 0:
-            self.warnings.append(f"⚠️ {no_financials} companies without financial statements")
-            print(f"⚠️ {no_financials} companies without financial statements")
+            message = f"⚠️ {no_financials} companies without financial statements"
+            results.append(CheckResult('companies_without_financials', 'warning', no_financials, message, message))
         else:
-            print("✅ All companies have financial statements")
+            results.append(CheckResult('companies_without_financials', 'ok', 0, "✅ All companies have financial statements"))
+        return results
     
     def check_duplicate_data(self):
         """Check for duplicate records"""
-        print("\n🔄 CHECKING FOR DUPLICATES")
-        print("=" * 50)
+        results = []
         
         # 1. Duplicate price records
-        self.cursor.execute("""
+        price_duplicates = self.run_query("""
             SELECT company_id, date, COUNT(*)
             FROM price_history
             GROUP BY company_id, date
             HAVING COUNT(*) > 1
             LIMIT 10
-        """)
-        price_duplicates = self.cursor.fetchall()
+        """, ('price_history',), fetch='count')
         if price_duplicates:
-            self.errors.append(f"❌ Duplicate price records found: {len(price_duplicates)} instances")
-            print(f"❌ Duplicate price records: {len(price_duplicates)} instances")
+            results.append(CheckResult(
+                'duplicate_prices', 'error', price_duplicates,
+                f"❌ Duplicate price records: {price_duplicates} instances",
+                f"❌ Duplicate price records found: {price_duplicates} instances",
+            ))
         else:
-            print("✅ No duplicate price records")
+            results.append(CheckResult('duplicate_prices', 'ok', 0, "✅ No duplicate price records"))
         
         # 2. Duplicate company records
-        self.cursor.execute("""
+        company_duplicates = self.run_query("""
             SELECT symbol, COUNT(*)
             FROM companies
             GROUP BY symbol
             HAVING COUNT(*) > 1
-        """)
-        company_duplicates = self.cursor.fetchall()
+        """, ('companies',), fetch='count')
         if company_duplicates:
-            self.errors.append(f"❌ Duplicate companies: {len(company_duplicates)} symbols")
-            print(f"❌ Duplicate companies: {len(company_duplicates)} symbols")
+            message = f"❌ Duplicate companies: {company_duplicates} symbols"
+            results.append(CheckResult('duplicate_companies', 'error', company_duplicates, message, message))
         else:
-            print("✅ No duplicate companies")
+            results.append(CheckResult('duplicate_companies', 'ok', 0, "✅ No duplicate companies"))
+        return results
     
     def check_data_ranges(self):
         """Check for data within reasonable ranges"""
-        print("\n📊 CHECKING DATA RANGES")
-        print("=" * 50)
+        results = []
         
         # 1. Check PE ratios
-        self.cursor.execute("""
-            SELECT COUNT(*), MIN(trailing_pe), MAX(trailing_pe)
-            FROM company_metrics
-            WHERE trailing_pe < 0 OR trailing_pe > 1000
-        """)
-        pe_issues, min_pe, max_pe = self.cursor.fetchone()
+        pe_issues, min_pe, max_pe = self.run_query('unusual_pe_ratios', ('company_metrics',))
         if pe_issues > 0:
-            self.warnings.append(f"⚠️ Unusual PE ratios: {pe_issues} records (range: {min_pe} to {max_pe})")
-            print(f"⚠️ Unusual PE ratios: {pe_issues} records (range: {min_pe} to {max_pe})")
+            message = f"⚠️ Unusual PE ratios: {pe_issues} records (range: {min_pe} to {max_pe})"
+            results.append(CheckResult('unusual_pe_ratios', 'warning', pe_issues, message, message))
         else:
-            print("✅ All PE ratios are within reasonable ranges")
+            results.append(CheckResult('unusual_pe_ratios', 'ok', 0, "✅ All PE ratios are within reasonable ranges"))
         
         # 2. Check market cap values
-        self.cursor.execute("""
-            SELECT COUNT(*), MIN(market_cap), MAX(market_cap)
-            FROM company_metrics
-            WHERE market_cap <= 0 OR market_cap > 10000000000000
-        """)
-        mcap_issues, min_mcap, max_mcap = self.cursor.fetchone()
+        mcap_issues, min_mcap, max_mcap = self.run_query('unusual_market_caps', ('company_metrics',))
         if mcap_issues > 0:
-            self.warnings.append(f"⚠️ Unusual market caps: {mcap_issues} records")
-            print(f"⚠️ Unusual market caps: {mcap_issues} records")
+            message = f"⚠️ Unusual market caps: {mcap_issues} records"
+            results.append(CheckResult('unusual_market_caps', 'warning', mcap_issues, message, message))
         else:
-            print("✅ All market caps are within reasonable ranges")
+            results.append(CheckResult('unusual_market_caps', 'ok', 0, "✅ All market caps are within reasonable ranges"))
+        return results
+    
+    def run_on_pooled_connection(self, check):
+        """Run a check method on its own pooled connection and return its results"""
+        conn = self.checkout_connection()
+        try:
+            worker = copy.copy(self)
+            worker.conn = conn
+            worker.cursor = conn.cursor()
+            worker.prepare_statements()
+            results = check(worker)
+            worker.cursor.close()
+            return results
+        finally:
+            self.release_connection(conn)
+    
+    def run_check_sections(self):
+        """
+        Run the independent check sections concurrently, one pooled
+        connection each, then render them and record their findings in
+        section order so the report reads the same as a serial run.
+        """
+        # load these once here so every worker copy shares them
+        self.table_counters()
+        self.company_symbols()
+        titles, checks = zip(*CHECK_SECTIONS)
+        with ThreadPoolExecutor(max_workers=len(CHECK_SECTIONS)) as executor:
+            sections = list(executor.map(self.run_on_pooled_connection, checks))
+        for title, results in zip(titles, sections):
+            for line in render(title, results):
+                self.emit(line)
+            self.results.extend(results)
+            self.errors.extend(r.summary for r in results if r.severity == 'error')
+            self.warnings.extend(r.summary for r in results if r.severity == 'warning')
     
     def generate_summary_report(self):
         """Generate summary report"""
-        print("\n📋 DATABASE ACCURACY SUMMARY")
-        print("=" * 60)
+        self.emit("\n📋 DATABASE ACCURACY SUMMARY")
+        self.emit("=" * 60)
         
-        # Get overall stats
-        self.cursor.execute("""
-            SELECT 
-                (SELECT COUNT(*) FROM companies) as total_companies,
-                (SELECT COUNT(*) FROM price_history) as total_price_records,
-                (SELECT COUNT(DISTINCT company_id) FROM price_history) as companies_with_prices,
-                (SELECT COUNT(*) FROM income_statements) as financial_records,
-                (SELECT MAX(date) FROM price_history) as latest_price_date,
-                (SELECT COUNT(DISTINCT company_id) FROM company_metrics) as companies_with_metrics
-        """)
-        stats = self.cursor.fetchone()
+        # Get overall stats from the precomputed view when it has been created
+        self.cursor.execute("SELECT to_regclass('mv_db_health_summary')")
+        if self.cursor.fetchone()[0] is not None:
+            stats = self.run_query("""
+                SELECT total_companies, total_price_records, companies_with_prices,
+                       financial_records, latest_price_date, companies_with_metrics
+                FROM mv_db_health_summary
+            """, ('mv_db_health_summary',), fetch='named')
+        else:
+            # price_history is scanned once for all three of its figures
+            stats = self.run_query('accuracy_summary', ('companies', 'price_history', 'income_statements', 'company_metrics'),
+                                   fetch='named')
         
-        print(f"Total Companies: {stats[0]:,}")
-        print(f"Total Price Records: {stats[1]:,}")
-        print(f"Companies with Prices: {stats[2]:,}")
-        print(f"Companies with Metrics: {stats[5]:,}")
-        print(f"Financial Records: {stats[3]:,}")
-        print(f"Latest Price Date: {stats[4]}")
+        self.emit(f"Total Companies: {stats.total_companies:,}")
+        self.emit(f"Total Price Records: {stats.total_price_records:,}")
+        self.emit(f"Companies with Prices: {stats.companies_with_prices:,}")
+        self.emit(f"Companies with Metrics: {stats.companies_with_metrics:,}")
+        self.emit(f"Financial Records: {stats.financial_records:,}")
+        self.emit(f"Latest Price Date: {stats.latest_price_date}")
         
-        print(f"\n🔍 ISSUES FOUND:")
-        print(f"❌ Critical Errors: {len(self.errors)}")
+        self.emit(f"\n🔍 ISSUES FOUND:")
+        self.emit(f"❌ Critical Errors: {len(self.errors)}")
         for error in self.errors:
-            print(f"   {error}")
+            self.emit(f"   {error}")
         
-        print(f"⚠️ Warnings: {len(self.warnings)}")
+        self.emit(f"⚠️ Warnings: {len(self.warnings)}")
         for warning in self.warnings:
-            print(f"   {warning}")
+            self.emit(f"   {warning}")
         
         if len(self.errors) == 0 and len(self.warnings) == 0:
-            print("🎉 EXCELLENT! No critical issues found in the database!")
+            self.emit("🎉 EXCELLENT! No critical issues found in the database!")
         elif len(self.errors) == 0:
-            print("✅ GOOD! No critical errors, only minor warnings.")
+            self.emit("✅ GOOD! No critical errors, only minor warnings.")
         else:
-            print("⚠️ ATTENTION NEEDED! Critical errors require immediate attention.")
+            self.emit("⚠️ ATTENTION NEEDED! Critical errors require immediate attention.")
         
         return len(self.errors), len(self.warnings)
     
     def run_full_check(self):
-        """Run comprehensive database check"""
-        print("🚀 COMPREHENSIVE DATABASE ERROR & ACCURACY CHECK")
-        print("=" * 80)
-        print(f"⏰ Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print()
+        """Run comprehensive database check, writing the report to stdout in one call"""
+        self.lines = []
+        try:
+            return self.run_checks()
+        finally:
+            sys.stdout.write("\n".join(self.lines) + "\n")
+            sys.stdout.flush()
+            self.lines = None
+    
+    def run_checks(self):
+        """Run every check section and the summary, emitting the report lines"""
+        self.emit("🚀 COMPREHENSIVE DATABASE ERROR & ACCURACY CHECK")
+        self.emit("=" * 80)
+        self.emit(f"⏰ Started: {datetime.now().isoformat(sep=' ', timespec='seconds')}")
+        self.emit("")
         
+        # re-read the table counters and symbols so writes since a previous run are seen
+        self.counters = None
+        self.symbols = None
         try:
-            self.check_data_integrity()
-            self.check_data_quality()
-            self.check_financial_data_consistency()
-            self.check_data_completeness()
-            self.check_duplicate_data()
-            self.check_data_ranges()
+            self.run_check_sections()
             
             errors, warnings = self.generate_summary_report()
             
-            print(f"\n⏰ Completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print("=" * 80)
+            self.emit(f"\n⏰ Completed: {datetime.now().isoformat(sep=' ', timespec='seconds')}")
+            self.emit("=" * 80)
             
             return errors == 0 and warnings == 0
             
         except Exception as e:
-            print(f"❌ Error during database check: {e}")
+            self.emit(f"❌ Error during database check: {e}")
             return False
     
+    def export_extreme_moves(self, path=EXPORT_FILE):
+        """
+        Write every extreme price movement to a CSV file for auditing. COPY
+        streams the rows straight into the file, so no result set is built
+        in Python however many rows there are. Returns the row count.
+        """
+        with open(path, 'w', newline='') as f:
+            self.cursor.copy_expert(f"COPY ({EXTREME_MOVES_EXPORT_QUERY}) TO STDOUT WITH (FORMAT csv, HEADER)", f)
+        return self.cursor.rowcount
+    
     def close(self):
-        """Close database connection"""
+        """Return the database connection to the pool unless it was passed in"""
         if self.cursor:
             self.cursor.close()
-        if self.conn:
-            self.conn.close()
+        if self.conn and self.owns_conn:
+            self.release_connection(self.conn)
+
+# Report sections in order: title -> check method returning CheckResults
+CHECK_SECTIONS = [
+    ("🔍 CHECKING DATA INTEGRITY", DatabaseErrorChecker.check_data_integrity),
+    ("\n📊 CHECKING DATA QUALITY", DatabaseErrorChecker.check_data_quality),
+    ("\n💰 CHECKING FINANCIAL DATA CONSISTENCY", DatabaseErrorChecker.check_financial_data_consistency),
+    ("\n📈 CHECKING DATA COMPLETENESS", DatabaseErrorChecker.check_data_completeness),
+    ("\n🔄 CHECKING FOR DUPLICATES", DatabaseErrorChecker.check_duplicate_data),
+    ("\n📊 CHECKING DATA RANGES", DatabaseErrorChecker.check_data_ranges),
+]
 
 if __name__ == "__main__":
-    checker = DatabaseErrorChecker()
+    # --no-cache skips the on-disk results cache
+    checker = DatabaseErrorChecker(use_cache='--no-cache' not in sys.argv)
     try:
-        checker.run_full_check()
+        # --export writes every extreme price movement to EXPORT_FILE instead
+        if '--export' in sys.argv:
+            exported = checker.export_extreme_moves()
+            print(f"✅ Exported {exported:,} extreme price movements to {EXPORT_FILE}")
+        else:
+            checker.run_full_check()
     finally:
         checker.close()
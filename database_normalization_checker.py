@@ -9,11 +9,13 @@ import psycopg2
 import os
 import pandas as pd
 from datetime import datetime
-from database_config import get_db_connection
+from database_config import get_connection_pool
 
 class DatabaseNormalizationChecker:
-    def __init__(self):
-        self.conn = get_db_connection()
+    def __init__(self, conn=None):
+        # a caller may share its own connection; otherwise check one out
+        self.owns_conn = conn is None
+        self.conn = get_connection_pool().getconn() if conn is None else conn
         self.cursor = self.conn.cursor()
         
     def check_database_normalization(self):
@@ -112,14 +114,16 @@ class DatabaseNormalizationChecker:
             ("cash_flow_statements", "company_id", "companies", "id")
         ]
         
+        # One round trip for every table, each counted with an anti-join
+        self.cursor.execute(" UNION ALL ".join(f"""
+            SELECT '{child_table}', COUNT(*) FROM {child_table} c
+            WHERE NOT EXISTS (SELECT 1 FROM {parent_table} p WHERE p.{parent_col} = c.{child_col})
+        """ for child_table, child_col, parent_table, parent_col in orphan_checks))
+        
+        orphan_counts = dict(self.cursor.fetchall())
+        
         for child_table, child_col, parent_table, parent_col in orphan_checks:
-            self.cursor.execute(f"""
-                SELECT COUNT(*) FROM {child_table} c
-                LEFT JOIN {parent_table} p ON c.{child_col} = p.{parent_col}
-                WHERE p.{parent_col} IS NULL
-            """)
-            orphans = self.cursor.fetchone()[0]
-            
+            orphans = orphan_counts[child_table]
             if orphans > 0:
                 issues.append(f"❌ {child_table}: {orphans} orphaned records")
                 print(f"❌ {child_table}: {orphans} orphaned records")
@@ -133,18 +137,29 @@ class DatabaseNormalizationChecker:
         print("\n📊 DATA QUALITY METRICS")
         print("=" * 60)
         
-        # Completeness check
+        # Completeness and accuracy figures in one round trip, price_history scanned once
         self.cursor.execute("""
+            WITH ph AS (
+                SELECT 
+                    COUNT(DISTINCT company_id) as companies_with_prices,
+                    COUNT(*) FILTER (WHERE open_price < 0 OR high_price < 0 OR low_price < 0 OR close_price < 0) as negative_prices,
+                    COUNT(*) FILTER (WHERE high_price < low_price) as invalid_highs
+                FROM price_history
+            )
             SELECT 
                 (SELECT COUNT(*) FROM companies) as total_companies,
                 (SELECT COUNT(*) FROM companies WHERE long_name IS NOT NULL) as companies_with_names,
                 (SELECT COUNT(*) FROM companies WHERE sector IS NOT NULL) as companies_with_sectors,
-                (SELECT COUNT(DISTINCT company_id) FROM price_history) as companies_with_prices,
-                (SELECT COUNT(DISTINCT company_id) FROM company_metrics) as companies_with_metrics
+                ph.companies_with_prices,
+                (SELECT COUNT(DISTINCT company_id) FROM company_metrics) as companies_with_metrics,
+                ph.negative_prices,
+                ph.invalid_highs
+            FROM ph
         """)
         
         stats = self.cursor.fetchone()
         total_companies = stats[0]
+        negative_prices, invalid_highs = stats[5], stats[6]
         
         print("📈 Data Completeness:")
         print(f"   Companies: {total_companies}")
@@ -156,20 +171,6 @@ class DatabaseNormalizationChecker:
         # Accuracy checks
         print("\n🎯 Data Accuracy:")
         
-        # Check for negative prices
-        self.cursor.execute("""
-            SELECT COUNT(*) FROM price_history 
-            WHERE open_price < 0 OR high_price < 0 OR low_price < 0 OR close_price < 0
-        """)
-        negative_prices = self.cursor.fetchone()[0]
-        
-        # Check for invalid high/low relationships
-        self.cursor.execute("""
-            SELECT COUNT(*) FROM price_history 
-            WHERE high_price < low_price
-        """)
-        invalid_highs = self.cursor.fetchone()[0]
-        
         if negative_prices == 0:
             print("   ✅ No negative prices found")
         else:
@@ -187,15 +188,22 @@ class DatabaseNormalizationChecker:
         print("\n🔄 DATA CONSISTENCY CHECK")
         print("=" * 60)
         
-        # Check balance sheet equation consistency
+        # Balance sheet equation and duplicate symbols in one round trip
         self.cursor.execute("""
-            SELECT COUNT(*) FROM balance_sheets
-            WHERE total_assets IS NOT NULL 
-            AND total_liabilities IS NOT NULL 
-            AND stockholders_equity IS NOT NULL
-            AND ABS(total_assets - (total_liabilities + stockholders_equity)) > 1000000
+            SELECT 
+                (SELECT COUNT(*) FROM balance_sheets
+                 WHERE total_assets IS NOT NULL 
+                 AND total_liabilities IS NOT NULL 
+                 AND stockholders_equity IS NOT NULL
+                 AND ABS(total_assets - (total_liabilities + stockholders_equity)) > 1000000) as balance_inconsistencies,
+                (SELECT COUNT(*) FROM (
+                    SELECT symbol
+                    FROM companies 
+                    GROUP BY symbol 
+                    HAVING COUNT(*) > 1
+                 ) duplicates) as duplicate_companies
         """)
-        balance_inconsistencies = self.cursor.fetchone()[0]
+        balance_inconsistencies, duplicate_companies = self.cursor.fetchone()
         
         if balance_inconsistencies == 0:
             print("✅ Balance sheet equations are consistent")
@@ -203,37 +211,36 @@ class DatabaseNormalizationChecker:
             print(f"⚠️ {balance_inconsistencies} balance sheet inconsistencies found")
         
         # Check for duplicate company records
-        self.cursor.execute("""
-            SELECT symbol, COUNT(*) 
-            FROM companies 
-            GROUP BY symbol 
-            HAVING COUNT(*) > 1
-        """)
-        duplicate_companies = self.cursor.fetchall()
-        
-        if not duplicate_companies:
+        if duplicate_companies == 0:
             print("✅ No duplicate company records")
         else:
-            print(f"❌ {len(duplicate_companies)} duplicate company symbols found")
+            print(f"❌ {duplicate_companies} duplicate company symbols found")
         
-        return balance_inconsistencies == 0 and not duplicate_companies
+        return balance_inconsistencies == 0 and duplicate_companies == 0
     
     def check_database_performance(self):
         """Check database performance metrics"""
         print("\n⚡ DATABASE PERFORMANCE ANALYSIS")
         print("=" * 60)
         
-        # Check index usage
+        # Index names and the five largest tables in one round trip
         self.cursor.execute("""
             SELECT 
-                tablename,
-                indexname,
-                indexdef
-            FROM pg_indexes 
-            WHERE schemaname = 'public'
-            ORDER BY tablename, indexname
+                ARRAY(
+                    SELECT indexname
+                    FROM pg_indexes 
+                    WHERE schemaname = 'public'
+                    ORDER BY tablename, indexname
+                ) as indexes,
+                ARRAY(
+                    SELECT ARRAY[tablename::text, pg_size_pretty(pg_total_relation_size(schemaname||'.'||tablename))]
+                    FROM pg_tables 
+                    WHERE schemaname = 'public'
+                    ORDER BY pg_total_relation_size(schemaname||'.'||tablename) DESC
+                    LIMIT 5
+                ) as table_sizes
         """)
-        indexes = self.cursor.fetchall()
+        indexes, table_sizes = self.cursor.fetchone()
         
         print(f"📊 Indexes: {len(indexes)} total indexes found")
         
@@ -245,28 +252,15 @@ class DatabaseNormalizationChecker:
             'idx_balance_sheets_company_period'
         ]
         
-        existing_indexes = [idx[1] for idx in indexes]
-        missing_indexes = [idx for idx in key_indexes if idx not in existing_indexes]
+        missing_indexes = [idx for idx in key_indexes if idx not in indexes]
         
         if not missing_indexes:
             print("✅ All key performance indexes are present")
         else:
             print(f"⚠️ Missing key indexes: {missing_indexes}")
         
-        # Check table sizes
-        self.cursor.execute("""
-            SELECT 
-                schemaname,
-                tablename,
-                pg_size_pretty(pg_total_relation_size(schemaname||'.'||tablename)) as size
-            FROM pg_tables 
-            WHERE schemaname = 'public'
-            ORDER BY pg_total_relation_size(schemaname||'.'||tablename) DESC
-        """)
-        
-        table_sizes = self.cursor.fetchall()
         print("\n📊 Table Sizes:")
-        for schema, table, size in table_sizes[:5]:
+        for table, size in table_sizes:
             print(f"   {table:<20}: {size}")
         
         return len(missing_indexes) == 0
@@ -316,11 +310,11 @@ class DatabaseNormalizationChecker:
         return score
     
     def close(self):
-        """Close database connection"""
+        """Return the database connection to the pool unless it was passed in"""
         if self.cursor:
             self.cursor.close()
-        if self.conn:
-            self.conn.close()
+        if self.conn and self.owns_conn:
+            get_connection_pool().putconn(self.conn)
 
 if __name__ == "__main__":
     print("🚀 COMPREHENSIVE DATABASE NORMALIZATION & QUALITY CHECK")
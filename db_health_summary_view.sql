@@ -0,0 +1,30 @@
+
+-- Pre-aggregated accuracy summary for database_error_checker.py
+-- Serves the DATABASE ACCURACY SUMMARY figures in a single row read; the checker
+-- falls back to the live query when this view has not been created
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_db_health_summary AS
+WITH ph AS (
+    SELECT COUNT(*) as total_price_records,
+           COUNT(DISTINCT company_id) as companies_with_prices,
+           MAX(date) as latest_price_date
+    FROM price_history
+)
+SELECT
+    1 AS id,
+    NOW() AS refreshed_at,
+    (SELECT COUNT(*) FROM companies) as total_companies,
+    ph.total_price_records,
+    ph.companies_with_prices,
+    (SELECT COUNT(*) FROM income_statements) as financial_records,
+    ph.latest_price_date,
+    (SELECT COUNT(DISTINCT company_id) FROM company_metrics) as companies_with_metrics
+FROM ph;
+
+-- REFRESH ... CONCURRENTLY needs a unique index on plain columns
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_db_health_summary_id ON mv_db_health_summary(id);
+
+-- data_quality_maintenance.py refreshes the view in its daily run; to refresh
+-- it on its own schedule instead (requires the pg_cron extension):
+-- SELECT cron.schedule('refresh-db-health-summary', '*/5 * * * *',
+--                      'REFRESH MATERIALIZED VIEW CONCURRENTLY mv_db_health_summary');
@@ -0,0 +1,55 @@
+
+-- Pre-aggregated status summary for comprehensive_status_checker.py
+-- Serves the table and data quality sections of the status report in a single SELECT
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_db_status_summary AS
+SELECT
+    1 AS id,
+    NOW() AS refreshed_at,
+    
+    -- Table record counts
+    (SELECT COUNT(*) FROM companies) AS companies_records,
+    (SELECT COUNT(*) FROM price_history) AS price_history_records,
+    (SELECT COUNT(*) FROM company_metrics) AS company_metrics_records,
+    (SELECT COUNT(*) FROM income_statements) AS income_statements_records,
+    (SELECT COUNT(*) FROM balance_sheets) AS balance_sheets_records,
+    (SELECT COUNT(*) FROM cash_flow_statements) AS cash_flow_statements_records,
+    (SELECT COUNT(*) FROM corporate_actions) AS corporate_actions_records,
+    (SELECT COUNT(*) FROM earnings) AS earnings_records,
+    (SELECT COUNT(*) FROM holders) AS holders_records,
+    (SELECT COUNT(*) FROM data_updates) AS data_updates_records,
+    
+    -- Unique companies per table
+    (SELECT COUNT(*) FROM companies) AS companies_companies,
+    (SELECT COUNT(DISTINCT company_id) FROM price_history) AS price_history_companies,
+    (SELECT COUNT(DISTINCT company_id) FROM company_metrics) AS company_metrics_companies,
+    (SELECT COUNT(DISTINCT company_id) FROM income_statements) AS income_statements_companies,
+    (SELECT COUNT(DISTINCT company_id) FROM balance_sheets) AS balance_sheets_companies,
+    (SELECT COUNT(DISTINCT company_id) FROM cash_flow_statements) AS cash_flow_statements_companies,
+    (SELECT COUNT(DISTINCT company_id) FROM corporate_actions) AS corporate_actions_companies,
+    (SELECT COUNT(DISTINCT company_id) FROM earnings) AS earnings_companies,
+    (SELECT COUNT(DISTINCT company_id) FROM holders) AS holders_companies,
+    (SELECT COUNT(DISTINCT company_id) FROM data_updates) AS data_updates_companies,
+    
+    -- Data quality
+    (SELECT COUNT(*) FROM companies) AS total_companies,
+    (SELECT COUNT(*) FROM companies WHERE symbol IS NOT NULL) AS with_symbol,
+    (SELECT COUNT(*) FROM companies WHERE long_name IS NOT NULL) AS with_company_name,
+    (SELECT COUNT(*) FROM companies WHERE sector IS NOT NULL) AS with_sector,
+    (SELECT COUNT(*) FROM companies c
+        WHERE EXISTS (SELECT 1 FROM price_history ph WHERE ph.company_id = c.id)) AS with_price_data,
+    (SELECT COUNT(*) FROM companies c
+        WHERE EXISTS (SELECT 1 FROM company_metrics cm WHERE cm.company_id = c.id)) AS with_metrics,
+    (SELECT COUNT(*) FROM companies c
+        WHERE EXISTS (SELECT 1 FROM income_statements i WHERE i.company_id = c.id)
+           OR EXISTS (SELECT 1 FROM balance_sheets b WHERE b.company_id = c.id)
+           OR EXISTS (SELECT 1 FROM cash_flow_statements cf WHERE cf.company_id = c.id)) AS with_financial_data,
+    (SELECT COUNT(*) FROM companies c
+        WHERE EXISTS (SELECT 1 FROM corporate_actions ca WHERE ca.company_id = c.id)) AS with_corporate_actions;
+
+-- REFRESH ... CONCURRENTLY needs a unique index on plain columns
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_db_status_summary_id ON mv_db_status_summary(id);
+
+-- Refresh every 5 minutes (requires the pg_cron extension)
+-- SELECT cron.schedule('refresh-db-status-summary', '*/5 * * * *',
+--                      'REFRESH MATERIALIZED VIEW CONCURRENTLY mv_db_status_summary');
@@ -6,9 +6,9 @@ Export database data to SQL dump for importing into remixed instance
 
 import os
 import subprocess
-import psycopg2
 from datetime import datetime
 import logging
+from database_config import get_connection_pool
 
 def setup_logging():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -61,8 +61,8 @@ def get_table_counts():
     logger = setup_logging()
     
     try:
-        database_url = os.getenv('DATABASE_URL')
-        conn = psycopg2.connect(database_url)
+        pool = get_connection_pool()
+        conn = pool.getconn()
         cursor = conn.cursor()
         
         tables = [
@@ -81,7 +81,7 @@ def get_table_counts():
                 logger.warning(f"  {table}: Error getting count - {e}")
         
         cursor.close()
-        conn.close()
+        pool.putconn(conn)
         
     except Exception as e:
         logger.error(f"Error getting table counts: {e}")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Status Daemon for the NSE Stock Database System
+Keeps one long-lived database connection open and serves comprehensive status
+reports as JSON over a local Unix socket
+"""
+
+import os
+import json
+import logging
+import socketserver
+from comprehensive_status_checker import ComprehensiveStatusChecker, STATUS_DAEMON_SOCKET
+
+class StatusRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # Any single byte is a request for a fresh report
+        if not self.request.recv(1):
+            return
+        report = self.server.collect_report()
+        self.request.sendall(json.dumps(report, default=str).encode())
+
+class StatusDaemon(socketserver.UnixStreamServer):
+    def __init__(self, socket_path=STATUS_DAEMON_SOCKET):
+        self.logger = logging.getLogger(__name__)
+        self.checker = None
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, StatusRequestHandler)
+        self.logger.info(f"Status daemon listening on {socket_path}")
+    
+    def collect_report(self):
+        """Run the checks on the persistent connection, reconnecting if it was dropped"""
+        try:
+            if self.checker is None or self.checker.conn.closed:
+                self.checker = ComprehensiveStatusChecker(render=False)
+            return self.checker.run_comprehensive_check()
+        except Exception as e:
+            self.logger.error(f"❌ Status check failed: {e}")
+            if self.checker is not None:
+                self.checker.close()
+                self.checker = None
+            return {'error': str(e)}
+    
+    def server_close(self):
+        super().server_close()
+        if self.checker is not None:
+            self.checker.close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    daemon = StatusDaemon()
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.server_close()
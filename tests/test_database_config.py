@@ -0,0 +1,65 @@
+"""
+Tests for database_config's pooled connections
+
+To run all tests in suite from commandline:
+   python -m unittest tests.test_database_config
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database_config import PooledConnection
+
+
+class StubConnection:
+    def __init__(self):
+        self.autocommit = False
+        self.isolation_level = None
+        self.closed = 0
+
+
+class StubPool:
+    closed = False
+
+    def __init__(self):
+        self.returned = []
+
+    def putconn(self, conn):
+        self.returned.append(conn)
+
+
+class TestPooledConnection(unittest.TestCase):
+    def setUp(self):
+        self.pool = StubPool()
+        self.raw = StubConnection()
+        self.conn = PooledConnection(self.pool, self.raw)
+
+    def test_autocommitReachesPooledConnection(self):
+        self.conn.autocommit = True
+        self.assertTrue(self.raw.autocommit)
+        self.assertTrue(self.conn.autocommit)
+
+    def test_isolationLevelReachesPooledConnection(self):
+        self.conn.isolation_level = 'SERIALIZABLE'
+        self.assertEqual(self.raw.isolation_level, 'SERIALIZABLE')
+
+    def test_closeReturnsConnectionOnce(self):
+        self.conn.close()
+        self.conn.close()
+        self.assertEqual(self.pool.returned, [self.raw])
+        self.assertTrue(self.conn.closed)
+
+    def test_setAfterCloseRaises(self):
+        self.conn.close()
+        with self.assertRaises(AttributeError):
+            self.conn.autocommit = True
+
+    def test_unclosedConnectionReturnedOnCollection(self):
+        del self.conn
+        self.assertEqual(self.pool.returned, [self.raw])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,62 @@ from datetime import datetime
 import logging
 
 class YFinanceDataLoader:
+    # Source row label and type for each value column, in INSERT order
+    INCOME_STATEMENT_FIELDS = [
+        ('Total Revenue', 'int'),
+        ('Cost Of Revenue', 'int'),
+        ('Gross Profit', 'int'),
+        ('Operating Income', 'int'),
+        ('EBIT', 'int'),
+        ('EBITDA', 'int'),
+        ('Net Income', 'int'),
+        ('Net Income Common Stockholders', 'int'),
+        ('Diluted EPS', 'float'),
+        ('Basic EPS', 'float'),
+        ('Operating Expense', 'int'),
+        ('Interest Expense', 'int'),
+        ('Tax Provision', 'int'),
+        ('Normalized Income', 'int'),
+        ('Total Expenses', 'int')
+    ]
+    
+    BALANCE_SHEET_FIELDS = [
+        ('Total Assets', 'int'),
+        ('Total Liabilities Net Minority Interest', 'int'),
+        ('Stockholders Equity', 'int'),
+        ('Total Debt', 'int'),
+        ('Cash And Cash Equivalents', 'int'),
+        ('Current Assets', 'int'),
+        ('Current Liabilities', 'int'),
+        ('Working Capital', 'int'),
+        ('Retained Earnings', 'int'),
+        ('Common Stock', 'int'),
+        ('Inventory', 'int'),
+        ('Accounts Receivable', 'int'),
+        ('Accounts Payable', 'int'),
+        ('Net PPE', 'int'),
+        ('Goodwill', 'int'),
+        ('Total Equity Gross Minority Interest', 'int'),
+        ('Minority Interest', 'int')
+    ]
+    
+    CASH_FLOW_FIELDS = [
+        ('Operating Cash Flow', 'int'),
+        ('Investing Cash Flow', 'int'),
+        ('Financing Cash Flow', 'int'),
+        ('Free Cash Flow', 'int'),
+        ('Capital Expenditure', 'int'),
+        ('Net Income From Continuing Operations', 'int'),
+        ('Depreciation And Amortization', 'int'),
+        ('Change In Working Capital', 'int'),
+        ('Issuance Of Debt', 'int'),
+        ('Repayment Of Debt', 'int'),
+        ('Cash Dividends Paid', 'int'),
+        ('End Cash Position', 'int'),
+        ('Beginning Cash Position', 'int'),
+        ('Changes In Cash', 'int')
+    ]
+    
     def __init__(self, db_config):
         """
         Initialize the data loader with database configuration
@@ -109,18 +165,19 @@ class YFinanceDataLoader:
         
         # Prepare data for bulk insert
         price_data = []
-        for date, row in hist.iterrows():
+        columns = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+        for date, open_, high, low, close, volume, dividends, splits in hist[columns].itertuples(name=None):
             price_data.append((
                 company_id,
                 date.date(),
-                float(row['Open']) if pd.notna(row['Open']) else None,
-                float(row['High']) if pd.notna(row['High']) else None,
-                float(row['Low']) if pd.notna(row['Low']) else None,
-                float(row['Close']) if pd.notna(row['Close']) else None,
-                float(row['Close']) if pd.notna(row['Close']) else None,  # Using Close as Adj Close
-                int(row['Volume']) if pd.notna(row['Volume']) else None,
-                float(row['Dividends']) if pd.notna(row['Dividends']) else 0,
-                float(row['Stock Splits']) if pd.notna(row['Stock Splits']) else 0
+                float(open_) if pd.notna(open_) else None,
+                float(high) if pd.notna(high) else None,
+                float(low) if pd.notna(low) else None,
+                float(close) if pd.notna(close) else None,
+                float(close) if pd.notna(close) else None,  # Using Close as Adj Close
+                int(volume) if pd.notna(volume) else None,
+                float(dividends) if pd.notna(dividends) else 0,
+                float(splits) if pd.notna(splits) else 0
             ))
         
         # Bulk insert
@@ -263,6 +320,12 @@ class YFinanceDataLoader:
             self._load_balance_sheets(company_id, balance_sheet, period_type)
             self._load_cashflow_statements(company_id, cashflow, period_type)
     
+    def _statement_rows(self, df, fields):
+        """(period_ending, value, ...) for each statement row, in one itertuples pass over the needed columns"""
+        converters = [self._safe_int if kind == 'int' else self._safe_float for _, kind in fields]
+        for date, *values in df.reindex(columns=[label for label, _ in fields]).itertuples(name=None):
+            yield (date.date(), *(convert(value) for convert, value in zip(converters, values)))
+    
     def _load_income_statements(self, company_id, df, period_type):
         """Load income statement data"""
         if df.empty:
@@ -276,7 +339,7 @@ class YFinanceDataLoader:
             (company_id, period_type)
         )
         
-        for date, row in df.iterrows():
+        for period_ending, *values in self._statement_rows(df, self.INCOME_STATEMENT_FIELDS):
             cursor.execute("""
                 INSERT INTO income_statements (
                     company_id, period_ending, period_type, total_revenue, cost_of_revenue,
@@ -284,24 +347,7 @@ class YFinanceDataLoader:
                     net_income_common_stockholders, diluted_eps, basic_eps, operating_expense,
                     interest_expense, tax_provision, normalized_income, total_expenses
                 ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                company_id, date.date(), period_type,
-                self._safe_int(row.get('Total Revenue')),
-                self._safe_int(row.get('Cost Of Revenue')),
-                self._safe_int(row.get('Gross Profit')),
-                self._safe_int(row.get('Operating Income')),
-                self._safe_int(row.get('EBIT')),
-                self._safe_int(row.get('EBITDA')),
-                self._safe_int(row.get('Net Income')),
-                self._safe_int(row.get('Net Income Common Stockholders')),
-                self._safe_float(row.get('Diluted EPS')),
-                self._safe_float(row.get('Basic EPS')),
-                self._safe_int(row.get('Operating Expense')),
-                self._safe_int(row.get('Interest Expense')),
-                self._safe_int(row.get('Tax Provision')),
-                self._safe_int(row.get('Normalized Income')),
-                self._safe_int(row.get('Total Expenses'))
-            ))
+            """, (company_id, period_ending, period_type, *values))
         
         self.conn.commit()
         cursor.close()
@@ -319,7 +365,7 @@ class YFinanceDataLoader:
             (company_id, period_type)
         )
         
-        for date, row in df.iterrows():
+        for period_ending, *values in self._statement_rows(df, self.BALANCE_SHEET_FIELDS):
             cursor.execute("""
                 INSERT INTO balance_sheets (
                     company_id, period_ending, period_type, total_assets, total_liabilities,
@@ -328,26 +374,7 @@ class YFinanceDataLoader:
                     inventory, accounts_receivable, accounts_payable, net_ppe, goodwill,
                     total_equity_gross_minority_interest, minority_interest
                 ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                company_id, date.date(), period_type,
-                self._safe_int(row.get('Total Assets')),
-                self._safe_int(row.get('Total Liabilities Net Minority Interest')),
-                self._safe_int(row.get('Stockholders Equity')),
-                self._safe_int(row.get('Total Debt')),
-                self._safe_int(row.get('Cash And Cash Equivalents')),
-                self._safe_int(row.get('Current Assets')),
-                self._safe_int(row.get('Current Liabilities')),
-                self._safe_int(row.get('Working Capital')),
-                self._safe_int(row.get('Retained Earnings')),
-                self._safe_int(row.get('Common Stock')),
-                self._safe_int(row.get('Inventory')),
-                self._safe_int(row.get('Accounts Receivable')),
-                self._safe_int(row.get('Accounts Payable')),
-                self._safe_int(row.get('Net PPE')),
-                self._safe_int(row.get('Goodwill')),
-                self._safe_int(row.get('Total Equity Gross Minority Interest')),
-                self._safe_int(row.get('Minority Interest'))
-            ))
+            """, (company_id, period_ending, period_type, *values))
         
         self.conn.commit()
         cursor.close()
@@ -365,7 +392,7 @@ class YFinanceDataLoader:
             (company_id, period_type)
         )
         
-        for date, row in df.iterrows():
+        for period_ending, *values in self._statement_rows(df, self.CASH_FLOW_FIELDS):
             cursor.execute("""
                 INSERT INTO cash_flow_statements (
                     company_id, period_ending, period_type, operating_cash_flow, investing_cash_flow,
@@ -374,23 +401,7 @@ class YFinanceDataLoader:
                     change_in_working_capital, issuance_of_debt, repayment_of_debt,
                     cash_dividends_paid, end_cash_position, beginning_cash_position, changes_in_cash
                 ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                company_id, date.date(), period_type,
-                self._safe_int(row.get('Operating Cash Flow')),
-                self._safe_int(row.get('Investing Cash Flow')),
-                self._safe_int(row.get('Financing Cash Flow')),
-                self._safe_int(row.get('Free Cash Flow')),
-                self._safe_int(row.get('Capital Expenditure')),
-                self._safe_int(row.get('Net Income From Continuing Operations')),
-                self._safe_int(row.get('Depreciation And Amortization')),
-                self._safe_int(row.get('Change In Working Capital')),
-                self._safe_int(row.get('Issuance Of Debt')),
-                self._safe_int(row.get('Repayment Of Debt')),
-                self._safe_int(row.get('Cash Dividends Paid')),
-                self._safe_int(row.get('End Cash Position')),
-                self._safe_int(row.get('Beginning Cash Position')),
-                self._safe_int(row.get('Changes In Cash'))
-            ))
+            """, (company_id, period_ending, period_type, *values))
         
         self.conn.commit()
         cursor.close()
@@ -404,21 +415,17 @@ class YFinanceDataLoader:
         # Clear existing data
         cursor.execute("DELETE FROM corporate_actions WHERE company_id = %s", (company_id,))
         
-        # Load dividends
-        dividends = ticker.dividends
-        for date, amount in dividends.items():
-            cursor.execute("""
-                INSERT INTO corporate_actions (company_id, action_date, action_type, amount)
-                VALUES (%s, %s, %s, %s)
-            """, (company_id, date.date(), 'dividend', float(amount)))
-        
-        # Load stock splits
-        splits = ticker.splits
-        for date, ratio in splits.items():
-            cursor.execute("""
-                INSERT INTO corporate_actions (company_id, action_date, action_type, amount)
-                VALUES (%s, %s, %s, %s)
-            """, (company_id, date.date(), 'stock_split', float(ratio)))
+        # Dividends and stock splits go in one statement
+        actions = [
+            (company_id, date.date(), 'dividend', float(amount)) for date, amount in ticker.dividends.items()
+        ] + [
+            (company_id, date.date(), 'stock_split', float(ratio)) for date, ratio in ticker.splits.items()
+        ]
+        execute_values(
+            cursor,
+            """INSERT INTO corporate_actions (company_id, action_date, action_type, amount) VALUES %s""",
+            actions
+        )
         
         self.conn.commit()
         cursor.close()
@@ -11,6 +11,47 @@ import json
 from database_config import get_database_config
 from nse_symbols_fetcher import NSESymbolsFetcher
 
+# cash_flow_statements column -> cash flow row label, in INSERT order
+CF_COLUMNS = [
+    ('operating_cash_flow', 'Operating Cash Flow'),
+    ('investing_cash_flow', 'Investing Cash Flow'),
+    ('financing_cash_flow', 'Financing Cash Flow'),
+    ('free_cash_flow', 'Free Cash Flow'),
+    ('capital_expenditure', 'Capital Expenditure'),
+    ('net_income', 'Net Income'),
+    ('net_income_from_continuing_operations', 'Net Income From Continuing Operations'),
+    ('depreciation_depletion_and_amortization', 'Depreciation Depletion And Amortization'),
+    ('depreciation_and_amortization', 'Depreciation And Amortization'),
+    ('deferred_income_tax', 'Deferred Income Tax'),
+    ('stock_based_compensation', 'Stock Based Compensation'),
+    ('change_in_working_capital', 'Change In Working Capital'),
+    ('change_in_accounts_receivable', 'Change In Accounts Receivable'),
+    ('change_in_inventory', 'Change In Inventory'),
+    ('change_in_accounts_payable', 'Change In Accounts Payable'),
+    ('change_in_other_working_capital', 'Change In Other Working Capital'),
+    ('other_non_cash_items', 'Other Non Cash Items'),
+    ('investments_in_property_plant_and_equipment', 'Investments In Property Plant And Equipment'),
+    ('acquisitions_net', 'Acquisitions Net'),
+    ('purchases_of_investments', 'Purchases Of Investments'),
+    ('sales_maturities_of_investments', 'Sales Maturities Of Investments'),
+    ('other_investing_activities', 'Other Investing Activities'),
+    ('issuance_of_debt', 'Issuance Of Debt'),
+    ('repayment_of_debt', 'Repayment Of Debt'),
+    ('repurchase_of_capital_stock', 'Repurchase Of Capital Stock'),
+    ('cash_dividends_paid', 'Cash Dividends Paid'),
+    ('other_financing_activities', 'Other Financing Activities'),
+    ('effect_of_exchange_rate_changes', 'Effect Of Exchange Rate Changes'),
+    ('end_cash_position', 'End Cash Position'),
+    ('beginning_cash_position', 'Beginning Cash Position'),
+    ('changes_in_cash', 'Changes In Cash'),
+    ('financing_cash_flow_net', 'Financing Cash Flow')
+]
+CF_INSERT_SQL = f"""
+    INSERT INTO cash_flow_statements (company_id, period_ending, period_type, {', '.join(col for col, _ in CF_COLUMNS)})
+    VALUES %s
+    ON CONFLICT (company_id, period_ending, period_type) DO NOTHING
+"""
+
 class YFinanceNSEDownloader:
     def __init__(self):
         """
@@ -18,6 +59,9 @@ class YFinanceNSEDownloader:
         """
         self.db_config = get_database_config()
         self.conn = None
+        # symbol -> id of committed companies: seeded by load_company_ids, then extended as
+        # each symbol's transaction commits (a rollback would discard a company created in it)
+        self.company_id_cache = {}
         self.setup_logging()
         self.batch_size = 50  # Larger batches for 4000+ stocks efficiency
         self.delay_between_stocks = 0.3  # Optimized delay for high volume
@@ -125,8 +169,19 @@ class YFinanceNSEDownloader:
         except Exception:
             return None
 
+    def load_company_ids(self):
+        """Cache the IDs of all existing companies with one query instead of a lookup per symbol"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT symbol, id FROM companies")
+        self.company_id_cache = dict(cursor.fetchall())
+        cursor.close()
+        self.conn.commit()
+
     def get_or_create_company(self, symbol: str, ticker_info: Dict = None) -> int:
         """Get existing company ID or create new company record"""
+        if symbol in self.company_id_cache:
+            return self.company_id_cache[symbol]
+
         cursor = self.conn.cursor(cursor_factory=RealDictCursor)
 
         # Check if company exists
@@ -242,60 +297,60 @@ class YFinanceNSEDownloader:
                     self.logger.error(f"Error getting info for {symbol}: {e}")
                     company_id = self.get_or_create_company(symbol)
 
-            # Download historical data (5 years)
-            price_success = False
-            try:
-                end_date = datetime.now()
-                start_date = end_date - timedelta(days=5*365)  # 5 years
-                hist_data = ticker.history(start=start_date, end=end_date)
-
-                if not hist_data.empty:
-                    self.store_price_history(company_id, hist_data)
-                    self.logger.info(f"✓ Stored {len(hist_data)} price records for {symbol}")
-                    price_success = True
-                else:
-                    self.logger.warning(f"⚠️ No historical data for {symbol}")
-
-            except Exception as e:
-                self.logger.error(f"❌ Error downloading history for {symbol}: {e}")
-
-            # Download financial statements
-            financials_success = False
-            try:
-                self.logger.info(f"📊 Downloading financial statements for {symbol}")
-
-                # Annual financials - try each type separately
-                annual_success = False
+                # Download historical data (5 years)
+                price_success = False
                 try:
-                    self.download_and_store_financials(ticker, company_id, symbol, 'annual')
-                    annual_success = True
-                    self.logger.info(f"✓ Annual financials downloaded for {symbol}")
+                    end_date = datetime.now()
+                    start_date = end_date - timedelta(days=5*365)  # 5 years
+                    hist_data = ticker.history(start=start_date, end=end_date)
+
+                    if not hist_data.empty:
+                        self.store_price_history(company_id, hist_data)
+                        self.logger.info(f"✓ Stored {len(hist_data)} price records for {symbol}")
+                        price_success = True
+                    else:
+                        self.logger.warning(f"⚠️ No historical data for {symbol}")
+
                 except Exception as e:
-                    self.logger.warning(f"⚠️ Annual financials failed for {symbol}: {e}")
+                    self.logger.error(f"❌ Error downloading history for {symbol}: {e}")
 
-                # Quarterly financials - try each type separately
-                quarterly_success = False
+                # Download financial statements
+                financials_success = False
                 try:
-                    self.download_and_store_financials(ticker, company_id, symbol, 'quarterly')
-                    quarterly_success = True
-                    self.logger.info(f"✓ Quarterly financials downloaded for {symbol}")
-                except Exception as e:
-                    self.logger.warning(f"⚠️ Quarterly financials failed for {symbol}: {e}")
+                    self.logger.info(f"📊 Downloading financial statements for {symbol}")
 
-                financials_success = annual_success or quarterly_success
+                    # Annual financials - try each type separately
+                    annual_success = False
+                    try:
+                        self.download_and_store_financials(ticker, company_id, symbol, 'annual')
+                        annual_success = True
+                        self.logger.info(f"✓ Annual financials downloaded for {symbol}")
+                    except Exception as e:
+                        self.logger.warning(f"⚠️ Annual financials failed for {symbol}: {e}")
 
-            except Exception as e:
-                self.logger.error(f"❌ Error downloading financials for {symbol}: {e}")
+                    # Quarterly financials - try each type separately
+                    quarterly_success = False
+                    try:
+                        self.download_and_store_financials(ticker, company_id, symbol, 'quarterly')
+                        quarterly_success = True
+                        self.logger.info(f"✓ Quarterly financials downloaded for {symbol}")
+                    except Exception as e:
+                        self.logger.warning(f"⚠️ Quarterly financials failed for {symbol}: {e}")
 
-            # Download corporate actions
-            actions_success = False
-            try:
-                self.download_and_store_corporate_actions(ticker, company_id, symbol)
-                actions_success = True
-            except Exception as e:
-                self.logger.error(f"❌ Error downloading corporate actions for {symbol}: {e}")
+                    financials_success = annual_success or quarterly_success
+
+                except Exception as e:
+                    self.logger.error(f"❌ Error downloading financials for {symbol}: {e}")
+
+                # Download corporate actions
+                actions_success = False
+                try:
+                    self.download_and_store_corporate_actions(ticker, company_id, symbol)
+                    actions_success = True
+                except Exception as e:
+                    self.logger.error(f"❌ Error downloading corporate actions for {symbol}: {e}")
 
-            # Log successful download
+                # Log successful download
                 cursor.execute("""
                     INSERT INTO data_updates (company_id, table_name, update_type, records_affected, file_source)
                     VALUES (%s, %s, %s, %s, %s)
@@ -304,6 +359,7 @@ class YFinanceNSEDownloader:
                 # Commit the transaction
                 cursor.execute("COMMIT;")
                 cursor.close()
+                self.company_id_cache[symbol] = company_id
 
                 # Summary log
                 status_summary = []
@@ -706,61 +762,16 @@ class YFinanceNSEDownloader:
             (company_id, period_type)
         )
 
+        # One row per CF_COLUMNS label (missing labels read as NaN), so each period is a single column
+        values = data.reindex([label for _, label in CF_COLUMNS])
+        rows = []
         for col in data.columns:
             period_ending = self.safe_convert_to_date(col)
             if not period_ending:
                 continue
+            rows.append((company_id, period_ending, period_type, *map(self.safe_convert_to_int, values[col])))
 
-            cursor.execute("""
-                INSERT INTO cash_flow_statements (
-                    company_id, period_ending, period_type, operating_cash_flow, investing_cash_flow,
-                    financing_cash_flow, free_cash_flow, capital_expenditure, net_income,
-                    net_income_from_continuing_operations, depreciation_depletion_and_amortization,
-                    depreciation_and_amortization, deferred_income_tax, stock_based_compensation,
-                    change_in_working_capital, change_in_accounts_receivable, change_in_inventory,
-                    change_in_accounts_payable, change_in_other_working_capital, other_non_cash_items,
-                    investments_in_property_plant_and_equipment, acquisitions_net, purchases_of_investments,
-                    sales_maturities_of_investments, other_investing_activities, issuance_of_debt,
-                    repayment_of_debt, repurchase_of_capital_stock, cash_dividends_paid,
-                    other_financing_activities, effect_of_exchange_rate_changes, end_cash_position,
-                    beginning_cash_position, changes_in_cash, financing_cash_flow_net
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (company_id, period_ending, period_type) DO NOTHING
-            """, (
-                company_id, period_ending, period_type,
-                self.safe_convert_to_int(data.loc['Operating Cash Flow', col] if 'Operating Cash Flow' in data.index else None),
-                self.safe_convert_to_int(data.loc['Investing Cash Flow', col] if 'Investing Cash Flow' in data.index else None),
-                self.safe_convert_to_int(data.loc['Financing Cash Flow', col] if 'Financing Cash Flow' in data.index else None),
-                self.safe_convert_to_int(data.loc['Free Cash Flow', col] if 'Free Cash Flow' in data.index else None),
-                self.safe_convert_to_int(data.loc['Capital Expenditure', col] if 'Capital Expenditure' in data.index else None),
-                self.safe_convert_to_int(data.loc['Net Income', col] if 'Net Income' in data.index else None),
-                self.safe_convert_to_int(data.loc['Net Income From Continuing Operations', col] if 'Net Income From Continuing Operations' in data.index else None),
-                self.safe_convert_to_int(data.loc['Depreciation Depletion And Amortization', col] if 'Depreciation Depletion And Amortization' in data.index else None),
-                self.safe_convert_to_int(data.loc['Depreciation And Amortization', col] if 'Depreciation And Amortization' in data.index else None),
-                self.safe_convert_to_int(data.loc['Deferred Income Tax', col] if 'Deferred Income Tax' in data.index else None),
-                self.safe_convert_to_int(data.loc['Stock Based Compensation', col] if 'Stock Based Compensation' in data.index else None),
-                self.safe_convert_to_int(data.loc['Change In Working Capital', col] if 'Change In Working Capital' in data.index else None),
-                self.safe_convert_to_int(data.loc['Change In Accounts Receivable', col] if 'Change In Accounts Receivable' in data.index else None),
-                self.safe_convert_to_int(data.loc['Change In Inventory', col] if 'Change In Inventory' in data.index else None),
-                self.safe_convert_to_int(data.loc['Change In Accounts Payable', col] if 'Change In Accounts Payable' in data.index else None),
-                self.safe_convert_to_int(data.loc['Change In Other Working Capital', col] if 'Change In Other Working Capital' in data.index else None),
-                self.safe_convert_to_int(data.loc['Other Non Cash Items', col] if 'Other Non Cash Items' in data.index else None),
-                self.safe_convert_to_int(data.loc['Investments In Property Plant And Equipment', col] if 'Investments In Property Plant And Equipment' in data.index else None),
-                self.safe_convert_to_int(data.loc['Acquisitions Net', col] if 'Acquisitions Net' in data.index else None),
-                self.safe_convert_to_int(data.loc['Purchases Of Investments', col] if 'Purchases Of Investments' in data.index else None),
-                self.safe_convert_to_int(data.loc['Sales Maturities Of Investments', col] if 'Sales Maturities Of Investments' in data.index else None),
-                self.safe_convert_to_int(data.loc['Other Investing Activities', col] if 'Other Investing Activities' in data.index else None),
-                self.safe_convert_to_int(data.loc['Issuance Of Debt', col] if 'Issuance Of Debt' in data.index else None),
-                self.safe_convert_to_int(data.loc['Repayment Of Debt', col] if 'Repayment Of Debt' in data.index else None),
-                self.safe_convert_to_int(data.loc['Repurchase Of Capital Stock', col] if 'Repurchase Of Capital Stock' in data.index else None),
-                self.safe_convert_to_int(data.loc['Cash Dividends Paid', col] if 'Cash Dividends Paid' in data.index else None),
-                self.safe_convert_to_int(data.loc['Other Financing Activities', col] if 'Other Financing Activities' in data.index else None),
-                self.safe_convert_to_int(data.loc['Effect Of Exchange Rate Changes', col] if 'Effect Of Exchange Rate Changes' in data.index else None),
-                self.safe_convert_to_int(data.loc['End Cash Position', col] if 'End Cash Position' in data.index else None),
-                self.safe_convert_to_int(data.loc['Beginning Cash Position', col] if 'Beginning Cash Position' in data.index else None),
-                self.safe_convert_to_int(data.loc['Changes In Cash', col] if 'Changes In Cash' in data.index else None),
-                self.safe_convert_to_int(data.loc['Financing Cash Flow', col] if 'Financing Cash Flow' in data.index else None)
-            ))
+        execute_values(cursor, CF_INSERT_SQL, rows)
 
         cursor.close()
 
@@ -881,6 +892,8 @@ class YFinanceNSEDownloader:
                 self.logger.error("Failed to create database schema")
                 return False
 
+            self.load_company_ids()
+
             # Get symbols
             if os.path.exists(symbols_file):
                 with open(symbols_file, 'r') as f:
@@ -905,7 +918,8 @@ class YFinanceNSEDownloader:
 
             # Filter out existing companies if skip_existing is True
             if skip_existing:
-                existing_companies = self.get_existing_companies()
+                # load_company_ids has just read every existing symbol
+                existing_companies = set(self.company_id_cache)
                 symbols_to_download = [symbol for symbol in all_symbols if symbol not in existing_companies]
                 
                 self.logger.info(f"📊 Found {len(existing_companies)} companies already in database")